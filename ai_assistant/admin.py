@@ -1,11 +1,31 @@
 """
 =============================================================================
 LIFE RAINBOW 2.0 - Admin de AI Assistant
-Configuração do Django Admin para logs e configuração do assistente de IA
+Configuração do Django Admin para as sessões de conversa do assistente de IA
 =============================================================================
 """
 
 from django.contrib import admin
 
-# AI Assistant não tem models próprios no momento
-# Os logs e configurações podem ser adicionados futuramente
+from .models import MensagemAssistente, SessaoAssistente
+
+
+class MensagemAssistenteInline(admin.TabularInline):
+    model = MensagemAssistente
+    extra = 0
+    can_delete = False
+    fields = ['papel', 'conteudo', 'tool_calls', 'tool_call_id', 'tokens', 'created_at']
+    readonly_fields = fields
+
+
+@admin.register(SessaoAssistente)
+class SessaoAssistenteAdmin(admin.ModelAdmin):
+    """Admin (somente leitura) das conversas dos usuários com o assistente."""
+    list_display = ['id', 'usuario', 'encerrada', 'tokens_resumo', 'created_at', 'updated_at']
+    list_filter = ['encerrada']
+    search_fields = ['usuario__username', 'usuario__first_name', 'resumo']
+    readonly_fields = ['usuario', 'resumo', 'tokens_resumo', 'resumido_ate', 'created_at', 'updated_at']
+    inlines = [MensagemAssistenteInline]
+
+    def has_add_permission(self, request):
+        return False
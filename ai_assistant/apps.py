@@ -5,3 +5,7 @@ class AiAssistantConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ai_assistant'
     verbose_name = 'Assistente de IA'
+
+    def ready(self):
+        """Registra signals de invalidação do cache das funções."""
+        import ai_assistant.signals  # noqa: F401
@@ -0,0 +1,97 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Cache das Funções de Consulta do Assistente de IA
+Resultados de funções somente leitura por argumentos normalizados, com TTL
+=============================================================================
+
+Gestores repetem as mesmas perguntas ao longo do dia ("ranking do mês",
+"resumo financeiro de janeiro"). As funções declaradas com
+@ferramenta(somente_leitura=True) guardam o resultado no cache do Django:
+
+- chave: nome da função + versão + hash dos argumentos normalizados
+  (padrões da assinatura aplicados, textos sem espaços nas pontas, ordem
+  das chaves irrelevante) - {"dias": 30} e {} caem na mesma entrada
+- validade: TTL próprio de cada função
+- invalidação: signals dos models de que a função depende trocam a versão
+  da função após o commit (signals.py); as entradas antigas expiram sozinhas
+
+update()/bulk_create não disparam signals: nesses casos o TTL limita
+quanto tempo um resultado antigo pode ser servido.
+"""
+
+import hashlib
+import inspect
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, Tuple
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIXO = 'ai:ferramenta'
+
+
+def normalizar_argumentos(funcao: Callable, args: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Argumentos completos da chamada, com os padrões da assinatura.
+
+    Raises:
+        TypeError: argumentos que a função não aceita
+    """
+    vinculados = inspect.signature(funcao).bind(**args)
+    vinculados.apply_defaults()
+    return {
+        nome: valor.strip() if isinstance(valor, str) else valor
+        for nome, valor in vinculados.arguments.items()
+    }
+
+
+def _chave_versao(nome: str) -> str:
+    return f'{CACHE_PREFIXO}:versao:{nome}'
+
+
+def _chave(nome: str, args: Dict[str, Any]) -> str:
+    versao = cache.get_or_set(_chave_versao(nome), 0, timeout=None)
+    resumo = hashlib.sha1(
+        json.dumps(args, sort_keys=True, default=str).encode('utf-8')
+    ).hexdigest()
+    return f'{CACHE_PREFIXO}:{nome}:{versao}:{resumo}'
+
+
+def cacheavel(resultado: Any) -> bool:
+    """Erros não são guardados: a próxima pergunta tenta de novo."""
+    return not (isinstance(resultado, dict) and 'erro' in resultado)
+
+
+def executar_com_cache(
+    nome: str,
+    funcao: Callable,
+    args: Dict[str, Any],
+    ttl: int
+) -> Tuple[Any, bool]:
+    """
+    Resultado da função, do cache quando houver.
+
+    Returns:
+        tuple: (resultado, veio_do_cache)
+    """
+    args = normalizar_argumentos(funcao, args)
+    chave = _chave(nome, args)
+
+    resultado = cache.get(chave)
+    if resultado is not None:
+        return resultado, True
+
+    resultado = funcao(**args)
+    if cacheavel(resultado):
+        cache.set(chave, resultado, ttl)
+    return resultado, False
+
+
+def invalidar(*nomes: str) -> None:
+    """Descarta os resultados guardados das funções (troca a versão)."""
+    versao = time.time_ns()
+    cache.set_many({_chave_versao(nome): versao for nome in nomes}, timeout=None)
+    logger.debug(f'🧹 Cache de funções da IA invalidado: {", ".join(nomes)}')
@@ -0,0 +1,168 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Execução das Funções do Assistente de IA
+Ferramentas do ORM em threads, chamadas independentes em paralelo e timeout
+=============================================================================
+
+As funções de functions.py usam o ORM síncrono do Django, que não pode
+rodar dentro do event loop (SynchronousOnlyOperation). Aqui cada chamada:
+
+- roda via sync_to_async em um pool de threads limitado
+  (AI_FERRAMENTAS_WORKERS), sem ocupar o event loop do servidor ASGI
+- é executada em paralelo com as demais chamadas da mesma resposta do
+  modelo (asyncio.gather); os resultados voltam na ordem das chamadas
+- tem timeout próprio (o da @ferramenta ou AI_FERRAMENTA_TIMEOUT); ao
+  esgotar, a resposta segue sem esperar e a thread termina a função em
+  segundo plano - consultas voltam como erro; funções que alteram dados
+  voltam como 'pendente', com aviso para o modelo não repetir a ação
+- se a função for somente leitura, reaproveita o resultado de uma
+  chamada igual ainda válida no cache (cache_ferramentas.py); as demais
+  alteram dados e sempre executam
+
+Funções e opções vêm do registro (@ferramenta em functions.py); o pool
+de threads só é criado na primeira chamada.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from . import registro
+from .cache_ferramentas import executar_com_cache
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _obter_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.AI_FERRAMENTAS_WORKERS,
+            thread_name_prefix='ai-ferramentas'
+        )
+    return _executor
+
+
+def _executar_sincrono(
+    ferramenta: registro.Ferramenta,
+    args: Dict[str, Any]
+) -> Tuple[Any, Optional[bool]]:
+    """(resultado, veio_do_cache) - None quando a função não usa cache."""
+    # Threads do pool reaproveitam a conexão: respeita CONN_MAX_AGE e
+    # descarta conexões quebradas, como o ciclo de uma requisição
+    close_old_connections()
+    try:
+        if ferramenta.somente_leitura and settings.AI_CACHE_FERRAMENTAS:
+            return executar_com_cache(ferramenta.nome, ferramenta.funcao, args, ttl=ferramenta.ttl)
+        return ferramenta.funcao(**args), None
+    finally:
+        close_old_connections()
+
+
+def novas_estatisticas() -> Dict[str, Any]:
+    """Contadores de cache das funções de uma resposta (metricas.cache)."""
+    return {"hits": 0, "misses": 0, "funcoes_em_cache": []}
+
+
+async def executar_ferramenta(
+    nome: str,
+    argumentos: str,
+    usuario: Any = None,
+    estatisticas: Dict[str, Any] = None
+) -> Any:
+    """
+    Executa uma chamada de função do modelo.
+
+    Args:
+        nome: Nome da função
+        argumentos: JSON dos argumentos (como vem da API)
+        usuario: Usuário que fez o pedido
+        estatisticas: novas_estatisticas() a atualizar com hit/miss do cache
+
+    Returns:
+        Resultado da função ou {"erro": ...}
+    """
+    ferramenta = registro.obter(nome)
+    if ferramenta is None:
+        return {"erro": f"Função '{nome}' não encontrada"}
+
+    try:
+        args = json.loads(argumentos or '{}')
+    except json.JSONDecodeError:
+        return {"erro": f"Argumentos inválidos para '{nome}'"}
+
+    if usuario and ferramenta.com_usuario:
+        args['usuario'] = usuario
+
+    timeout = ferramenta.timeout or settings.AI_FERRAMENTA_TIMEOUT
+    logger.info(f"Executando função: {nome} com args: {args}")
+    inicio = time.perf_counter()
+
+    try:
+        resultado, do_cache = await asyncio.wait_for(
+            sync_to_async(_executar_sincrono, thread_sensitive=False, executor=_obter_executor())(ferramenta, args),
+            timeout=timeout
+        )
+    except asyncio.TimeoutError:
+        logger.warning(f"⏱️ Função {nome} excedeu {timeout}s")
+        if ferramenta.somente_leitura:
+            return {"erro": f"A consulta '{nome}' demorou mais de {timeout}s e foi interrompida"}
+        # A thread segue executando e pode gravar/enviar: repetir duplicaria a ação
+        return {
+            "situacao": "pendente",
+            "aviso": (
+                f"A ação '{nome}' passou de {timeout}s sem confirmação e ainda pode ser "
+                "concluída em segundo plano. NÃO repita esta chamada; informe ao usuário "
+                "que a confirmação está pendente."
+            ),
+        }
+    except Exception as e:
+        logger.error(f"Erro ao executar função {nome}: {e}")
+        return {"erro": str(e)}
+    finally:
+        logger.debug(f"Função {nome} em {time.perf_counter() - inicio:.2f}s")
+
+    if estatisticas is not None and do_cache is not None:
+        if do_cache:
+            estatisticas["hits"] += 1
+            estatisticas["funcoes_em_cache"].append(nome)
+        else:
+            estatisticas["misses"] += 1
+    return resultado
+
+
+def mensagem_ferramenta(tool_call: Any, resultado: Any) -> Dict[str, Any]:
+    """Mensagem 'tool' com o resultado de uma chamada, para a próxima chamada ao modelo."""
+    return {
+        "tool_call_id": tool_call.id,
+        "role": "tool",
+        "content": json.dumps(resultado, ensure_ascii=False, default=str)
+    }
+
+
+async def executar_chamadas(
+    tool_calls: List[Any],
+    usuario: Any = None,
+    estatisticas: Dict[str, Any] = None
+) -> List[Dict[str, Any]]:
+    """
+    Executa em paralelo as chamadas de função de uma resposta do modelo.
+
+    Returns:
+        list: mensagens 'tool' para a próxima chamada, na ordem de tool_calls
+    """
+    resultados = await asyncio.gather(*(
+        executar_ferramenta(tc.function.name, tc.function.arguments, usuario, estatisticas)
+        for tc in tool_calls
+    ))
+
+    return [mensagem_ferramenta(tc, resultado) for tc, resultado in zip(tool_calls, resultados)]
@@ -3,15 +3,24 @@
 LIFE RAINBOW 2.0 - Funções para Function Calling da IA
 Implementações das funções que a IA pode chamar
 =============================================================================
+
+Cada função declara com @ferramenta o schema que a OpenAI recebe e como
+executá-la: somente leitura (cacheada), timeout, se recebe o usuário (ver
+registro.py).
+
+As funções são síncronas (usam o ORM diretamente). O assistente as executa
+em um pool de threads limitado, em paralelo e com timeout (ver executor.py).
 """
 
 import logging
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
-from django.db.models import Sum, Count, Q, F
+from django.db.models import Sum, Q, F
 from django.utils import timezone
 from django.contrib.auth.models import User
 
+from .registro import ferramenta
+
 logger = logging.getLogger(__name__)
 
 
@@ -19,17 +28,35 @@ logger = logging.getLogger(__name__)
 # FUNÇÕES DE CLIENTES
 # =============================================================================
 
-async def buscar_cliente(termo: str) -> Dict[str, Any]:
+@ferramenta(
+    "Busca informações de um cliente pelo nome, telefone ou CPF",
+    parametros={
+        "termo": {"type": "string", "description": "Nome, telefone ou CPF do cliente"},
+    },
+    obrigatorios=["termo"],
+    somente_leitura=True,
+    ttl=60,
+    modelos=["clientes.Cliente"],
+)
+def buscar_cliente(termo: str) -> Dict[str, Any]:
     """
     Busca cliente por nome, telefone ou CPF.
     """
     from clientes.models import Cliente
+    from clientes.telefones import filtro_telefone, telefone_da_busca
 
-    clientes = Cliente.objects.filter(
-        Q(nome__icontains=termo) |
-        Q(telefone__icontains=termo) |
-        Q(cpf_cnpj__icontains=termo)
-    ).select_related('consultor_responsavel')[:10]
+    # Telefone em qualquer formato: igualdade nas colunas E.164 indexadas
+    e164 = telefone_da_busca(termo)
+    if e164:
+        filtro = filtro_telefone(e164)
+    else:
+        filtro = (
+            Q(nome__icontains=termo) |
+            Q(telefone__icontains=termo) |
+            Q(cpf_cnpj__icontains=termo)
+        )
+
+    clientes = Cliente.objects.filter(filtro).select_related('consultor_responsavel')[:10]
 
     if not clientes:
         return {"encontrado": False, "mensagem": f"Nenhum cliente encontrado para '{termo}'"}
@@ -56,7 +83,82 @@ async def buscar_cliente(termo: str) -> Dict[str, Any]:
     }
 
 
-async def listar_clientes_sem_contato(
+@ferramenta(
+    "Busca por assunto nas anotações dos clientes: histórico de interações, observações dos "
+    "consultores, problemas relatados em ordens de serviço e mensagens recebidas no WhatsApp. "
+    "Use para perguntas como 'quais clientes reclamaram da sucção no último trimestre?'",
+    parametros={
+        "consulta": {"type": "string", "description": "Palavras-chave do assunto (ex.: 'sucção fraca')"},
+        "dias": {"type": "integer", "description": "Só anotações dos últimos N dias (opcional)"},
+        "fontes": {
+            "type": "array",
+            "items": {"type": "string", "enum": ["interacao", "observacao", "ordem_servico", "whatsapp"]},
+            "description": "Restringir a estas fontes (opcional)",
+        },
+        "limite": {"type": "integer", "description": "Máximo de resultados", "default": 10},
+    },
+    obrigatorios=["consulta"],
+    somente_leitura=True,
+    # O índice muda pelo comando indexar_anotacoes, não por signals
+    ttl=300,
+)
+def buscar_anotacoes(
+    consulta: str,
+    dias: int = None,
+    fontes: List[str] = None,
+    limite: int = 10
+) -> Dict[str, Any]:
+    """
+    Busca textual (BM25) no índice de anotações (ver indice_anotacoes.py).
+    """
+    from .indice_anotacoes import pesquisar
+
+    achados = pesquisar(consulta, limite=min(limite, 50), fontes=fontes, dias=dias)
+    if achados is None:
+        return {"erro": "Índice de anotações ainda não construído (python manage.py indexar_anotacoes)"}
+
+    if not achados:
+        return {"encontrado": False, "mensagem": f"Nenhuma anotação encontrada sobre '{consulta}'"}
+
+    clientes = {}
+    for a in achados:
+        if a["cliente_id"] and a["cliente_id"] not in clientes:
+            clientes[a["cliente_id"]] = a["cliente"]
+
+    return {
+        "encontrado": True,
+        "quantidade": len(achados),
+        "clientes": [{"id": id_, "nome": nome} for id_, nome in clientes.items()],
+        "anotacoes": [
+            {
+                "fonte": a["fonte"],
+                "cliente_id": a["cliente_id"],
+                "cliente": a["cliente"],
+                "data": a["data"].strftime("%d/%m/%Y") if a["data"] else None,
+                "trecho": a["texto"][:300],
+                "relevancia": a["pontuacao"],
+            }
+            for a in achados
+        ]
+    }
+
+
+@ferramenta(
+    "Lista clientes que não recebem contato há X dias",
+    parametros={
+        "dias": {"type": "integer", "description": "Número de dias sem contato", "default": 30},
+        "consultor": {
+            "type": "string",
+            "description": "Filtrar por consultor específico (opcional)",
+        },
+        "limite": {"type": "integer", "description": "Máximo de resultados", "default": 20},
+    },
+    obrigatorios=["dias"],
+    somente_leitura=True,
+    ttl=300,
+    modelos=["clientes.Cliente"],
+)
+def listar_clientes_sem_contato(
     dias: int = 30,
     consultor: str = None,
     limite: int = 20
@@ -100,7 +202,21 @@ async def listar_clientes_sem_contato(
     }
 
 
-async def listar_clientes_sem_manutencao(
+@ferramenta(
+    "Lista clientes com equipamentos que precisam de manutenção",
+    parametros={
+        "dias_atraso": {
+            "type": "integer",
+            "description": "Dias de atraso na manutenção",
+            "default": 0,
+        },
+        "limite": {"type": "integer", "description": "Máximo de resultados", "default": 20},
+    },
+    somente_leitura=True,
+    ttl=600,
+    modelos=["equipamentos.Equipamento", "clientes.Cliente"],
+)
+def listar_clientes_sem_manutencao(
     dias_atraso: int = 0,
     limite: int = 20
 ) -> Dict[str, Any]:
@@ -139,7 +255,24 @@ async def listar_clientes_sem_manutencao(
     }
 
 
-async def registrar_contato(
+@ferramenta(
+    "Registra um contato/interação com o cliente",
+    parametros={
+        "cliente_id": {"type": "integer", "description": "ID do cliente"},
+        "tipo": {
+            "type": "string",
+            "enum": ["ligacao", "whatsapp", "email", "visita"],
+            "description": "Tipo de contato",
+        },
+        "descricao": {"type": "string", "description": "Descrição/resumo do contato"},
+        "resultado": {"type": "string", "description": "Resultado do contato"},
+        "proxima_acao": {"type": "string", "description": "Próxima ação a ser tomada"},
+        "data_proxima_acao": {"type": "string", "description": "Data da próxima ação (YYYY-MM-DD)"},
+    },
+    obrigatorios=["cliente_id", "tipo", "descricao"],
+    com_usuario=True,
+)
+def registrar_contato(
     cliente_id: int,
     tipo: str,
     descricao: str,
@@ -190,7 +323,24 @@ async def registrar_contato(
 # FUNÇÕES DE VENDAS E FINANCEIRO
 # =============================================================================
 
-async def listar_vendas_periodo(
+@ferramenta(
+    "Lista vendas realizadas em um período",
+    parametros={
+        "data_inicio": {"type": "string", "description": "Data inicial (YYYY-MM-DD)"},
+        "data_fim": {"type": "string", "description": "Data final (YYYY-MM-DD)"},
+        "consultor": {"type": "string", "description": "Filtrar por consultor"},
+        "status": {
+            "type": "string",
+            "enum": ["pendente", "concluida", "cancelada"],
+            "description": "Status da venda",
+        },
+    },
+    obrigatorios=["data_inicio", "data_fim"],
+    somente_leitura=True,
+    ttl=300,
+    modelos=["vendas.Venda"],
+)
+def listar_vendas_periodo(
     data_inicio: str,
     data_fim: str,
     consultor: str = None,
@@ -242,7 +392,18 @@ async def listar_vendas_periodo(
     }
 
 
-async def listar_contas_vencidas(
+@ferramenta(
+    "Lista contas a receber vencidas",
+    parametros={
+        "dias_atraso": {"type": "integer", "description": "Mínimo de dias de atraso", "default": 1},
+        "consultor": {"type": "string", "description": "Filtrar por consultor"},
+        "limite": {"type": "integer", "description": "Máximo de resultados", "default": 50},
+    },
+    somente_leitura=True,
+    ttl=300,
+    modelos=["financeiro.ContaReceber"],
+)
+def listar_contas_vencidas(
     dias_atraso: int = 1,
     consultor: str = None,
     limite: int = 50
@@ -256,7 +417,7 @@ async def listar_contas_vencidas(
 
     query = ContaReceber.objects.filter(
         data_vencimento__lt=data_limite,
-        status='pendente'
+        status__in=['pendente', 'atrasada']
     ).select_related('cliente', 'consultor')
 
     if consultor:
@@ -289,36 +450,45 @@ async def listar_contas_vencidas(
     }
 
 
-async def calcular_resumo_financeiro(mes: int, ano: int) -> Dict[str, Any]:
+@ferramenta(
+    "Calcula resumo financeiro (receitas, despesas, lucro) de um período",
+    parametros={
+        "mes": {"type": "integer", "description": "Mês (1-12)"},
+        "ano": {"type": "integer", "description": "Ano (ex: 2024)"},
+    },
+    obrigatorios=["mes", "ano"],
+    somente_leitura=True,
+    ttl=600,
+    # ResumoVendaDiario é regravado em bulk ao salvar Venda/ItemVenda
+    modelos=["vendas.Venda", "vendas.ItemVenda", "financeiro.Movimentacao"],
+    timeout=30,
+)
+def calcular_resumo_financeiro(mes: int, ano: int) -> Dict[str, Any]:
     """
     Calcula resumo financeiro de um mês.
     """
-    from vendas.models import Venda
+    from vendas.models import ResumoVendaDiario
+    from vendas.services import periodo_mes
     from financeiro.models import Movimentacao
 
-    # Vendas do mês
-    vendas = Venda.objects.filter(
-        data_venda__year=ano,
-        data_venda__month=mes,
+    inicio, fim = periodo_mes(ano, mes)
+
+    # Vendas do mês (tabela de fatos diária)
+    vendas = ResumoVendaDiario.objects.filter(
+        data__gte=inicio,
+        data__lte=fim,
+        tipo_venda=ResumoVendaDiario.TIPO_VENDA,
         status='concluida'
     ).aggregate(
-        total_vendas=Sum('valor_total'),
-        total_custo=Sum('valor_custo'),
-        quantidade=Count('id')
+        total_vendas=Sum('valor'),
+        total_custo=Sum('custo'),
+        quantidade=Sum('quantidade')
     )
 
     # Movimentações
-    entradas = Movimentacao.objects.filter(
-        data__year=ano,
-        data__month=mes,
-        tipo='entrada'
-    ).aggregate(total=Sum('valor'))['total'] or 0
-
-    saidas = Movimentacao.objects.filter(
-        data__year=ano,
-        data__month=mes,
-        tipo='saida'
-    ).aggregate(total=Sum('valor'))['total'] or 0
+    movimentacoes = Movimentacao.objects.filter(data__gte=inicio, data__lte=fim)
+    entradas = movimentacoes.filter(tipo='entrada').aggregate(total=Sum('valor'))['total'] or 0
+    saidas = movimentacoes.filter(tipo='saida').aggregate(total=Sum('valor'))['total'] or 0
 
     total_vendas = float(vendas['total_vendas'] or 0)
     total_custo = float(vendas['total_custo'] or 0)
@@ -346,7 +516,16 @@ async def calcular_resumo_financeiro(mes: int, ano: int) -> Dict[str, Any]:
 # FUNÇÕES DE ALUGUÉIS
 # =============================================================================
 
-async def listar_alugueis_vencendo(dias: int = 30) -> Dict[str, Any]:
+@ferramenta(
+    "Lista contratos de aluguel que vencem nos próximos dias",
+    parametros={
+        "dias": {"type": "integer", "description": "Dias até o vencimento", "default": 30},
+    },
+    somente_leitura=True,
+    ttl=600,
+    modelos=["alugueis.ContratoAluguel"],
+)
+def listar_alugueis_vencendo(dias: int = 30) -> Dict[str, Any]:
     """
     Lista contratos de aluguel que vencem nos próximos X dias.
     """
@@ -381,7 +560,17 @@ async def listar_alugueis_vencendo(dias: int = 30) -> Dict[str, Any]:
     }
 
 
-async def listar_parcelas_atrasadas(
+@ferramenta(
+    "Lista parcelas de aluguel em atraso",
+    parametros={
+        "dias_atraso": {"type": "integer", "description": "Mínimo de dias de atraso", "default": 1},
+        "limite": {"type": "integer", "description": "Máximo de resultados", "default": 50},
+    },
+    somente_leitura=True,
+    ttl=300,
+    modelos=["alugueis.ParcelaAluguel"],
+)
+def listar_parcelas_atrasadas(
     dias_atraso: int = 1,
     limite: int = 50
 ) -> Dict[str, Any]:
@@ -394,7 +583,7 @@ async def listar_parcelas_atrasadas(
 
     parcelas = ParcelaAluguel.objects.filter(
         data_vencimento__lt=data_limite,
-        status='pendente'
+        status__in=['pendente', 'atrasada']
     ).select_related('contrato__cliente')[:limite]
 
     resultados = []
@@ -423,11 +612,58 @@ async def listar_parcelas_atrasadas(
     }
 
 
+@ferramenta(
+    "Indicadores da carteira de aluguéis: receita recorrente mensal (MRR), churn, renovações, inadimplência e retenção por coorte",
+    parametros={
+        "mes": {"type": "integer", "description": "Mês (1-12). Padrão: mês atual"},
+        "ano": {"type": "integer", "description": "Ano (ex: 2024). Padrão: ano atual"},
+    },
+    somente_leitura=True,
+    ttl=600,
+    modelos=["alugueis.ContratoAluguel", "alugueis.ParcelaAluguel"],
+    timeout=30,
+)
+def indicadores_alugueis(mes: int = None, ano: int = None) -> Dict[str, Any]:
+    """
+    Indicadores da carteira de aluguéis: MRR, churn, renovações,
+    inadimplência e retenção por coorte.
+    """
+    from alugueis.analytics import calcular_indicadores_carteira
+
+    indicadores = calcular_indicadores_carteira(ano=ano, mes=mes)
+
+    # A série completa fica no endpoint; para a IA basta o resumo do mês
+    # e as coortes mais recentes
+    return {
+        **{k: v for k, v in indicadores.items() if k not in ('serie', 'coortes')},
+        "coortes_recentes": indicadores['coortes'][-6:],
+    }
+
+
 # =============================================================================
 # FUNÇÕES DE AGENDA
 # =============================================================================
 
-async def listar_agendamentos(
+@ferramenta(
+    "Lista agendamentos de um período",
+    parametros={
+        "data": {
+            "type": "string",
+            "description": "Data específica (YYYY-MM-DD) ou 'hoje', 'amanha', 'semana'",
+        },
+        "responsavel": {"type": "string", "description": "Filtrar por responsável"},
+        "tipo": {
+            "type": "string",
+            "enum": ["demonstracao", "visita", "manutencao", "entrega"],
+            "description": "Tipo de agendamento",
+        },
+    },
+    obrigatorios=["data"],
+    somente_leitura=True,
+    ttl=120,
+    modelos=["agenda.Agendamento"],
+)
+def listar_agendamentos(
     data: str,
     responsavel: str = None,
     tipo: str = None
@@ -488,7 +724,24 @@ async def listar_agendamentos(
     }
 
 
-async def criar_agendamento(
+@ferramenta(
+    "Cria um novo agendamento",
+    parametros={
+        "cliente_id": {"type": "integer", "description": "ID do cliente"},
+        "tipo": {
+            "type": "string",
+            "enum": ["demonstracao", "visita", "manutencao", "entrega"],
+            "description": "Tipo de agendamento",
+        },
+        "data": {"type": "string", "description": "Data (YYYY-MM-DD)"},
+        "hora": {"type": "string", "description": "Hora (HH:MM)"},
+        "titulo": {"type": "string", "description": "Título/descrição"},
+        "responsavel": {"type": "string", "description": "Nome do responsável"},
+    },
+    obrigatorios=["cliente_id", "tipo", "data", "hora", "titulo"],
+    com_usuario=True,
+)
+def criar_agendamento(
     cliente_id: int,
     tipo: str,
     data: str,
@@ -539,7 +792,23 @@ async def criar_agendamento(
 # FUNÇÕES DE WHATSAPP
 # =============================================================================
 
-async def enviar_whatsapp(
+@ferramenta(
+    "Envia mensagem de WhatsApp para um cliente",
+    parametros={
+        "cliente_id": {"type": "integer", "description": "ID do cliente"},
+        "mensagem": {"type": "string", "description": "Texto da mensagem"},
+        "tipo": {
+            "type": "string",
+            "enum": ["texto", "audio", "template"],
+            "description": "Tipo de mensagem",
+            "default": "texto",
+        },
+        "template_name": {"type": "string", "description": "Nome do template (se tipo=template)"},
+    },
+    obrigatorios=["cliente_id", "mensagem"],
+    com_usuario=True,
+)
+def enviar_whatsapp(
     cliente_id: int,
     mensagem: str,
     tipo: str = "texto",
@@ -548,38 +817,50 @@ async def enviar_whatsapp(
 ) -> Dict[str, Any]:
     """
     Envia mensagem de WhatsApp para um cliente.
+
+    O envio vai para a caixa de saída (worker enviar_mensagens), que repete
+    em caso de limite de taxa/instabilidade da API.
     """
     from clientes.models import Cliente
-    from whatsapp_integration.services import whatsapp_service
+    from whatsapp_integration.models import Conversa, MensagemSaida
+    from whatsapp_integration.saida import enfileirar
 
     try:
         cliente = Cliente.objects.get(id=cliente_id)
 
-        if not cliente.whatsapp and not cliente.telefone:
+        # Números normalizados (E.164) têm prioridade sobre o texto digitado
+        telefone = (
+            cliente.whatsapp_e164 or cliente.telefone_e164
+            or cliente.whatsapp or cliente.telefone
+        )
+        if not telefone:
             return {"sucesso": False, "erro": "Cliente não possui telefone cadastrado"}
 
-        telefone = cliente.whatsapp or cliente.telefone
-
-        if tipo == "texto":
-            resultado = await whatsapp_service.enviar_mensagem_texto(telefone, mensagem)
-        elif tipo == "audio":
-            resultado = await whatsapp_service.enviar_audio(telefone, mensagem)
+        if tipo == "audio":
+            envio_tipo, variaveis = MensagemSaida.TIPO_AUDIO, []
         elif tipo == "template" and template_name:
-            resultado = await whatsapp_service.enviar_template(telefone, template_name, [mensagem])
+            envio_tipo, variaveis = MensagemSaida.TIPO_TEMPLATE, [mensagem]
         else:
-            resultado = await whatsapp_service.enviar_mensagem_texto(telefone, mensagem)
+            envio_tipo, variaveis = MensagemSaida.TIPO_TEXTO, []
+
+        envio = enfileirar(
+            telefone,
+            mensagem,
+            tipo=envio_tipo,
+            template_nome=template_name if envio_tipo == MensagemSaida.TIPO_TEMPLATE else None,
+            variaveis=variaveis,
+            conversa=Conversa.objects.filter(cliente=cliente).order_by('-updated_at').first(),
+            cliente_id=cliente.id,
+            usuario=usuario,
+            enviado_por_ia=True,
+        )
 
-        if resultado.get('success'):
-            return {
-                "sucesso": True,
-                "mensagem": f"Mensagem enviada para {cliente.nome} ({telefone})",
-                "message_id": resultado.get('message_id')
-            }
-        else:
-            return {
-                "sucesso": False,
-                "erro": resultado.get('error', 'Erro desconhecido')
-            }
+        return {
+            "sucesso": True,
+            "mensagem": f"Mensagem para {cliente.nome} ({telefone}) enviada para a fila de envio",
+            "envio_id": envio.id,
+            "status": envio.status
+        }
 
     except Cliente.DoesNotExist:
         return {"sucesso": False, "erro": f"Cliente ID {cliente_id} não encontrado"}
@@ -587,7 +868,25 @@ async def enviar_whatsapp(
         return {"sucesso": False, "erro": str(e)}
 
 
-async def enviar_campanha_whatsapp(
+@ferramenta(
+    "Envia campanha de WhatsApp para múltiplos clientes",
+    parametros={
+        "template_name": {"type": "string", "description": "Nome do template aprovado"},
+        "filtro_perfil": {
+            "type": "array",
+            "items": {"type": "string"},
+            "description": "Filtrar por perfis (ex: ['diamante', 'ouro'])",
+        },
+        "filtro_consultor": {"type": "string", "description": "Filtrar por consultor"},
+        "filtro_dias_sem_contato": {
+            "type": "integer",
+            "description": "Clientes sem contato há X dias",
+        },
+    },
+    obrigatorios=["template_name"],
+    timeout=30,
+)
+def enviar_campanha_whatsapp(
     template_name: str,
     filtro_perfil: List[str] = None,
     filtro_consultor: str = None,
@@ -595,10 +894,12 @@ async def enviar_campanha_whatsapp(
 ) -> Dict[str, Any]:
     """
     Prepara e envia campanha de WhatsApp.
+
+    O público é contado com COUNT() no banco (ver whatsapp_integration/publico.py),
+    sem carregar os clientes.
     """
-    from clientes.models import Cliente
-    from whatsapp_integration.models import CampanhaMensagem, Template
-    from whatsapp_integration.services import whatsapp_service
+    from whatsapp_integration.models import Template
+    from whatsapp_integration.publico import Publico
 
     try:
         # Verificar template
@@ -606,43 +907,26 @@ async def enviar_campanha_whatsapp(
         if not template:
             return {"sucesso": False, "erro": f"Template '{template_name}' não encontrado ou não aprovado"}
 
-        # Construir query de clientes
-        query = Cliente.objects.filter(
-            status='ativo',
-            aceita_whatsapp=True
-        ).exclude(
-            Q(telefone__isnull=True) & Q(whatsapp__isnull=True)
-        )
-
-        if filtro_perfil:
-            query = query.filter(perfil__in=filtro_perfil)
-
-        if filtro_consultor:
-            query = query.filter(consultor_responsavel__first_name__icontains=filtro_consultor)
+        total = Publico(
+            perfis=filtro_perfil,
+            consultor_nome=filtro_consultor,
+            dias_sem_contato=filtro_dias_sem_contato,
+        ).contar()
 
-        if filtro_dias_sem_contato:
-            data_limite = timezone.now() - timedelta(days=filtro_dias_sem_contato)
-            query = query.filter(
-                Q(data_ultimo_contato__lt=data_limite) |
-                Q(data_ultimo_contato__isnull=True)
-            )
-
-        clientes = list(query)
-
-        if not clientes:
+        if not total:
             return {"sucesso": False, "erro": "Nenhum cliente encontrado com os filtros aplicados"}
 
         # Calcular custo estimado
         custo_unitario = 0.04 if template.categoria == 'UTILITY' else 0.38
-        custo_estimado = len(clientes) * custo_unitario
+        custo_estimado = total * custo_unitario
 
         return {
             "sucesso": True,
             "preview": True,
-            "mensagem": f"Campanha preparada para {len(clientes)} clientes",
+            "mensagem": f"Campanha preparada para {total} clientes",
             "template": template_name,
             "categoria": template.get_categoria_display(),
-            "total_destinatarios": len(clientes),
+            "total_destinatarios": total,
             "custo_estimado": f"R$ {custo_estimado:.2f}",
             "filtros_aplicados": {
                 "perfil": filtro_perfil,
@@ -660,7 +944,25 @@ async def enviar_campanha_whatsapp(
 # FUNÇÕES DE RELATÓRIOS
 # =============================================================================
 
-async def gerar_relatorio_vendas(
+@ferramenta(
+    "Gera relatório detalhado de vendas",
+    parametros={
+        "mes": {"type": "integer", "description": "Mês (1-12)"},
+        "ano": {"type": "integer", "description": "Ano"},
+        "agrupar_por": {
+            "type": "string",
+            "enum": ["consultor", "produto", "cliente", "dia"],
+            "description": "Agrupamento do relatório",
+        },
+    },
+    obrigatorios=["mes", "ano"],
+    somente_leitura=True,
+    ttl=600,
+    # ResumoVendaDiario é regravado em bulk ao salvar Venda/ItemVenda
+    modelos=["vendas.Venda", "vendas.ItemVenda"],
+    timeout=30,
+)
+def gerar_relatorio_vendas(
     mes: int,
     ano: int,
     agrupar_por: str = "consultor"
@@ -668,18 +970,22 @@ async def gerar_relatorio_vendas(
     """
     Gera relatório de vendas agrupado.
     """
-    from vendas.models import Venda
+    from vendas.models import ResumoVendaDiario
+    from vendas.services import periodo_mes
 
-    vendas = Venda.objects.filter(
-        data_venda__year=ano,
-        data_venda__month=mes,
+    inicio, fim = periodo_mes(ano, mes)
+    resumo = ResumoVendaDiario.objects.filter(
+        data__gte=inicio,
+        data__lte=fim,
         status='concluida'
-    ).select_related('cliente', 'vendedor')
+    )
 
     if agrupar_por == "consultor":
-        agrupado = vendas.values('vendedor__first_name', 'vendedor__last_name').annotate(
-            total=Sum('valor_total'),
-            quantidade=Count('id'),
+        agrupado = resumo.filter(tipo_venda=ResumoVendaDiario.TIPO_VENDA).values(
+            'vendedor__first_name', 'vendedor__last_name'
+        ).annotate(
+            total=Sum('valor'),
+            quantidade=Sum('quantidade'),
             pontos=Sum('pontos')
         ).order_by('-total')
 
@@ -695,13 +1001,10 @@ async def gerar_relatorio_vendas(
         ]
 
     elif agrupar_por == "produto":
-        from vendas.models import ItemVenda
-        agrupado = ItemVenda.objects.filter(
-            venda__data_venda__year=ano,
-            venda__data_venda__month=mes,
-            venda__status='concluida'
-        ).values('modelo__nome').annotate(
-            total=Sum('valor_total'),
+        agrupado = resumo.exclude(tipo_venda=ResumoVendaDiario.TIPO_VENDA).values(
+            'modelo__nome'
+        ).annotate(
+            total=Sum('valor'),
             quantidade=Sum('quantidade')
         ).order_by('-total')
 
@@ -727,7 +1030,26 @@ async def gerar_relatorio_vendas(
     }
 
 
-async def ranking_consultores(
+@ferramenta(
+    "Mostra ranking de consultores por vendas/pontos",
+    parametros={
+        "mes": {"type": "integer", "description": "Mês (1-12)"},
+        "ano": {"type": "integer", "description": "Ano"},
+        "criterio": {
+            "type": "string",
+            "enum": ["valor", "pontos", "quantidade"],
+            "description": "Critério de ordenação",
+            "default": "valor",
+        },
+    },
+    obrigatorios=["mes", "ano"],
+    somente_leitura=True,
+    ttl=600,
+    # ResumoVendaDiario é regravado em bulk ao salvar Venda/ItemVenda
+    modelos=["vendas.Venda", "vendas.ItemVenda"],
+    timeout=30,
+)
+def ranking_consultores(
     mes: int,
     ano: int,
     criterio: str = "valor"
@@ -735,7 +1057,8 @@ async def ranking_consultores(
     """
     Gera ranking de consultores.
     """
-    from vendas.models import Venda
+    from vendas.models import ResumoVendaDiario
+    from vendas.services import periodo_mes
 
     order_field = {
         "valor": "-total",
@@ -743,13 +1066,15 @@ async def ranking_consultores(
         "quantidade": "-quantidade"
     }.get(criterio, "-total")
 
-    ranking = Venda.objects.filter(
-        data_venda__year=ano,
-        data_venda__month=mes,
+    inicio, fim = periodo_mes(ano, mes)
+    ranking = ResumoVendaDiario.objects.filter(
+        tipo_venda=ResumoVendaDiario.TIPO_VENDA,
+        data__gte=inicio,
+        data__lte=fim,
         status='concluida'
     ).values('vendedor__first_name', 'vendedor__last_name').annotate(
-        total=Sum('valor_total'),
-        quantidade=Count('id'),
+        total=Sum('valor'),
+        quantidade=Sum('quantidade'),
         pontos=Sum('pontos')
     ).order_by(order_field)
 
@@ -774,7 +1099,17 @@ async def ranking_consultores(
 # FUNÇÕES DE EQUIPAMENTOS
 # =============================================================================
 
-async def buscar_equipamento(numero_serie: str) -> Dict[str, Any]:
+@ferramenta(
+    "Busca informações de um equipamento pelo número de série",
+    parametros={
+        "numero_serie": {"type": "string", "description": "Número de série do equipamento"},
+    },
+    obrigatorios=["numero_serie"],
+    somente_leitura=True,
+    ttl=300,
+    modelos=["equipamentos.Equipamento"],
+)
+def buscar_equipamento(numero_serie: str) -> Dict[str, Any]:
     """
     Busca informações de equipamento pelo número de série.
     """
@@ -806,7 +1141,17 @@ async def buscar_equipamento(numero_serie: str) -> Dict[str, Any]:
     }
 
 
-async def verificar_garantia(numero_serie: str) -> Dict[str, Any]:
+@ferramenta(
+    "Verifica status de garantia de um equipamento",
+    parametros={
+        "numero_serie": {"type": "string", "description": "Número de série"},
+    },
+    obrigatorios=["numero_serie"],
+    somente_leitura=True,
+    ttl=300,
+    modelos=["equipamentos.Equipamento"],
+)
+def verificar_garantia(numero_serie: str) -> Dict[str, Any]:
     """
     Verifica status de garantia de um equipamento.
     """
@@ -0,0 +1,549 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Índice de Anotações dos Clientes para o Assistente de IA
+Busca textual BM25 em matrizes esparsas (SciPy), construída fora da requisição
+=============================================================================
+
+"Quais clientes reclamaram da sucção no último trimestre?" não cabe em
+icontains. O comando indexar_anotacoes monta um índice local sobre:
+
+- interacao:     HistoricoInteracao.descricao/resultado
+- observacao:    ObservacaoCliente.texto
+- ordem_servico: OrdemServico.descricao_problema
+- whatsapp:      Mensagem.conteudo recebida (direcao='entrada')
+
+Estrutura (em AI_INDICE_ANOTACOES_DIR):
+- vocabulário de radicais (minúsculas, sem acento, sem stopwords,
+  cortados em RADICAL letras: "reclamou"/"reclamação" → "reclam")
+- segmentos: matriz CSC documentos × termos com a frequência de cada
+  termo + arrays NumPy (fonte, id do objeto, cliente, dia, comprimento)
+- df por termo e, por fonte, o último id indexado
+
+Atualização incremental: cada execução indexa só os ids novos de cada
+fonte em um segmento novo; acima de MAX_SEGMENTOS os segmentos são
+fundidos. Edições e exclusões só entram em uma reconstrução (--completo);
+hits de objetos excluídos são descartados na busca.
+
+Consulta: os pesos BM25 são calculados na hora só nas colunas dos termos
+da pergunta (idf e tamanho médio sempre atuais) e o top-k sai de
+np.argpartition - poucos milissegundos mesmo com milhões de anotações.
+
+    python manage.py indexar_anotacoes            # incremental
+    python manage.py indexar_anotacoes --completo # reconstrói
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from django.apps import apps
+from django.conf import settings
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+# BM25
+K1 = 1.2
+B = 0.75
+
+RADICAL = 6
+TAMANHO_BLOCO = 5000
+DOCS_POR_SEGMENTO = 200_000
+MAX_SEGMENTOS = 8
+
+SEM_CLIENTE = -1
+SEM_DATA = -1
+EPOCA = date(1970, 1, 1)
+
+# nome → código gravado no índice, model, campos de texto, cliente e data
+FONTES = {
+    'interacao': {
+        'codigo': 0,
+        'model': 'clientes.HistoricoInteracao',
+        'texto': ('descricao', 'resultado'),
+        'cliente': F('cliente_id'),
+        'data': F('created_at'),
+        'filtro': {},
+    },
+    'observacao': {
+        'codigo': 1,
+        'model': 'clientes.ObservacaoCliente',
+        'texto': ('texto',),
+        'cliente': F('cliente_id'),
+        'data': F('created_at'),
+        'filtro': {},
+    },
+    'ordem_servico': {
+        'codigo': 2,
+        'model': 'assistencia.OrdemServico',
+        'texto': ('descricao_problema',),
+        'cliente': F('cliente_id'),
+        'data': F('data_abertura'),
+        'filtro': {},
+    },
+    'whatsapp': {
+        'codigo': 3,
+        'model': 'whatsapp_integration.Mensagem',
+        'texto': ('conteudo',),
+        'cliente': F('conversa__cliente_id'),
+        'data': Coalesce('data_envio', 'created_at'),
+        'filtro': {'direcao': 'entrada'},
+    },
+}
+FONTE_POR_CODIGO = {config['codigo']: nome for nome, config in FONTES.items()}
+
+STOPWORDS = {
+    'a', 'ao', 'aos', 'as', 'com', 'como', 'da', 'das', 'de', 'do', 'dos', 'e', 'ela', 'ele',
+    'em', 'era', 'essa', 'esse', 'esta', 'este', 'eu', 'foi', 'ha', 'isso', 'ja', 'lhe', 'mais',
+    'mas', 'me', 'meu', 'minha', 'na', 'nas', 'no', 'nos', 'o', 'os', 'ou', 'para', 'pela',
+    'pelo', 'por', 'pra', 'que', 'se', 'sem', 'ser', 'seu', 'sua', 'so', 'tem', 'um', 'uma',
+    'voce',
+}
+
+_PALAVRA = re.compile(r'[a-z0-9]+')
+
+
+def termos(texto: str) -> List[str]:
+    """Radicais do texto: minúsculas, sem acento, sem stopwords."""
+    if not texto:
+        return []
+    texto = unicodedata.normalize('NFKD', texto.lower()).encode('ascii', 'ignore').decode('ascii')
+    return [
+        palavra[:RADICAL] for palavra in _PALAVRA.findall(texto)
+        if len(palavra) > 1 and palavra not in STOPWORDS
+    ]
+
+
+def _dia(valor) -> int:
+    if valor is None:
+        return SEM_DATA
+    if isinstance(valor, datetime):
+        valor = valor.date()
+    return (valor - EPOCA).days
+
+
+def _documentos(fonte: str, desde_id: int) -> Iterator[Tuple[int, str, Optional[int], int]]:
+    """(id, texto, cliente_id, dia) dos objetos da fonte com id > desde_id."""
+    config = FONTES[fonte]
+    model = apps.get_model(config['model'])
+    linhas = model.objects.filter(
+        id__gt=desde_id, **config['filtro']
+    ).annotate(
+        cliente_doc=config['cliente'], data_doc=config['data']
+    ).order_by('id').values_list(
+        'id', 'cliente_doc', 'data_doc', *config['texto']
+    ).iterator(chunk_size=TAMANHO_BLOCO)
+
+    for objeto_id, cliente_id, data, *textos in linhas:
+        yield objeto_id, ' '.join(t for t in textos if t), cliente_id, _dia(data)
+
+
+class Segmento:
+    """Bloco imutável de documentos: matriz documentos × termos + metadados."""
+
+    def __init__(self, nome: str, matriz: sparse.csc_matrix, meta: Dict[str, np.ndarray]):
+        self.nome = nome
+        self.matriz = matriz
+        self.fonte = meta['fonte']
+        self.objeto = meta['objeto']
+        self.cliente = meta['cliente']
+        self.dia = meta['dia']
+        self.comprimento = meta['comprimento']
+
+    @property
+    def total_docs(self) -> int:
+        return self.matriz.shape[0]
+
+    def meta(self) -> Dict[str, np.ndarray]:
+        return {
+            'fonte': self.fonte, 'objeto': self.objeto, 'cliente': self.cliente,
+            'dia': self.dia, 'comprimento': self.comprimento,
+        }
+
+    def com_termos(self, total_termos: int) -> sparse.csc_matrix:
+        """Matriz com colunas extras (vazias) para termos criados depois."""
+        faltam = total_termos - self.matriz.shape[1]
+        if faltam <= 0:
+            return self.matriz
+        indptr = np.concatenate([
+            self.matriz.indptr,
+            np.full(faltam, self.matriz.indptr[-1], dtype=self.matriz.indptr.dtype)
+        ])
+        return sparse.csc_matrix(
+            (self.matriz.data, self.matriz.indices, indptr),
+            shape=(self.total_docs, total_termos)
+        )
+
+
+class _Construtor:
+    """Acumula documentos tokenizados até virar um Segmento."""
+
+    def __init__(self, indice: 'IndiceAnotacoes'):
+        self.indice = indice
+        self.linhas: List[int] = []
+        self.colunas: List[int] = []
+        self.frequencias: List[int] = []
+        self.meta: Dict[str, List[int]] = {
+            'fonte': [], 'objeto': [], 'cliente': [], 'dia': [], 'comprimento': []
+        }
+
+    @property
+    def total_docs(self) -> int:
+        return len(self.meta['objeto'])
+
+    def adicionar(self, codigo_fonte: int, objeto_id: int, texto: str, cliente_id, dia: int) -> None:
+        contagem = Counter(termos(texto))
+        if not contagem:
+            return
+
+        vocabulario = self.indice.vocabulario
+        linha = self.total_docs
+        for termo, frequencia in contagem.items():
+            coluna = vocabulario.get(termo)
+            if coluna is None:
+                coluna = vocabulario[termo] = len(vocabulario)
+            self.linhas.append(linha)
+            self.colunas.append(coluna)
+            self.frequencias.append(frequencia)
+
+        self.meta['fonte'].append(codigo_fonte)
+        self.meta['objeto'].append(objeto_id)
+        self.meta['cliente'].append(cliente_id if cliente_id is not None else SEM_CLIENTE)
+        self.meta['dia'].append(dia)
+        self.meta['comprimento'].append(sum(contagem.values()))
+
+    def segmento(self, nome: str) -> Segmento:
+        total_termos = len(self.indice.vocabulario)
+        matriz = sparse.csr_matrix(
+            (
+                np.asarray(self.frequencias, dtype=np.float32),
+                (np.asarray(self.linhas, dtype=np.int32), np.asarray(self.colunas, dtype=np.int32))
+            ),
+            shape=(self.total_docs, total_termos)
+        ).tocsc()
+        meta = {
+            'fonte': np.asarray(self.meta['fonte'], dtype=np.int8),
+            'objeto': np.asarray(self.meta['objeto'], dtype=np.int64),
+            'cliente': np.asarray(self.meta['cliente'], dtype=np.int64),
+            'dia': np.asarray(self.meta['dia'], dtype=np.int32),
+            'comprimento': np.asarray(self.meta['comprimento'], dtype=np.int32),
+        }
+        return Segmento(nome, matriz, meta)
+
+
+class IndiceAnotacoes:
+    """Índice BM25 persistido em disco (ver docstring do módulo)."""
+
+    MANIFESTO = 'manifesto.json'
+    VOCABULARIO = 'vocabulario.json'
+
+    def __init__(self, diretorio):
+        self.diretorio = Path(diretorio)
+        self.vocabulario: Dict[str, int] = {}
+        self.df = np.zeros(0, dtype=np.int64)
+        self.segmentos: List[Segmento] = []
+        self.marcas: Dict[str, int] = {fonte: 0 for fonte in FONTES}
+        self.geracao = 0
+
+    @property
+    def total_docs(self) -> int:
+        return sum(s.total_docs for s in self.segmentos)
+
+    # -------------------------------------------------------------------------
+    # Disco
+    # -------------------------------------------------------------------------
+
+    @classmethod
+    def vazio(cls, diretorio) -> 'IndiceAnotacoes':
+        """Índice novo para reconstrução, continuando a numeração do atual."""
+        indice = cls(diretorio)
+        atual = indice.diretorio / cls.MANIFESTO
+        if atual.exists():
+            indice.geracao = json.loads(atual.read_text())['geracao']
+        return indice
+
+    @classmethod
+    def carregar(cls, diretorio) -> Optional['IndiceAnotacoes']:
+        """Índice gravado (None se ainda não foi construído)."""
+        indice = cls(diretorio)
+        caminho = indice.diretorio / cls.MANIFESTO
+        if not caminho.exists():
+            return None
+
+        manifesto = json.loads(caminho.read_text())
+        with open(indice.diretorio / cls.VOCABULARIO) as arquivo:
+            lista = json.load(arquivo)
+        # Vocabulário só cresce: pode ter termos mais novos que o manifesto
+        indice.vocabulario = {termo: i for i, termo in enumerate(lista[:manifesto['termos']])}
+        indice.df = np.load(indice.diretorio / f"df_{manifesto['geracao']}.npy")
+        indice.marcas.update(manifesto['marcas'])
+        indice.geracao = manifesto['geracao']
+        for nome in manifesto['segmentos']:
+            matriz = sparse.load_npz(indice.diretorio / f'{nome}.npz').tocsc()
+            with np.load(indice.diretorio / f'{nome}_meta.npz') as meta:
+                indice.segmentos.append(Segmento(nome, matriz, dict(meta)))
+        return indice
+
+    def _gravar_segmento(self, segmento: Segmento) -> None:
+        sparse.save_npz(self.diretorio / f'{segmento.nome}.npz', segmento.matriz, compressed=False)
+        np.savez(self.diretorio / f'{segmento.nome}_meta.npz', **segmento.meta())
+
+    def gravar(self) -> None:
+        """Grava vocabulário, df e manifesto (o manifesto por último, atômico)."""
+        self.geracao += 1
+
+        lista = sorted(self.vocabulario, key=self.vocabulario.get)
+        self._substituir(self.VOCABULARIO, json.dumps(lista, ensure_ascii=False))
+        np.save(self.diretorio / f'df_{self.geracao}.npy', self.df)
+        self._substituir(self.MANIFESTO, json.dumps({
+            'geracao': self.geracao,
+            'termos': len(lista),
+            'marcas': self.marcas,
+            'segmentos': [s.nome for s in self.segmentos],
+        }))
+
+        # Arquivos que o manifesto novo não usa mais
+        usados = {f'df_{self.geracao}.npy', self.MANIFESTO, self.VOCABULARIO}
+        for segmento in self.segmentos:
+            usados.update({f'{segmento.nome}.npz', f'{segmento.nome}_meta.npz'})
+        for caminho in self.diretorio.iterdir():
+            if caminho.name not in usados and caminho.suffix in ('.npz', '.npy'):
+                caminho.unlink(missing_ok=True)
+
+    def _substituir(self, nome: str, conteudo: str) -> None:
+        temporario = self.diretorio / f'{nome}.tmp'
+        temporario.write_text(conteudo)
+        os.replace(temporario, self.diretorio / nome)
+
+    # -------------------------------------------------------------------------
+    # Construção
+    # -------------------------------------------------------------------------
+
+    def _novo_nome(self) -> str:
+        return f'seg_{time.time_ns()}'
+
+    def _fechar(self, construtor: _Construtor) -> None:
+        if not construtor.total_docs:
+            return
+        segmento = construtor.segmento(self._novo_nome())
+        # CSC: documentos de cada termo = tamanho da coluna
+        df = np.diff(segmento.matriz.indptr).astype(np.int64)
+        self.df = np.concatenate([self.df, np.zeros(len(df) - len(self.df), dtype=np.int64)]) + df
+        self._gravar_segmento(segmento)
+        self.segmentos.append(segmento)
+
+    def atualizar(self, docs_por_segmento: int = DOCS_POR_SEGMENTO) -> Dict[str, int]:
+        """
+        Indexa os objetos novos de cada fonte e grava o índice.
+
+        Returns:
+            dict: documentos novos por fonte
+        """
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        novos = {}
+        construtor = _Construtor(self)
+
+        for fonte, config in FONTES.items():
+            novos[fonte] = 0
+            for objeto_id, texto, cliente_id, dia in _documentos(fonte, self.marcas[fonte]):
+                construtor.adicionar(config['codigo'], objeto_id, texto, cliente_id, dia)
+                self.marcas[fonte] = objeto_id
+                novos[fonte] += 1
+                if construtor.total_docs >= docs_por_segmento:
+                    self._fechar(construtor)
+                    construtor = _Construtor(self)
+
+        self._fechar(construtor)
+        if len(self.segmentos) > MAX_SEGMENTOS:
+            self.compactar()
+
+        self.gravar()
+        return novos
+
+    def compactar(self) -> None:
+        """Funde todos os segmentos em um só."""
+        if len(self.segmentos) < 2:
+            return
+        total_termos = len(self.vocabulario)
+        matriz = sparse.vstack(
+            [s.com_termos(total_termos) for s in self.segmentos], format='csc'
+        )
+        meta = {
+            chave: np.concatenate([s.meta()[chave] for s in self.segmentos])
+            for chave in self.segmentos[0].meta()
+        }
+        segmento = Segmento(self._novo_nome(), matriz, meta)
+        self._gravar_segmento(segmento)
+        self.segmentos = [segmento]
+
+    # -------------------------------------------------------------------------
+    # Consulta
+    # -------------------------------------------------------------------------
+
+    def buscar(
+        self,
+        consulta: str,
+        limite: int = 10,
+        fontes: Optional[List[str]] = None,
+        desde: Optional[date] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Documentos mais relevantes para a consulta (BM25).
+
+        Returns:
+            list: dicts com fonte, objeto_id, cliente_id, dia e pontuacao
+        """
+        colunas = sorted({
+            self.vocabulario[t] for t in termos(consulta) if t in self.vocabulario
+        })
+        if not colunas or not self.segmentos:
+            return []
+
+        total_docs = self.total_docs
+        media = sum(int(s.comprimento.sum()) for s in self.segmentos) / total_docs
+        df = self.df[colunas]
+        idf = np.log(1 + (total_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+        codigos = [FONTES[f]['codigo'] for f in fontes or [] if f in FONTES]
+        dia_minimo = _dia(desde) if desde else None
+
+        candidatos = []
+        for segmento in self.segmentos:
+            pontos = np.zeros(segmento.total_docs, dtype=np.float32)
+            matriz = segmento.matriz
+            for coluna, peso in zip(colunas, idf):
+                if coluna >= matriz.shape[1]:
+                    continue
+                inicio, fim = matriz.indptr[coluna], matriz.indptr[coluna + 1]
+                if inicio == fim:
+                    continue
+                docs = matriz.indices[inicio:fim]
+                tf = matriz.data[inicio:fim]
+                norma = K1 * (1 - B + B * segmento.comprimento[docs] / media)
+                # Cada documento aparece uma vez por coluna: soma direta
+                pontos[docs] += peso * tf * (K1 + 1) / (tf + norma)
+
+            if codigos:
+                pontos[~np.isin(segmento.fonte, codigos)] = 0
+            if dia_minimo is not None:
+                pontos[segmento.dia < dia_minimo] = 0
+
+            achados = np.flatnonzero(pontos)
+            if len(achados) > limite:
+                achados = achados[np.argpartition(pontos[achados], -limite)[-limite:]]
+            candidatos.extend((float(pontos[i]), segmento, int(i)) for i in achados)
+
+        candidatos.sort(key=lambda c: c[0], reverse=True)
+        return [
+            {
+                'fonte': FONTE_POR_CODIGO[int(segmento.fonte[i])],
+                'objeto_id': int(segmento.objeto[i]),
+                'cliente_id': int(segmento.cliente[i]) if segmento.cliente[i] != SEM_CLIENTE else None,
+                'data': (EPOCA + timedelta(days=int(segmento.dia[i]))) if segmento.dia[i] != SEM_DATA else None,
+                'pontuacao': round(pontuacao, 3),
+            }
+            for pontuacao, segmento, i in candidatos[:limite]
+        ]
+
+
+# =============================================================================
+# ÍNDICE DO PROCESSO
+# =============================================================================
+
+_trava = threading.Lock()
+_carregado: Optional[IndiceAnotacoes] = None
+_assinatura = None
+
+
+def indice_atual() -> Optional[IndiceAnotacoes]:
+    """
+    Índice em memória do processo, recarregado quando o comando grava uma
+    nova versão (mtime do manifesto).
+    """
+    global _carregado, _assinatura
+
+    diretorio = Path(settings.AI_INDICE_ANOTACOES_DIR)
+    try:
+        assinatura = (diretorio / IndiceAnotacoes.MANIFESTO).stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+    if assinatura != _assinatura:
+        with _trava:
+            if assinatura != _assinatura:
+                try:
+                    _carregado = IndiceAnotacoes.carregar(diretorio)
+                    _assinatura = assinatura
+                    logger.info(f"📚 Índice de anotações carregado ({_carregado.total_docs} documentos)")
+                except (OSError, ValueError, KeyError) as e:
+                    # Gravação em andamento: segue com a versão anterior
+                    logger.warning(f"Índice de anotações indisponível no momento: {e}")
+    return _carregado
+
+
+def _trechos(achados: List[Dict[str, Any]]) -> Dict[Tuple[str, int], str]:
+    """Texto atual de cada achado (objetos excluídos ficam de fora)."""
+    textos = {}
+    por_fonte: Dict[str, List[int]] = {}
+    for achado in achados:
+        por_fonte.setdefault(achado['fonte'], []).append(achado['objeto_id'])
+
+    for fonte, ids in por_fonte.items():
+        config = FONTES[fonte]
+        model = apps.get_model(config['model'])
+        for objeto_id, *partes in model.objects.filter(pk__in=ids).values_list('id', *config['texto']):
+            textos[(fonte, objeto_id)] = ' '.join(p for p in partes if p)
+    return textos
+
+
+def pesquisar(
+    consulta: str,
+    limite: int = 10,
+    fontes: Optional[List[str]] = None,
+    dias: Optional[int] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Busca no índice e completa cada achado com o texto e o nome do cliente.
+
+    Returns:
+        list de achados, ou None se o índice ainda não foi construído
+    """
+    from clientes.models import Cliente
+
+    indice = indice_atual()
+    if indice is None:
+        return None
+
+    inicio = time.perf_counter()
+    desde = (date.today() - timedelta(days=dias)) if dias else None
+    # Folga para achados de objetos já excluídos
+    achados = indice.buscar(consulta, limite=limite * 2, fontes=fontes, desde=desde)
+    logger.debug(f"Busca '{consulta}': {len(achados)} achados em {(time.perf_counter() - inicio) * 1000:.1f}ms")
+
+    textos = _trechos(achados)
+    nomes = dict(Cliente.objects.filter(
+        pk__in={a['cliente_id'] for a in achados if a['cliente_id']}
+    ).values_list('id', 'nome'))
+
+    resultado = []
+    for achado in achados:
+        texto = textos.get((achado['fonte'], achado['objeto_id']))
+        if texto is None:
+            continue
+        achado['texto'] = texto
+        achado['cliente'] = nomes.get(achado['cliente_id'])
+        resultado.append(achado)
+        if len(resultado) >= limite:
+            break
+    return resultado
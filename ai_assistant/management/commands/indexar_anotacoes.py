@@ -0,0 +1,72 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Índice de Anotações do Assistente de IA
+Indexa interações, observações, ordens de serviço e mensagens recebidas
+=============================================================================
+
+Incremental (cron, a cada poucos minutos):
+    python manage.py indexar_anotacoes
+
+Reconstrução (diária; inclui edições e exclusões):
+    python manage.py indexar_anotacoes --completo
+
+Testar uma busca:
+    python manage.py indexar_anotacoes --buscar "sucção fraca" --dias 90
+"""
+
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ai_assistant.indice_anotacoes import IndiceAnotacoes, pesquisar
+
+
+class Command(BaseCommand):
+    help = 'Atualiza o índice de busca textual nas anotações dos clientes (assistente de IA)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--completo',
+            action='store_true',
+            help='Reconstrói o índice do zero (em vez de indexar só os registros novos)'
+        )
+        parser.add_argument(
+            '--buscar',
+            type=str,
+            help='Apenas executa uma busca no índice atual'
+        )
+        parser.add_argument(
+            '--dias',
+            type=int,
+            help='Com --buscar: só anotações dos últimos N dias'
+        )
+
+    def handle(self, *args, **options):
+        diretorio = settings.AI_INDICE_ANOTACOES_DIR
+
+        if options['buscar']:
+            inicio = time.perf_counter()
+            achados = pesquisar(options['buscar'], dias=options['dias'])
+            if achados is None:
+                self.stdout.write(self.style.ERROR('❌ Índice ainda não construído'))
+                return
+            self.stdout.write(json.dumps(achados, indent=2, ensure_ascii=False, default=str))
+            self.stdout.write(f"{len(achados)} achado(s) em {(time.perf_counter() - inicio) * 1000:.1f}ms")
+            return
+
+        inicio = time.perf_counter()
+        if options['completo']:
+            indice = IndiceAnotacoes.vazio(diretorio)
+        else:
+            indice = IndiceAnotacoes.carregar(diretorio) or IndiceAnotacoes.vazio(diretorio)
+
+        novos = indice.atualizar()
+
+        self.stdout.write(
+            ' | '.join(f'{fonte}: {total}' for fonte, total in novos.items())
+            + f' | Documentos: {indice.total_docs} | Termos: {len(indice.vocabulario)}'
+            + f' | Segmentos: {len(indice.segmentos)} | {time.perf_counter() - inicio:.1f}s'
+        )
+        self.stdout.write(self.style.SUCCESS('✅ Índice de anotações atualizado'))
@@ -0,0 +1,242 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Memória de Conversa do Assistente de IA
+Sessão persistida por usuário, contada em tokens e limitada por orçamento
+=============================================================================
+
+Cada comando do usuário volta ao modelo com o histórico da sessão:
+
+    [system prompt fixo] [contexto + resumo] [turnos recentes] [nova mensagem]
+
+- tokens contados com tiktoken (contagem gravada em cada mensagem, o
+  histórico não é re-tokenizado a cada comando)
+- resultados de funções são truncados em AI_MEMORIA_TOKENS_FERRAMENTA
+- quando histórico + resumo passam de AI_MEMORIA_TOKENS, os turnos mais
+  antigos são resumidos pelo modelo (ou descartados, com
+  AI_MEMORIA_RESUMO=False) até sobrar metade do orçamento - a compactação
+  roda de tempos em tempos, não a cada comando
+- sessões sem uso há AI_SESSAO_EXPIRA_HORAS (ou com nova_conversa) são
+  encerradas e uma nova começa
+
+Um turno (mensagem do usuário + chamadas de função + resposta) nunca é
+dividido: a API recusa resultados de função sem a chamada correspondente.
+"""
+
+import json
+import logging
+from datetime import timedelta
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import tiktoken
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import MensagemAssistente, SessaoAssistente
+
+logger = logging.getLogger(__name__)
+
+# Tokens extras de cada mensagem no formato de chat (papel, separadores)
+TOKENS_POR_MENSAGEM = 3
+
+
+# =============================================================================
+# CONTAGEM DE TOKENS
+# =============================================================================
+
+@lru_cache(maxsize=None)
+def _codificador(modelo: str):
+    try:
+        try:
+            return tiktoken.encoding_for_model(modelo)
+        except KeyError:
+            return tiktoken.get_encoding('cl100k_base')
+    except Exception as e:
+        # Sem acesso ao arquivo BPE (servidor sem saída para a internet e
+        # sem TIKTOKEN_CACHE_DIR): estimativa de ~4 caracteres por token
+        logger.warning(f"⚠️ tiktoken indisponível para {modelo} ({e}); estimando tokens")
+        return None
+
+
+def contar_tokens(texto: str, modelo: str = None) -> int:
+    """Tokens de um texto no codificador do modelo."""
+    if not texto:
+        return 0
+    codificador = _codificador(modelo or settings.OPENAI_MODEL)
+    if codificador is None:
+        return len(texto) // 4 + 1
+    return len(codificador.encode(texto, disallowed_special=()))
+
+
+def tokens_mensagem(mensagem: Dict[str, Any]) -> int:
+    """Tokens de uma mensagem de chat (conteúdo + chamadas de função)."""
+    total = TOKENS_POR_MENSAGEM + contar_tokens(mensagem.get("content") or '')
+    if mensagem.get("tool_calls"):
+        total += contar_tokens(json.dumps(mensagem["tool_calls"], ensure_ascii=False))
+    return total
+
+
+@lru_cache(maxsize=8)
+def tokens_prefixo(texto_fixo: str) -> int:
+    """Tokens do system prompt + schemas das funções (iguais em todo comando)."""
+    return contar_tokens(texto_fixo)
+
+
+def truncar(texto: str, limite: int) -> str:
+    """Corta o texto em `limite` tokens (resultados de função longos)."""
+    if contar_tokens(texto) <= limite:
+        return texto
+    codificador = _codificador(settings.OPENAI_MODEL)
+    if codificador is None:
+        return texto[:limite * 4] + ' …[truncado]'
+    return codificador.decode(codificador.encode(texto, disallowed_special=())[:limite]) + ' …[truncado]'
+
+
+# =============================================================================
+# SESSÃO
+# =============================================================================
+
+def obter_sessao(usuario, nova: bool = False) -> SessaoAssistente:
+    """Sessão aberta do usuário (ou uma nova, se expirou ou foi pedida)."""
+    abertas = SessaoAssistente.objects.filter(usuario=usuario, encerrada=False)
+    limite = timezone.now() - timedelta(hours=settings.AI_SESSAO_EXPIRA_HORAS)
+
+    sessao = None if nova else abertas.filter(updated_at__gte=limite).first()
+    if sessao is None:
+        abertas.update(encerrada=True)
+        sessao = SessaoAssistente.objects.create(usuario=usuario)
+    return sessao
+
+
+def _turnos(mensagens: List[MensagemAssistente]) -> List[List[MensagemAssistente]]:
+    """Agrupa as mensagens em turnos, cada um começando por uma do usuário."""
+    turnos = []
+    for mensagem in mensagens:
+        if mensagem.papel == MensagemAssistente.PAPEL_USUARIO or not turnos:
+            turnos.append([])
+        turnos[-1].append(mensagem)
+    return turnos
+
+
+def _pendentes(sessao: SessaoAssistente) -> List[MensagemAssistente]:
+    return list(sessao.mensagens.filter(id__gt=sessao.resumido_ate).order_by('id'))
+
+
+def carregar_historico(
+    sessao: SessaoAssistente
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Turnos mais recentes que cabem no orçamento (descontado o resumo).
+
+    Returns:
+        tuple: (mensagens para a API, tokens do histórico)
+    """
+    orcamento = max(settings.AI_MEMORIA_TOKENS - sessao.tokens_resumo, 0)
+    escolhidos: List[List[MensagemAssistente]] = []
+    usados = 0
+
+    # Do mais recente para o mais antigo, turnos inteiros
+    for turno in reversed(_turnos(_pendentes(sessao))):
+        tokens = sum(m.tokens for m in turno)
+        if usados + tokens > orcamento:
+            break
+        escolhidos.append(turno)
+        usados += tokens
+
+    mensagens = [m.como_mensagem() for turno in reversed(escolhidos) for m in turno]
+    return mensagens, usados
+
+
+def gravar_turno(sessao: SessaoAssistente, mensagens: List[Dict[str, Any]]) -> int:
+    """
+    Grava as mensagens de um turno com a contagem de tokens.
+
+    Returns:
+        int: tokens do turno
+    """
+    limite_ferramenta = settings.AI_MEMORIA_TOKENS_FERRAMENTA
+    linhas = []
+    for mensagem in mensagens:
+        conteudo = mensagem.get("content") or ''
+        if mensagem["role"] == MensagemAssistente.PAPEL_FERRAMENTA:
+            conteudo = truncar(conteudo, limite_ferramenta)
+        linha = MensagemAssistente(
+            sessao=sessao,
+            papel=mensagem["role"],
+            conteudo=conteudo,
+            tool_calls=mensagem.get("tool_calls"),
+            tool_call_id=mensagem.get("tool_call_id"),
+        )
+        linha.tokens = tokens_mensagem(linha.como_mensagem())
+        linhas.append(linha)
+
+    with transaction.atomic():
+        MensagemAssistente.objects.bulk_create(linhas)
+        # Toca updated_at (expiração da sessão)
+        sessao.save(update_fields=['updated_at'])
+
+    return sum(linha.tokens for linha in linhas)
+
+
+# =============================================================================
+# COMPACTAÇÃO
+# =============================================================================
+
+def turnos_para_compactar(sessao: SessaoAssistente) -> Optional[List[List[MensagemAssistente]]]:
+    """
+    Turnos antigos a resumir, se histórico + resumo passaram do orçamento.
+
+    Sai o suficiente para sobrar metade do orçamento; o último turno fica.
+    """
+    orcamento = settings.AI_MEMORIA_TOKENS
+    turnos = _turnos(_pendentes(sessao))
+    total = sessao.tokens_resumo + sum(m.tokens for turno in turnos for m in turno)
+    if total <= orcamento or len(turnos) < 2:
+        return None
+
+    saem = []
+    for turno in turnos[:-1]:
+        if total <= orcamento // 2:
+            break
+        saem.append(turno)
+        total -= sum(m.tokens for m in turno)
+    return saem
+
+
+def transcrever(turnos: List[List[MensagemAssistente]]) -> str:
+    """Texto dos turnos para o pedido de resumo."""
+    linhas = []
+    for turno in turnos:
+        for mensagem in turno:
+            if mensagem.papel == MensagemAssistente.PAPEL_FERRAMENTA:
+                linhas.append(f"[resultado de função] {mensagem.conteudo}")
+            elif mensagem.tool_calls:
+                chamadas = ', '.join(
+                    f"{c['function']['name']}({c['function']['arguments']})" for c in mensagem.tool_calls
+                )
+                linhas.append(f"assistente chamou: {chamadas}")
+                if mensagem.conteudo:
+                    linhas.append(f"assistente: {mensagem.conteudo}")
+            else:
+                papel = 'usuário' if mensagem.papel == MensagemAssistente.PAPEL_USUARIO else 'assistente'
+                linhas.append(f"{papel}: {mensagem.conteudo}")
+    return '\n'.join(linhas)
+
+
+def aplicar_resumo(
+    sessao: SessaoAssistente,
+    turnos: List[List[MensagemAssistente]],
+    resumo: Optional[str]
+) -> None:
+    """Move os turnos para o resumo (resumo=None: só descarta)."""
+    sessao.resumido_ate = turnos[-1][-1].pk
+    if resumo is not None:
+        sessao.resumo = resumo.strip()
+        sessao.tokens_resumo = contar_tokens(sessao.resumo)
+    sessao.save(update_fields=['resumido_ate', 'resumo', 'tokens_resumo', 'updated_at'])
+    logger.info(
+        f"🧠 Sessão #{sessao.pk}: {sum(len(t) for t in turnos)} mensagens "
+        f"{'resumidas' if resumo is not None else 'descartadas'}"
+    )
+
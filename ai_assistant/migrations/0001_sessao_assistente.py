@@ -0,0 +1,61 @@
+# Generated by Django 4.2.10 on 2026-10-19 01:58
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessaoAssistente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resumo', models.TextField(blank=True, default='', help_text='Resumo dos turnos que saíram do histórico', verbose_name='Resumo')),
+                ('tokens_resumo', models.PositiveIntegerField(default=0, verbose_name='Tokens do Resumo')),
+                ('resumido_ate', models.PositiveBigIntegerField(default=0, help_text='ID da última mensagem incorporada ao resumo (ou descartada)', verbose_name='Resumido até')),
+                ('encerrada', models.BooleanField(default=False, verbose_name='Encerrada')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sessoes_assistente', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Sessão do Assistente',
+                'verbose_name_plural': 'Sessões do Assistente',
+                'ordering': ['-updated_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MensagemAssistente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('papel', models.CharField(choices=[('user', 'Usuário'), ('assistant', 'Assistente'), ('tool', 'Resultado de função')], max_length=20, verbose_name='Papel')),
+                ('conteudo', models.TextField(blank=True, default='', verbose_name='Conteúdo')),
+                ('tool_calls', models.JSONField(blank=True, null=True, verbose_name='Chamadas de Função')),
+                ('tool_call_id', models.CharField(blank=True, max_length=100, null=True, verbose_name='ID da Chamada')),
+                ('tokens', models.PositiveIntegerField(default=0, verbose_name='Tokens')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sessao', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mensagens', to='ai_assistant.sessaoassistente', verbose_name='Sessão')),
+            ],
+            options={
+                'verbose_name': 'Mensagem do Assistente',
+                'verbose_name_plural': 'Mensagens do Assistente',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='sessaoassistente',
+            index=models.Index(condition=models.Q(('encerrada', False)), fields=['usuario', '-updated_at'], name='sessao_ia_aberta'),
+        ),
+        migrations.AddIndex(
+            model_name='mensagemassistente',
+            index=models.Index(fields=['sessao', 'id'], name='mensagem_ia_sessao'),
+        ),
+    ]
@@ -0,0 +1,128 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Assistente de IA
+Models: SessaoAssistente, MensagemAssistente
+=============================================================================
+"""
+
+from django.db import models
+from django.contrib.auth.models import User
+
+
+class SessaoAssistente(models.Model):
+    """
+    Conversa de um usuário com o assistente: as mensagens voltam ao modelo
+    nos comandos seguintes ("confirmar campanha" sabe qual campanha). Turnos
+    antigos viram um resumo para caber no orçamento de tokens (memoria.py).
+    """
+
+    usuario = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='sessoes_assistente',
+        verbose_name='Usuário'
+    )
+    resumo = models.TextField(
+        blank=True,
+        default='',
+        verbose_name='Resumo',
+        help_text='Resumo dos turnos que saíram do histórico'
+    )
+    tokens_resumo = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Tokens do Resumo'
+    )
+    resumido_ate = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Resumido até',
+        help_text='ID da última mensagem incorporada ao resumo (ou descartada)'
+    )
+    encerrada = models.BooleanField(
+        default=False,
+        verbose_name='Encerrada'
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Sessão do Assistente'
+        verbose_name_plural = 'Sessões do Assistente'
+        ordering = ['-updated_at']
+        indexes = [
+            models.Index(
+                fields=['usuario', '-updated_at'],
+                name='sessao_ia_aberta',
+                condition=models.Q(encerrada=False),
+            ),
+        ]
+
+    def __str__(self):
+        return f"Sessão #{self.pk} - {self.usuario}"
+
+
+class MensagemAssistente(models.Model):
+    """Mensagem de uma sessão, no formato da Chat Completions API."""
+
+    PAPEL_USUARIO = 'user'
+    PAPEL_ASSISTENTE = 'assistant'
+    PAPEL_FERRAMENTA = 'tool'
+    PAPEL_CHOICES = [
+        (PAPEL_USUARIO, 'Usuário'),
+        (PAPEL_ASSISTENTE, 'Assistente'),
+        (PAPEL_FERRAMENTA, 'Resultado de função'),
+    ]
+
+    sessao = models.ForeignKey(
+        SessaoAssistente,
+        on_delete=models.CASCADE,
+        related_name='mensagens',
+        verbose_name='Sessão'
+    )
+    papel = models.CharField(
+        max_length=20,
+        choices=PAPEL_CHOICES,
+        verbose_name='Papel'
+    )
+    conteudo = models.TextField(
+        blank=True,
+        default='',
+        verbose_name='Conteúdo'
+    )
+    tool_calls = models.JSONField(
+        null=True,
+        blank=True,
+        verbose_name='Chamadas de Função'
+    )
+    tool_call_id = models.CharField(
+        max_length=100,
+        null=True,
+        blank=True,
+        verbose_name='ID da Chamada'
+    )
+    tokens = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Tokens'
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Mensagem do Assistente'
+        verbose_name_plural = 'Mensagens do Assistente'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['sessao', 'id'], name='mensagem_ia_sessao'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_papel_display()} #{self.pk} (sessão #{self.sessao_id})"
+
+    def como_mensagem(self) -> dict:
+        """Mensagem para a Chat Completions API."""
+        mensagem = {"role": self.papel, "content": self.conteudo or None}
+        if self.tool_calls:
+            mensagem["tool_calls"] = self.tool_calls
+        if self.tool_call_id:
+            mensagem["tool_call_id"] = self.tool_call_id
+        return mensagem
@@ -0,0 +1,105 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Registro das Funções do Assistente de IA
+Cada função declara seu schema de Function Calling junto da implementação
+=============================================================================
+
+Em functions.py:
+
+    @ferramenta(
+        "Busca informações de um cliente pelo nome, telefone ou CPF",
+        parametros={"termo": {"type": "string", "description": "Nome, telefone ou CPF"}},
+        obrigatorios=["termo"],
+        somente_leitura=True,
+        ttl=60,
+        modelos=['clientes.Cliente'],
+    )
+    def buscar_cliente(termo: str) -> Dict[str, Any]:
+        ...
+
+- somente_leitura/ttl/modelos: resultado cacheado (cache_ferramentas.py),
+  invalidado ao salvar/excluir os models (signals.py); as demais funções
+  alteram dados ou enviam mensagens e sempre executam
+- timeout: segundos (padrão AI_FERRAMENTA_TIMEOUT)
+- com_usuario: recebe o usuário que fez o pedido em `usuario`
+
+A lista de schemas enviada à OpenAI é montada na primeira chamada de
+schemas() e reaproveitada pelo processo.
+"""
+
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# nome da função → Ferramenta, na ordem em que foram declaradas
+REGISTRO: Dict[str, 'Ferramenta'] = {}
+
+
+class Ferramenta:
+    """Função que o modelo pode chamar: schema e como executá-la."""
+
+    def __init__(
+        self,
+        funcao: Callable,
+        descricao: str,
+        parametros: Optional[Dict[str, Dict[str, Any]]] = None,
+        obrigatorios: Optional[Sequence[str]] = None,
+        somente_leitura: bool = False,
+        ttl: int = 300,
+        modelos: Sequence[str] = (),
+        timeout: Optional[float] = None,
+        com_usuario: bool = False,
+    ):
+        self.funcao = funcao
+        self.nome = funcao.__name__
+        self.descricao = descricao
+        self.parametros = parametros or {}
+        self.obrigatorios = list(obrigatorios or [])
+        self.somente_leitura = somente_leitura
+        self.ttl = ttl
+        self.modelos = list(modelos)
+        self.timeout = timeout
+        self.com_usuario = com_usuario
+
+    def schema(self) -> Dict[str, Any]:
+        """Definição no formato `tools` da Chat Completions API."""
+        parametros = {"type": "object", "properties": self.parametros}
+        if self.obrigatorios:
+            parametros["required"] = self.obrigatorios
+        return {
+            "type": "function",
+            "function": {
+                "name": self.nome,
+                "description": self.descricao,
+                "parameters": parametros,
+            }
+        }
+
+
+def ferramenta(descricao: str, **opcoes) -> Callable[[Callable], Callable]:
+    """Registra a função decorada como ferramenta do assistente (ver Ferramenta)."""
+    def registrar(funcao: Callable) -> Callable:
+        REGISTRO[funcao.__name__] = Ferramenta(funcao, descricao, **opcoes)
+        return funcao
+    return registrar
+
+
+def _carregar() -> Dict[str, Ferramenta]:
+    # As funções se registram ao importar o módulo
+    from . import functions  # noqa: F401
+    return REGISTRO
+
+
+def obter(nome: str) -> Optional[Ferramenta]:
+    """Ferramenta pelo nome (None se o modelo inventou uma função)."""
+    return _carregar().get(nome)
+
+
+def ferramentas() -> List[Ferramenta]:
+    """Todas as ferramentas registradas."""
+    return list(_carregar().values())
+
+
+@lru_cache(maxsize=1)
+def schemas() -> List[Dict[str, Any]]:
+    """Schemas de todas as funções (montados uma vez por processo)."""
+    return [f.schema() for f in ferramentas()]
@@ -5,25 +5,58 @@ Integração OpenAI GPT-4o-mini para comandos inteligentes
 =============================================================================
 """
 
+import asyncio
 import json
 import logging
-from typing import Optional, Dict, Any, List, Callable
+import time
+import weakref
+from typing import Optional, Dict, Any, List, Callable, AsyncIterator, Tuple
 from datetime import datetime, timedelta
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.utils import timezone
-from openai import OpenAI
+from openai import AsyncOpenAI
+from openai.types.chat import ChatCompletionMessageToolCall
+from openai.types.chat.chat_completion_message_tool_call import Function
+
+from . import memoria, registro
+from .executor import executar_chamadas, executar_ferramenta, mensagem_ferramenta, novas_estatisticas
 
 logger = logging.getLogger(__name__)
 
+# Um AsyncOpenAI (e seu pool de conexões) por event loop: sob ASGI todas as
+# requisições do worker compartilham o mesmo cliente
+_clientes_openai: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]' = weakref.WeakKeyDictionary()
+
+
+def obter_cliente_openai() -> AsyncOpenAI:
+    """Cliente OpenAI assíncrono compartilhado do event loop atual."""
+    loop = asyncio.get_running_loop()
+    cliente = _clientes_openai.get(loop)
+    if cliente is None:
+        cliente = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL,
+        )
+        _clientes_openai[loop] = cliente
+    return cliente
+
 
 class AIAssistant:
     """
     Assistente de IA com Function Calling para o sistema Life Rainbow.
     Processa comandos em linguagem natural e executa ações no sistema.
+
+    Com usuário autenticado, cada comando segue a sessão de conversa dele
+    (memoria.py): o histórico recente volta ao modelo, dentro do orçamento
+    de tokens AI_MEMORIA_TOKENS.
     """
 
+    # System prompt + tools são sempre o início das mensagens: o prefixo
+    # idêntico aproveita o cache de prompt da OpenAI
+    _prefixo: Optional[str] = None
+
     def __init__(self):
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
         self.model = settings.OPENAI_MODEL
         self.max_tokens = settings.OPENAI_MAX_TOKENS
 
@@ -50,492 +83,160 @@ Contexto do negócio:
 - Sistema de pontuação para consultores
 - Aluguéis mensais com prazo de 12 meses tipicamente"""
 
-        # Definição das funções disponíveis
-        self.tools = self._definir_tools()
+    @property
+    def client(self) -> AsyncOpenAI:
+        """Cliente OpenAI compartilhado (só dentro de um event loop)."""
+        return obter_cliente_openai()
+
+    @property
+    def tools(self) -> List[Dict]:
+        """Schemas das funções (@ferramenta em functions.py), montados uma vez."""
+        return registro.schemas()
 
-    def _definir_tools(self) -> List[Dict]:
+    @property
+    def prefixo(self) -> str:
+        """Texto fixo do início do prompt (para a contagem de tokens)."""
+        if AIAssistant._prefixo is None:
+            AIAssistant._prefixo = self.system_prompt + json.dumps(self.tools, ensure_ascii=False)
+        return AIAssistant._prefixo
+
+    def _montar_mensagens(
+        self,
+        mensagem: str,
+        contexto: Dict[str, Any] = None,
+        usuario: Any = None,
+        resumo: str = '',
+        historico: List[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
         """
-        Define todas as funções/tools disponíveis para Function Calling.
+        System prompt fixo + contexto/usuário/resumo da sessão + histórico +
+        mensagem do usuário.
         """
-        return [
-            # ===== CLIENTES =====
-            {
-                "type": "function",
-                "function": {
-                    "name": "buscar_cliente",
-                    "description": "Busca informações de um cliente pelo nome, telefone ou CPF",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "termo": {
-                                "type": "string",
-                                "description": "Nome, telefone ou CPF do cliente"
-                            }
-                        },
-                        "required": ["termo"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "listar_clientes_sem_contato",
-                    "description": "Lista clientes que não recebem contato há X dias",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "dias": {
-                                "type": "integer",
-                                "description": "Número de dias sem contato",
-                                "default": 30
-                            },
-                            "consultor": {
-                                "type": "string",
-                                "description": "Filtrar por consultor específico (opcional)"
-                            },
-                            "limite": {
-                                "type": "integer",
-                                "description": "Máximo de resultados",
-                                "default": 20
-                            }
-                        },
-                        "required": ["dias"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "listar_clientes_sem_manutencao",
-                    "description": "Lista clientes com equipamentos que precisam de manutenção",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "dias_atraso": {
-                                "type": "integer",
-                                "description": "Dias de atraso na manutenção",
-                                "default": 0
-                            },
-                            "limite": {
-                                "type": "integer",
-                                "description": "Máximo de resultados",
-                                "default": 20
-                            }
-                        }
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "registrar_contato",
-                    "description": "Registra um contato/interação com o cliente",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "cliente_id": {
-                                "type": "integer",
-                                "description": "ID do cliente"
-                            },
-                            "tipo": {
-                                "type": "string",
-                                "enum": ["ligacao", "whatsapp", "email", "visita"],
-                                "description": "Tipo de contato"
-                            },
-                            "descricao": {
-                                "type": "string",
-                                "description": "Descrição/resumo do contato"
-                            },
-                            "resultado": {
-                                "type": "string",
-                                "description": "Resultado do contato"
-                            },
-                            "proxima_acao": {
-                                "type": "string",
-                                "description": "Próxima ação a ser tomada"
-                            },
-                            "data_proxima_acao": {
-                                "type": "string",
-                                "description": "Data da próxima ação (YYYY-MM-DD)"
-                            }
-                        },
-                        "required": ["cliente_id", "tipo", "descricao"]
-                    }
-                }
-            },
+        messages = [
+            {"role": "system", "content": self.system_prompt}
+        ]
 
-            # ===== VENDAS E FINANCEIRO =====
-            {
-                "type": "function",
-                "function": {
-                    "name": "listar_vendas_periodo",
-                    "description": "Lista vendas realizadas em um período",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "data_inicio": {
-                                "type": "string",
-                                "description": "Data inicial (YYYY-MM-DD)"
-                            },
-                            "data_fim": {
-                                "type": "string",
-                                "description": "Data final (YYYY-MM-DD)"
-                            },
-                            "consultor": {
-                                "type": "string",
-                                "description": "Filtrar por consultor"
-                            },
-                            "status": {
-                                "type": "string",
-                                "enum": ["pendente", "concluida", "cancelada"],
-                                "description": "Status da venda"
-                            }
-                        },
-                        "required": ["data_inicio", "data_fim"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "listar_contas_vencidas",
-                    "description": "Lista contas a receber vencidas",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "dias_atraso": {
-                                "type": "integer",
-                                "description": "Mínimo de dias de atraso",
-                                "default": 1
-                            },
-                            "consultor": {
-                                "type": "string",
-                                "description": "Filtrar por consultor"
-                            },
-                            "limite": {
-                                "type": "integer",
-                                "description": "Máximo de resultados",
-                                "default": 50
-                            }
-                        }
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "calcular_resumo_financeiro",
-                    "description": "Calcula resumo financeiro (receitas, despesas, lucro) de um período",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "mes": {
-                                "type": "integer",
-                                "description": "Mês (1-12)"
-                            },
-                            "ano": {
-                                "type": "integer",
-                                "description": "Ano (ex: 2024)"
-                            }
-                        },
-                        "required": ["mes", "ano"]
-                    }
-                }
-            },
+        # Partes que variam ficam fora do system prompt fixo
+        variavel = ''
+        if contexto:
+            variavel += f"\nContexto atual:\n{json.dumps(contexto, ensure_ascii=False, indent=2)}"
+        if usuario:
+            variavel += f"\nUsuário atual: {usuario.get_full_name() or usuario.username}"
+        if resumo:
+            variavel += f"\nResumo da conversa até aqui:\n{resumo}"
+        if variavel:
+            messages.append({"role": "system", "content": variavel.strip()})
 
-            # ===== ALUGUÉIS =====
-            {
-                "type": "function",
-                "function": {
-                    "name": "listar_alugueis_vencendo",
-                    "description": "Lista contratos de aluguel que vencem nos próximos dias",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "dias": {
-                                "type": "integer",
-                                "description": "Dias até o vencimento",
-                                "default": 30
-                            }
-                        }
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "listar_parcelas_atrasadas",
-                    "description": "Lista parcelas de aluguel em atraso",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "dias_atraso": {
-                                "type": "integer",
-                                "description": "Mínimo de dias de atraso",
-                                "default": 1
-                            },
-                            "limite": {
-                                "type": "integer",
-                                "description": "Máximo de resultados",
-                                "default": 50
-                            }
-                        }
-                    }
-                }
-            },
+        messages.extend(historico or [])
 
-            # ===== AGENDA =====
-            {
-                "type": "function",
-                "function": {
-                    "name": "listar_agendamentos",
-                    "description": "Lista agendamentos de um período",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "data": {
-                                "type": "string",
-                                "description": "Data específica (YYYY-MM-DD) ou 'hoje', 'amanha', 'semana'"
-                            },
-                            "responsavel": {
-                                "type": "string",
-                                "description": "Filtrar por responsável"
-                            },
-                            "tipo": {
-                                "type": "string",
-                                "enum": ["demonstracao", "visita", "manutencao", "entrega"],
-                                "description": "Tipo de agendamento"
-                            }
-                        },
-                        "required": ["data"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "criar_agendamento",
-                    "description": "Cria um novo agendamento",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "cliente_id": {
-                                "type": "integer",
-                                "description": "ID do cliente"
-                            },
-                            "tipo": {
-                                "type": "string",
-                                "enum": ["demonstracao", "visita", "manutencao", "entrega"],
-                                "description": "Tipo de agendamento"
-                            },
-                            "data": {
-                                "type": "string",
-                                "description": "Data (YYYY-MM-DD)"
-                            },
-                            "hora": {
-                                "type": "string",
-                                "description": "Hora (HH:MM)"
-                            },
-                            "titulo": {
-                                "type": "string",
-                                "description": "Título/descrição"
-                            },
-                            "responsavel": {
-                                "type": "string",
-                                "description": "Nome do responsável"
-                            }
-                        },
-                        "required": ["cliente_id", "tipo", "data", "hora", "titulo"]
-                    }
-                }
-            },
+        # Adicionar mensagem do usuário
+        messages.append({"role": "user", "content": mensagem})
+        return messages
 
-            # ===== WHATSAPP =====
-            {
-                "type": "function",
-                "function": {
-                    "name": "enviar_whatsapp",
-                    "description": "Envia mensagem de WhatsApp para um cliente",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "cliente_id": {
-                                "type": "integer",
-                                "description": "ID do cliente"
-                            },
-                            "mensagem": {
-                                "type": "string",
-                                "description": "Texto da mensagem"
-                            },
-                            "tipo": {
-                                "type": "string",
-                                "enum": ["texto", "audio", "template"],
-                                "description": "Tipo de mensagem",
-                                "default": "texto"
-                            },
-                            "template_name": {
-                                "type": "string",
-                                "description": "Nome do template (se tipo=template)"
-                            }
-                        },
-                        "required": ["cliente_id", "mensagem"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "enviar_campanha_whatsapp",
-                    "description": "Envia campanha de WhatsApp para múltiplos clientes",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "template_name": {
-                                "type": "string",
-                                "description": "Nome do template aprovado"
-                            },
-                            "filtro_perfil": {
-                                "type": "array",
-                                "items": {"type": "string"},
-                                "description": "Filtrar por perfis (ex: ['diamante', 'ouro'])"
-                            },
-                            "filtro_consultor": {
-                                "type": "string",
-                                "description": "Filtrar por consultor"
-                            },
-                            "filtro_dias_sem_contato": {
-                                "type": "integer",
-                                "description": "Clientes sem contato há X dias"
-                            }
-                        },
-                        "required": ["template_name"]
-                    }
-                }
-            },
+    def _preparar(
+        self,
+        mensagem: str,
+        contexto: Dict[str, Any] = None,
+        usuario: Any = None,
+        nova_conversa: bool = False
+    ) -> Tuple[List[Dict[str, Any]], Any, Dict[str, Any]]:
+        """
+        Mensagens do comando com a memória da sessão (síncrono: ORM e tiktoken).
 
-            # ===== ANÁLISES E RELATÓRIOS =====
-            {
-                "type": "function",
-                "function": {
-                    "name": "gerar_relatorio_vendas",
-                    "description": "Gera relatório detalhado de vendas",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "mes": {
-                                "type": "integer",
-                                "description": "Mês (1-12)"
-                            },
-                            "ano": {
-                                "type": "integer",
-                                "description": "Ano"
-                            },
-                            "agrupar_por": {
-                                "type": "string",
-                                "enum": ["consultor", "produto", "cliente", "dia"],
-                                "description": "Agrupamento do relatório"
-                            }
-                        },
-                        "required": ["mes", "ano"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "ranking_consultores",
-                    "description": "Mostra ranking de consultores por vendas/pontos",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "mes": {
-                                "type": "integer",
-                                "description": "Mês (1-12)"
-                            },
-                            "ano": {
-                                "type": "integer",
-                                "description": "Ano"
-                            },
-                            "criterio": {
-                                "type": "string",
-                                "enum": ["valor", "pontos", "quantidade"],
-                                "description": "Critério de ordenação",
-                                "default": "valor"
-                            }
-                        },
-                        "required": ["mes", "ano"]
-                    }
-                }
-            },
+        Returns:
+            tuple: (mensagens, sessão ou None, metricas.memoria)
+        """
+        sessao, historico, tokens_historico = None, [], 0
+        if getattr(usuario, 'is_authenticated', False):
+            sessao = memoria.obter_sessao(usuario, nova=nova_conversa)
+            historico, tokens_historico = memoria.carregar_historico(sessao)
+
+        messages = self._montar_mensagens(
+            mensagem, contexto, usuario,
+            resumo=sessao.resumo if sessao else '',
+            historico=historico
+        )
+
+        # Histórico já tem a contagem gravada; conta só system variável e a mensagem nova
+        novas = messages[1:len(messages) - len(historico) - 1] + messages[-1:]
+        tokens_prompt = (
+            memoria.tokens_prefixo(self.prefixo)
+            + tokens_historico
+            + sum(memoria.tokens_mensagem(m) for m in novas)
+        )
+
+        return messages, sessao, {
+            "sessao_id": sessao.pk if sessao else None,
+            "mensagens_historico": len(historico),
+            "tokens_historico": tokens_historico,
+            "tokens_prompt": tokens_prompt,
+        }
 
-            # ===== EQUIPAMENTOS =====
-            {
-                "type": "function",
-                "function": {
-                    "name": "buscar_equipamento",
-                    "description": "Busca informações de um equipamento pelo número de série",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "numero_serie": {
-                                "type": "string",
-                                "description": "Número de série do equipamento"
-                            }
-                        },
-                        "required": ["numero_serie"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "verificar_garantia",
-                    "description": "Verifica status de garantia de um equipamento",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "numero_serie": {
-                                "type": "string",
-                                "description": "Número de série"
-                            }
-                        },
-                        "required": ["numero_serie"]
-                    }
-                }
-            }
-        ]
+    async def _lembrar(self, sessao, turno: List[Dict[str, Any]]) -> None:
+        """Grava o turno na sessão (sem sessão: comando avulso)."""
+        if sessao is None:
+            return
+        try:
+            await sync_to_async(memoria.gravar_turno)(sessao, turno)
+        except Exception as e:
+            logger.error(f"Erro ao gravar memória da sessão #{sessao.pk}: {e}")
+
+    async def _compactar(self, sessao) -> None:
+        """Resume (ou descarta) os turnos antigos se a sessão passou do orçamento."""
+        if sessao is None:
+            return
+        try:
+            turnos = await sync_to_async(memoria.turnos_para_compactar)(sessao)
+            if not turnos:
+                return
+
+            if not settings.AI_MEMORIA_RESUMO:
+                await sync_to_async(memoria.aplicar_resumo)(sessao, turnos, None)
+                return
+
+            resposta = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": PROMPT_RESUMO},
+                    {"role": "user", "content": (
+                        f"Resumo anterior:\n{sessao.resumo or '(vazio)'}\n\n"
+                        f"Novos trechos:\n{memoria.transcrever(turnos)}"
+                    )},
+                ],
+                max_tokens=settings.AI_MEMORIA_TOKENS_RESUMO
+            )
+            resumo = resposta.choices[0].message.content
+            if resumo:
+                await sync_to_async(memoria.aplicar_resumo)(sessao, turnos, resumo)
+
+        except Exception as e:
+            # Turnos ficam como estão: carregar_historico já respeita o orçamento
+            logger.warning(f"Não foi possível resumir a sessão #{sessao.pk}: {e}")
 
     async def processar_comando(
         self,
         mensagem: str,
         contexto: Dict[str, Any] = None,
-        usuario: Any = None
+        usuario: Any = None,
+        nova_conversa: bool = False
     ) -> Dict[str, Any]:
         """
         Processa um comando/mensagem do usuário.
         Usa Function Calling para executar ações quando necessário.
-        """
-        try:
-            # Construir mensagens para a API
-            messages = [
-                {"role": "system", "content": self.system_prompt}
-            ]
-
-            # Adicionar contexto se houver
-            if contexto:
-                context_str = f"\nContexto atual:\n{json.dumps(contexto, ensure_ascii=False, indent=2)}"
-                messages[0]["content"] += context_str
 
-            # Adicionar informações do usuário
-            if usuario:
-                user_info = f"\nUsuário atual: {usuario.get_full_name() or usuario.username}"
-                messages[0]["content"] += user_info
+        nova_conversa encerra a sessão atual do usuário antes do comando.
+        """
+        inicio = time.perf_counter()
+        cache = novas_estatisticas()
 
-            # Adicionar mensagem do usuário
-            messages.append({"role": "user", "content": mensagem})
+        try:
+            messages, sessao, info_memoria = await sync_to_async(self._preparar)(
+                mensagem, contexto, usuario, nova_conversa
+            )
+            turno = [messages[-1]]
 
             # Primeira chamada à API
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=self.model,
                 messages=messages,
                 tools=self.tools,
@@ -547,50 +248,58 @@ Contexto do negócio:
 
             # Verificar se há chamadas de função
             if assistant_message.tool_calls:
-                # Executar cada função chamada
-                tool_results = []
-
-                for tool_call in assistant_message.tool_calls:
-                    function_name = tool_call.function.name
-                    function_args = json.loads(tool_call.function.arguments)
-
-                    logger.info(f"Executando função: {function_name} com args: {function_args}")
-
-                    # Executar a função
-                    result = await self._executar_funcao(function_name, function_args, usuario)
-
-                    tool_results.append({
-                        "tool_call_id": tool_call.id,
-                        "role": "tool",
-                        "content": json.dumps(result, ensure_ascii=False, default=str)
-                    })
+                # Chamadas independentes: em paralelo, fora do event loop
+                tool_results = await executar_chamadas(assistant_message.tool_calls, usuario, cache)
 
                 # Adicionar resultados e fazer segunda chamada
-                messages.append(assistant_message)
+                chamada = {
+                    "role": "assistant",
+                    "content": assistant_message.content,
+                    "tool_calls": [tc.model_dump() for tc in assistant_message.tool_calls],
+                }
+                messages.append(chamada)
                 messages.extend(tool_results)
+                turno += [chamada, *tool_results]
 
                 # Segunda chamada para gerar resposta final
-                final_response = self.client.chat.completions.create(
+                final_response = await self.client.chat.completions.create(
                     model=self.model,
                     messages=messages,
                     max_tokens=self.max_tokens
                 )
 
-                return {
-                    "success": True,
-                    "resposta": final_response.choices[0].message.content,
-                    "funcoes_executadas": [tc.function.name for tc in assistant_message.tool_calls],
-                    "tokens_usados": final_response.usage.total_tokens
-                }
+                resposta = final_response.choices[0].message.content
+                funcoes = [tc.function.name for tc in assistant_message.tool_calls]
+                tokens = final_response.usage.total_tokens
 
             else:
                 # Resposta direta sem chamada de função
-                return {
-                    "success": True,
-                    "resposta": assistant_message.content,
-                    "funcoes_executadas": [],
-                    "tokens_usados": response.usage.total_tokens
-                }
+                resposta = assistant_message.content
+                funcoes = []
+                tokens = response.usage.total_tokens
+
+            turno.append({"role": "assistant", "content": resposta or ''})
+            await self._lembrar(sessao, turno)
+            await self._compactar(sessao)
+
+            # Sem streaming o primeiro texto só chega com a resposta completa
+            total_ms = _ms_desde(inicio)
+            logger.info(
+                f"🤖 IA: resposta em {total_ms}ms ({len(funcoes)} funções, {cache['hits']} do cache)"
+            )
+
+            return {
+                "success": True,
+                "resposta": resposta,
+                "funcoes_executadas": funcoes,
+                "tokens_usados": tokens,
+                "metricas": {
+                    "ttft_ms": total_ms,
+                    "total_ms": total_ms,
+                    "cache": cache,
+                    "memoria": info_memoria,
+                },
+            }
 
         except Exception as e:
             logger.error(f"Erro no processamento da IA: {e}")
@@ -600,54 +309,206 @@ Contexto do negócio:
                 "resposta": "Desculpe, ocorreu um erro ao processar seu comando. Tente novamente."
             }
 
-    async def _executar_funcao(
+    async def _stream_completion(self, messages: List, com_tools: bool):
+        """
+        Chamada com stream=True: repassa ('token', texto) a cada pedaço de
+        texto e termina com ('tool_calls', lista) montada a partir dos deltas.
+        """
+        parametros = {"tools": self.tools, "tool_choice": "auto"} if com_tools else {}
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=self.max_tokens,
+            stream=True,
+            **parametros
+        )
+
+        # Deltas de tool_calls chegam fatiados por índice
+        chamadas: Dict[int, Dict[str, str]] = {}
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+
+            if delta.content:
+                yield 'token', delta.content
+
+            for parcial in delta.tool_calls or []:
+                chamada = chamadas.setdefault(parcial.index, {'id': '', 'nome': '', 'argumentos': ''})
+                if parcial.id:
+                    chamada['id'] = parcial.id
+                if parcial.function and parcial.function.name:
+                    chamada['nome'] += parcial.function.name
+                if parcial.function and parcial.function.arguments:
+                    chamada['argumentos'] += parcial.function.arguments
+
+        yield 'tool_calls', [
+            ChatCompletionMessageToolCall(
+                id=c['id'],
+                type='function',
+                function=Function(name=c['nome'], arguments=c['argumentos']),
+            )
+            for _, c in sorted(chamadas.items())
+        ]
+
+    async def processar_comando_stream(
         self,
-        nome: str,
-        args: Dict[str, Any],
-        usuario: Any
-    ) -> Any:
+        mensagem: str,
+        contexto: Dict[str, Any] = None,
+        usuario: Any = None,
+        nova_conversa: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
         """
-        Executa a função chamada pela IA.
+        Versão em streaming de processar_comando: gera eventos
+
+            {"evento": "ferramenta", "nome": ..., "status": "executando"|"concluida"}
+            {"evento": "token", "texto": ...}
+            {"evento": "fim", "funcoes_executadas": [...], "metricas": {...}}
+            {"evento": "erro", "error": ...}
+
+        metricas.ttft_ms é o tempo até o primeiro texto da resposta e
+        metricas.cache os hits/misses das funções somente leitura. Se o
+        streaming falhar antes do primeiro evento, cai para
+        processar_comando e entrega a resposta inteira como um token.
+
+        O turno é gravado na sessão antes do evento 'fim'; o resumo de
+        turnos antigos, quando necessário, roda depois dele.
         """
-        # Importar aqui para evitar imports circulares
-        from . import functions
-
-        # Mapear nomes para funções reais
-        funcoes_disponiveis = {
-            'buscar_cliente': functions.buscar_cliente,
-            'listar_clientes_sem_contato': functions.listar_clientes_sem_contato,
-            'listar_clientes_sem_manutencao': functions.listar_clientes_sem_manutencao,
-            'registrar_contato': functions.registrar_contato,
-            'listar_vendas_periodo': functions.listar_vendas_periodo,
-            'listar_contas_vencidas': functions.listar_contas_vencidas,
-            'calcular_resumo_financeiro': functions.calcular_resumo_financeiro,
-            'listar_alugueis_vencendo': functions.listar_alugueis_vencendo,
-            'listar_parcelas_atrasadas': functions.listar_parcelas_atrasadas,
-            'listar_agendamentos': functions.listar_agendamentos,
-            'criar_agendamento': functions.criar_agendamento,
-            'enviar_whatsapp': functions.enviar_whatsapp,
-            'enviar_campanha_whatsapp': functions.enviar_campanha_whatsapp,
-            'gerar_relatorio_vendas': functions.gerar_relatorio_vendas,
-            'ranking_consultores': functions.ranking_consultores,
-            'buscar_equipamento': functions.buscar_equipamento,
-            'verificar_garantia': functions.verificar_garantia,
+        inicio = time.perf_counter()
+        ttft_ms = None
+        funcoes: List[str] = []
+        cache = novas_estatisticas()
+        emitiu = False
+        sessao = None
+
+        try:
+            messages, sessao, info_memoria = await sync_to_async(self._preparar)(
+                mensagem, contexto, usuario, nova_conversa
+            )
+            turno = [messages[-1]]
+            tool_calls = []
+            texto = []
+
+            async for tipo, valor in self._stream_completion(messages, com_tools=True):
+                if tipo == 'token':
+                    if ttft_ms is None:
+                        ttft_ms = _ms_desde(inicio)
+                    texto.append(valor)
+                    emitiu = True
+                    yield {"evento": "token", "texto": valor}
+                else:
+                    tool_calls = valor
+
+            if tool_calls:
+                funcoes = [tc.function.name for tc in tool_calls]
+                for tc in tool_calls:
+                    emitiu = True
+                    yield {"evento": "ferramenta", "nome": tc.function.name, "status": "executando"}
+
+                # Em paralelo; cada função é anunciada ao terminar
+                tarefas = {
+                    asyncio.ensure_future(
+                        executar_ferramenta(tc.function.name, tc.function.arguments, usuario, cache)
+                    ): tc
+                    for tc in tool_calls
+                }
+                resultados = {}
+                pendentes = set(tarefas)
+                while pendentes:
+                    prontas, pendentes = await asyncio.wait(pendentes, return_when=asyncio.FIRST_COMPLETED)
+                    for tarefa in prontas:
+                        tc = tarefas[tarefa]
+                        resultados[tc.id] = tarefa.result()
+                        yield {"evento": "ferramenta", "nome": tc.function.name, "status": "concluida"}
+
+                chamada = {
+                    "role": "assistant",
+                    "content": ''.join(texto) or None,
+                    "tool_calls": [tc.model_dump() for tc in tool_calls],
+                }
+                respostas_funcoes = [mensagem_ferramenta(tc, resultados[tc.id]) for tc in tool_calls]
+                messages.append(chamada)
+                messages.extend(respostas_funcoes)
+                turno += [chamada, *respostas_funcoes]
+
+                texto = []
+                async for tipo, valor in self._stream_completion(messages, com_tools=False):
+                    if tipo == 'token':
+                        if ttft_ms is None:
+                            ttft_ms = _ms_desde(inicio)
+                        texto.append(valor)
+                        yield {"evento": "token", "texto": valor}
+
+            turno.append({"role": "assistant", "content": ''.join(texto)})
+            await self._lembrar(sessao, turno)
+
+        except Exception as e:
+            if emitiu:
+                logger.error(f"Erro no streaming da IA: {e}")
+                yield {
+                    "evento": "erro",
+                    "error": str(e),
+                    "resposta": "Desculpe, ocorreu um erro ao processar seu comando. Tente novamente."
+                }
+                return
+
+            # Nada foi enviado ainda: resposta sem streaming
+            logger.warning(f"Streaming da IA indisponível ({e}); usando resposta completa")
+            # Se _preparar já abriu a sessão (nova, se pedida), segue nela
+            resultado = await self.processar_comando(
+                mensagem, contexto, usuario,
+                nova_conversa=nova_conversa and sessao is None
+            )
+            if not resultado.get("success"):
+                yield {"evento": "erro", "error": resultado.get("error"), "resposta": resultado.get("resposta")}
+                return
+
+            yield {"evento": "token", "texto": resultado["resposta"] or ''}
+            yield {
+                "evento": "fim",
+                "funcoes_executadas": resultado["funcoes_executadas"],
+                "tokens_usados": resultado["tokens_usados"],
+                "streaming": False,
+                "metricas": resultado["metricas"],
+            }
+            return
+
+        total_ms = _ms_desde(inicio)
+        logger.info(
+            f"🤖 IA (stream): primeiro token em {ttft_ms}ms, total {total_ms}ms "
+            f"({len(funcoes)} funções, {cache['hits']} do cache)"
+        )
+
+        yield {
+            "evento": "fim",
+            "funcoes_executadas": funcoes,
+            "streaming": True,
+            "metricas": {
+                "ttft_ms": ttft_ms,
+                "total_ms": total_ms,
+                "cache": cache,
+                "memoria": info_memoria,
+            },
         }
 
-        if nome not in funcoes_disponiveis:
-            return {"erro": f"Função '{nome}' não encontrada"}
+        await self._compactar(sessao)
 
-        try:
-            # Adicionar usuário aos argumentos se necessário
-            if usuario and nome in ['registrar_contato', 'criar_agendamento', 'enviar_whatsapp']:
-                args['usuario'] = usuario
 
-            resultado = await funcoes_disponiveis[nome](**args)
-            return resultado
+PROMPT_RESUMO = """Você resume conversas entre um usuário do sistema Life Rainbow e o assistente.
+Atualize o resumo anterior com os novos trechos. Preserve pedidos pendentes de confirmação,
+IDs e nomes de clientes, filtros, datas, valores e decisões tomadas. Seja conciso, em tópicos."""
 
-        except Exception as e:
-            logger.error(f"Erro ao executar função {nome}: {e}")
-            return {"erro": str(e)}
+
+def _ms_desde(inicio: float) -> int:
+    return int((time.perf_counter() - inicio) * 1000)
+
+
+_assistente: Optional[AIAssistant] = None
 
 
-# Instância global do assistente
-ai_assistant = AIAssistant()
+def obter_assistente() -> AIAssistant:
+    """Assistente compartilhado pelas requisições (criado no primeiro uso)."""
+    global _assistente
+    if _assistente is None:
+        _assistente = AIAssistant()
+    return _assistente
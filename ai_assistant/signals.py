@@ -0,0 +1,37 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Signals do Assistente de IA
+=============================================================================
+
+1. Ao salvar/remover um model lido por funções somente leitura
+   (@ferramenta(somente_leitura=True, modelos=[...])) → Invalida o cache
+   dessas funções
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .cache_ferramentas import invalidar
+from .registro import ferramentas
+
+# 'app.Model' → funções que leem o model
+FUNCOES_POR_MODEL = defaultdict(list)
+for _ferramenta in ferramentas():
+    if _ferramenta.somente_leitura:
+        for _modelo in _ferramenta.modelos:
+            FUNCOES_POR_MODEL[_modelo].append(_ferramenta.nome)
+
+
+def invalidar_cache_funcoes(sender, **kwargs):
+    """Descarta os resultados guardados das funções que leem o model alterado."""
+    # Só após o commit: antes dele, uma consulta concorrente ainda lê os dados
+    # antigos e os guardaria sob a versão nova por todo o TTL
+    nomes = FUNCOES_POR_MODEL[sender._meta.label]
+    transaction.on_commit(lambda: invalidar(*nomes))
+
+
+for _modelo in FUNCOES_POR_MODEL:
+    post_save.connect(invalidar_cache_funcoes, sender=_modelo, dispatch_uid=f'ai_cache_save:{_modelo}')
+    post_delete.connect(invalidar_cache_funcoes, sender=_modelo, dispatch_uid=f'ai_cache_delete:{_modelo}')
@@ -0,0 +1,174 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Testes do Assistente de IA
+Execução das funções (executor.py) contra um servidor local que imita a OpenAI
+=============================================================================
+
+    python manage.py test ai_assistant
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import SimpleTestCase, override_settings
+
+from . import registro
+from .services import AIAssistant
+
+
+class _StubOpenAI(BaseHTTPRequestHandler):
+    """
+    Chat Completions mínimo: se a última mensagem é do usuário, responde com
+    as `chamadas` configuradas; depois dos resultados, responde com texto.
+    """
+
+    chamadas = []
+    requisicoes = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        corpo = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        _StubOpenAI.requisicoes.append(corpo)
+
+        if corpo['messages'][-1]['role'] == 'user' and self.chamadas:
+            mensagem = {
+                'role': 'assistant',
+                'content': None,
+                'tool_calls': [
+                    {
+                        'id': f'call_{i}',
+                        'type': 'function',
+                        'function': {'name': nome, 'arguments': argumentos},
+                    }
+                    for i, (nome, argumentos) in enumerate(self.chamadas)
+                ],
+            }
+        else:
+            mensagem = {'role': 'assistant', 'content': 'ok'}
+
+        saida = json.dumps({
+            'id': 'chatcmpl-teste',
+            'object': 'chat.completion',
+            'created': 0,
+            'model': 'stub',
+            'choices': [{'index': 0, 'message': mensagem, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2},
+        }).encode('utf-8')
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(saida)))
+        self.end_headers()
+        self.wfile.write(saida)
+
+
+def _dormir(segundos: float, marca: str = '') -> dict:
+    time.sleep(segundos)
+    return {'dormiu': segundos, 'marca': marca}
+
+
+def _gravar_lento(segundos: float) -> dict:
+    time.sleep(segundos)
+    return {'gravado': True}
+
+
+FERRAMENTAS_TESTE = [
+    registro.Ferramenta(_dormir, 'Teste: espera e devolve a marca', somente_leitura=True, timeout=1),
+    registro.Ferramenta(_gravar_lento, 'Teste: ação que altera dados', timeout=1),
+]
+
+
+@override_settings(
+    OPENAI_API_KEY='teste',
+    AI_CACHE_FERRAMENTAS=False,
+    AI_FERRAMENTAS_WORKERS=8,
+)
+class ExecucaoFerramentasTest(SimpleTestCase):
+    """Chamadas de função da resposta do modelo: paralelismo, ordem e erros."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.servidor = ThreadingHTTPServer(('127.0.0.1', 0), _StubOpenAI)
+        threading.Thread(target=cls.servidor.serve_forever, daemon=True).start()
+        cls.base_url = f'http://127.0.0.1:{cls.servidor.server_port}/v1'
+
+        for ferramenta in FERRAMENTAS_TESTE:
+            registro.REGISTRO[ferramenta.nome] = ferramenta
+
+    @classmethod
+    def tearDownClass(cls):
+        for ferramenta in FERRAMENTAS_TESTE:
+            registro.REGISTRO.pop(ferramenta.nome, None)
+        cls.servidor.shutdown()
+        cls.servidor.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        _StubOpenAI.requisicoes = []
+
+    async def _executar(self, chamadas):
+        """Resposta do assistente e as mensagens 'tool' enviadas na 2ª chamada."""
+        _StubOpenAI.chamadas = [(nome, json.dumps(args) if isinstance(args, dict) else args)
+                                for nome, args in chamadas]
+        with self.settings(OPENAI_BASE_URL=self.base_url):
+            resposta = await AIAssistant().processar_comando('teste')
+
+        self.assertTrue(resposta['success'], resposta)
+        self.assertEqual(len(_StubOpenAI.requisicoes), 2)
+        ferramentas = [m for m in _StubOpenAI.requisicoes[1]['messages'] if m['role'] == 'tool']
+        return resposta, ferramentas
+
+    async def test_chamadas_em_paralelo(self):
+        inicio = time.perf_counter()
+        await self._executar([('_dormir', {'segundos': 0.5})] * 4)
+        self.assertLess(time.perf_counter() - inicio, 1.5)
+
+    async def test_resultados_na_ordem_das_chamadas(self):
+        _, ferramentas = await self._executar([
+            ('_dormir', {'segundos': 0.6, 'marca': 'primeira'}),
+            ('_dormir', {'segundos': 0.1, 'marca': 'segunda'}),
+            ('_dormir', {'segundos': 0.3, 'marca': 'terceira'}),
+        ])
+        self.assertEqual([m['tool_call_id'] for m in ferramentas], ['call_0', 'call_1', 'call_2'])
+        self.assertEqual(
+            [json.loads(m['content'])['marca'] for m in ferramentas],
+            ['primeira', 'segunda', 'terceira']
+        )
+
+    async def test_timeout_de_consulta_vira_erro(self):
+        inicio = time.perf_counter()
+        _, ferramentas = await self._executar([
+            ('_dormir', {'segundos': 3}),
+            ('_dormir', {'segundos': 0.1, 'marca': 'rapida'}),
+        ])
+        self.assertLess(time.perf_counter() - inicio, 2.5)
+        self.assertIn('erro', json.loads(ferramentas[0]['content']))
+        self.assertEqual(json.loads(ferramentas[1]['content'])['marca'], 'rapida')
+
+    async def test_timeout_de_acao_pede_para_nao_repetir(self):
+        _, ferramentas = await self._executar([('_gravar_lento', {'segundos': 2})])
+        resultado = json.loads(ferramentas[0]['content'])
+        self.assertEqual(resultado['situacao'], 'pendente')
+        self.assertNotIn('erro', resultado)
+
+    async def test_funcao_desconhecida(self):
+        resposta, ferramentas = await self._executar([
+            ('nao_existe', {}),
+            ('_dormir', {'segundos': 0, 'marca': 'valida'}),
+        ])
+        self.assertIn('não encontrada', json.loads(ferramentas[0]['content'])['erro'])
+        self.assertEqual(json.loads(ferramentas[1]['content'])['marca'], 'valida')
+        self.assertEqual(resposta['resposta'], 'ok')
+
+    async def test_argumentos_json_invalidos(self):
+        _, ferramentas = await self._executar([
+            ('_dormir', '{"segundos": '),
+            ('_dormir', {'segundos': 0, 'marca': 'valida'}),
+        ])
+        self.assertIn('Argumentos inválidos', json.loads(ferramentas[0]['content'])['erro'])
+        self.assertEqual(json.loads(ferramentas[1]['content'])['marca'], 'valida')
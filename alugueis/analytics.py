@@ -0,0 +1,307 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Indicadores da Carteira de Aluguéis
+MRR, churn, renovações, inadimplência e retenção por coorte
+=============================================================================
+
+Os dados são carregados do banco como colunas (values_list) e os
+indicadores são calculados com operações vetorizadas de pandas/NumPy.
+Meses fechados ficam em cache: salvar/excluir contrato ou parcela troca a
+versão do cache (signals.py) e o TTL limita alterações feitas com update().
+"""
+
+import logging
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIXO = 'alugueis:indicadores'
+CACHE_TTL = 6 * 60 * 60
+MESES_SERIE = 12
+MESES_COORTES = 12
+
+# Contrato encerrado sem data_fim_real usa a data da última alteração
+STATUS_FINALIZADOS = ['encerrado', 'cancelado', 'convertido']
+# Conversão em venda não é perda de cliente
+STATUS_CHURN = ['encerrado', 'cancelado']
+
+# Índice usado para contratos sem fim (ainda ativos/suspensos)
+SEM_FIM = 10 ** 6
+
+
+def _indice_mes(ano: int, mes: int) -> int:
+    return ano * 12 + mes - 1
+
+
+def _rotulo_mes(indice: int) -> str:
+    return f"{indice // 12}-{indice % 12 + 1:02d}"
+
+
+def _indices(serie: pd.Series) -> pd.Series:
+    """Converte datas em índice de mês (ano * 12 + mês - 1)."""
+    datas = pd.to_datetime(serie)
+    return datas.dt.year * 12 + datas.dt.month - 1
+
+
+def _contar(indices, inicio: int, n: int, pesos=None) -> np.ndarray:
+    """Soma por mês (bincount) dos eventos dentro da janela [inicio, inicio + n)."""
+    indices = np.asarray(indices, dtype=np.int64) - inicio
+    dentro = (indices >= 0) & (indices < n)
+    if pesos is not None:
+        pesos = np.asarray(pesos, dtype=float)[dentro]
+    return np.bincount(indices[dentro], weights=pesos, minlength=n)[:n]
+
+
+def _carregar_contratos(fim_periodo: date) -> pd.DataFrame:
+    from alugueis.models import ContratoAluguel
+
+    registros = ContratoAluguel.objects.filter(
+        data_inicio__lte=fim_periodo
+    ).values_list('id', 'data_inicio', 'data_fim_real', 'updated_at', 'status', 'valor_mensal')
+
+    df = pd.DataFrame.from_records(
+        list(registros),
+        columns=['id', 'data_inicio', 'data_fim_real', 'updated_at', 'status', 'valor_mensal']
+    )
+    if df.empty:
+        return df
+
+    df['valor_mensal'] = df['valor_mensal'].astype(float)
+    df['inicio'] = _indices(df['data_inicio']).astype(np.int64)
+
+    alteracao = pd.to_datetime(df['updated_at'], utc=True).dt.tz_convert(settings.TIME_ZONE)
+    fim = _indices(df['data_fim_real']).fillna(
+        alteracao.dt.year * 12 + alteracao.dt.month - 1
+    )
+    finalizado = df['status'].isin(STATUS_FINALIZADOS)
+    df['fim'] = np.where(finalizado, np.maximum(fim, df['inicio']), SEM_FIM).astype(np.int64)
+    df['churn'] = df['status'].isin(STATUS_CHURN)
+    return df
+
+
+def _carregar_parcelas(inicio_periodo: date, fim_periodo: date) -> pd.DataFrame:
+    """Parcelas já vencidas no período (as que vencem de hoje em diante ainda não contam)."""
+    from alugueis.models import ParcelaAluguel
+
+    registros = ParcelaAluguel.objects.filter(
+        data_vencimento__gte=inicio_periodo,
+        data_vencimento__lte=fim_periodo,
+        data_vencimento__lt=timezone.localdate(),
+    ).exclude(
+        status=ParcelaAluguel.STATUS_CANCELADA
+    ).values_list('data_vencimento', 'data_pagamento', 'status', 'valor')
+
+    df = pd.DataFrame.from_records(
+        list(registros),
+        columns=['data_vencimento', 'data_pagamento', 'status', 'valor']
+    )
+    if df.empty:
+        return df
+
+    vencimento = pd.to_datetime(df['data_vencimento'])
+    pagamento = pd.to_datetime(df['data_pagamento'])
+    df['valor'] = df['valor'].astype(float)
+    df['mes'] = _indices(df['data_vencimento']).astype(np.int64)
+    df['nao_paga_no_prazo'] = pagamento.isna() | (pagamento > vencimento)
+    df['em_aberto'] = df['status'].isin([ParcelaAluguel.STATUS_PENDENTE, ParcelaAluguel.STATUS_ATRASADA])
+    return df
+
+
+def _carregar_renovacoes(inicio_periodo: date, fim_periodo: date) -> pd.Series:
+    from alugueis.models import HistoricoAluguel
+
+    datas = HistoricoAluguel.objects.filter(
+        evento=HistoricoAluguel.EVENTO_RENOVACAO,
+        created_at__date__gte=inicio_periodo,
+        created_at__date__lte=fim_periodo,
+    ).values_list('created_at', flat=True)
+
+    serie = pd.to_datetime(pd.Series(list(datas), dtype='object'), utc=True)
+    if serie.empty:
+        return pd.Series([], dtype=np.int64)
+    serie = serie.dt.tz_convert(settings.TIME_ZONE)
+    return (serie.dt.year * 12 + serie.dt.month - 1).astype(np.int64)
+
+
+def _calcular_coortes(contratos: pd.DataFrame, alvo: int) -> list:
+    """Curvas de retenção por mês de início (idade 0..N meses)."""
+    coortes = contratos[contratos['inicio'] > alvo - MESES_COORTES]
+    if coortes.empty:
+        return []
+
+    idades = np.arange(MESES_COORTES)
+    vida = (coortes['fim'] - coortes['inicio']).to_numpy()
+    ativos = pd.DataFrame(vida[:, None] >= idades[None, :], index=coortes['inicio'].to_numpy())
+
+    agrupado = ativos.groupby(level=0)
+    retencao = agrupado.mean()
+    tamanhos = agrupado.size()
+
+    # Idades que ainda não foram observadas até o mês analisado
+    futuras = retencao.index.to_numpy()[:, None] + idades[None, :] > alvo
+    retencao = retencao.mask(futuras)
+
+    return [
+        {
+            'coorte': _rotulo_mes(int(inicio)),
+            'contratos': int(tamanhos[inicio]),
+            'retencao': [round(float(v) * 100, 1) for v in linha.dropna()],
+        }
+        for inicio, linha in retencao.iterrows()
+    ]
+
+
+def _calcular(ano: int, mes: int) -> dict:
+    alvo = _indice_mes(ano, mes)
+    inicio_serie = alvo - MESES_SERIE + 1
+    fim_periodo = (pd.Timestamp(year=ano, month=mes, day=1) + pd.offsets.MonthEnd(0)).date()
+    inicio_periodo = date(inicio_serie // 12, inicio_serie % 12 + 1, 1)
+
+    contratos = _carregar_contratos(fim_periodo)
+    parcelas = _carregar_parcelas(inicio_periodo, fim_periodo)
+    renovacoes_mes = _carregar_renovacoes(inicio_periodo, fim_periodo)
+
+    n = MESES_SERIE
+    if contratos.empty:
+        zeros = np.zeros(n)
+        mrr = ativos = novos = churn = mrr_perdido = convertidos = zeros
+    else:
+        # Ativo no mês m: inicio <= m <= fim (acumulado de entradas - saídas)
+        antes = contratos['inicio'] < inicio_serie
+        saiu_antes = contratos['fim'] < inicio_serie
+        base = (antes & ~saiu_antes)
+        inicio_janela = np.maximum(contratos['inicio'], inicio_serie)
+
+        entradas = _contar(inicio_janela[~saiu_antes], inicio_serie, n)
+        saidas = _contar(contratos['fim'][~saiu_antes] + 1, inicio_serie, n)
+        ativos = np.cumsum(entradas - saidas)
+
+        mrr_entradas = _contar(inicio_janela[~saiu_antes], inicio_serie, n, contratos['valor_mensal'][~saiu_antes])
+        mrr_saidas = _contar(contratos['fim'][~saiu_antes] + 1, inicio_serie, n, contratos['valor_mensal'][~saiu_antes])
+        mrr = np.cumsum(mrr_entradas - mrr_saidas)
+
+        novos = entradas.copy()
+        novos[0] -= int(base.sum())
+
+        encerrados = contratos[contratos['churn']]
+        churn = _contar(encerrados['fim'], inicio_serie, n)
+        mrr_perdido = _contar(encerrados['fim'], inicio_serie, n, encerrados['valor_mensal'])
+        convertidos = _contar(contratos.loc[contratos['status'] == 'convertido', 'fim'], inicio_serie, n)
+
+    ativos_inicio = ativos - novos
+    taxa_churn = np.divide(churn * 100, ativos_inicio, out=np.zeros(n), where=ativos_inicio > 0)
+    renovacoes = _contar(renovacoes_mes, inicio_serie, n)
+
+    if parcelas.empty:
+        vencidas = inadimplentes = valor_aberto = np.zeros(n)
+    else:
+        vencidas = _contar(parcelas['mes'], inicio_serie, n)
+        inadimplentes = _contar(parcelas.loc[parcelas['nao_paga_no_prazo'], 'mes'], inicio_serie, n)
+        valor_aberto = _contar(
+            parcelas.loc[parcelas['em_aberto'], 'mes'], inicio_serie, n,
+            parcelas.loc[parcelas['em_aberto'], 'valor']
+        )
+    taxa_inadimplencia = np.divide(inadimplentes * 100, vencidas, out=np.zeros(n), where=vencidas > 0)
+
+    serie = [
+        {
+            'mes': _rotulo_mes(inicio_serie + i),
+            'mrr': round(float(mrr[i]), 2),
+            'contratos_ativos': int(ativos[i]),
+            'novos': int(novos[i]),
+            'churn': int(churn[i]),
+            'taxa_churn': round(float(taxa_churn[i]), 2),
+            'mrr_perdido': round(float(mrr_perdido[i]), 2),
+            'convertidos_em_venda': int(convertidos[i]),
+            'renovacoes': int(renovacoes[i]),
+            'parcelas_vencidas': int(vencidas[i]),
+            'parcelas_nao_pagas_no_prazo': int(inadimplentes[i]),
+            'taxa_inadimplencia': round(float(taxa_inadimplencia[i]), 2),
+            'valor_em_aberto': round(float(valor_aberto[i]), 2),
+        }
+        for i in range(n)
+    ]
+
+    atual, anterior = serie[-1], serie[-2]
+    crescimento = (
+        round((atual['mrr'] - anterior['mrr']) / anterior['mrr'] * 100, 2)
+        if anterior['mrr'] > 0 else 0
+    )
+
+    return {
+        'periodo': f"{mes:02d}/{ano}",
+        'mrr': atual['mrr'],
+        'mrr_mes_anterior': anterior['mrr'],
+        'crescimento_mrr': crescimento,
+        'contratos_ativos': atual['contratos_ativos'],
+        'novos_contratos': atual['novos'],
+        'churn': {
+            'quantidade': atual['churn'],
+            'taxa': atual['taxa_churn'],
+            'mrr_perdido': atual['mrr_perdido'],
+        },
+        'convertidos_em_venda': atual['convertidos_em_venda'],
+        'renovacoes': atual['renovacoes'],
+        'inadimplencia': {
+            'parcelas_vencidas': atual['parcelas_vencidas'],
+            'parcelas_nao_pagas_no_prazo': atual['parcelas_nao_pagas_no_prazo'],
+            'taxa': atual['taxa_inadimplencia'],
+            'valor_em_aberto': atual['valor_em_aberto'],
+        },
+        'serie': serie,
+        'coortes': [] if contratos.empty else _calcular_coortes(contratos, alvo),
+    }
+
+
+def calcular_indicadores_carteira(ano: int = None, mes: int = None, forcar: bool = False) -> dict:
+    """
+    Indicadores da carteira de aluguéis para um mês.
+
+    Meses já fechados ficam em cache (até CACHE_TTL ou até um contrato ou
+    parcela ser alterado); o mês corrente é sempre recalculado.
+
+    Args:
+        ano: Ano de referência (padrão: mês corrente)
+        mes: Mês de referência (1-12)
+        forcar: Ignora o cache e recalcula
+
+    Returns:
+        dict: MRR, churn, renovações, inadimplência, série de 12 meses e
+        curvas de retenção por coorte
+    """
+    hoje = timezone.localdate()
+    ano = ano or hoje.year
+    mes = mes or hoje.month
+
+    if not 1 <= mes <= 12:
+        raise ValueError("Mês deve estar entre 1 e 12")
+
+    fechado = _indice_mes(ano, mes) < _indice_mes(hoje.year, hoje.month)
+    versao = cache.get_or_set(f"{CACHE_PREFIXO}:versao", 0, timeout=None)
+    chave = f"{CACHE_PREFIXO}:{versao}:{ano}-{mes:02d}"
+
+    if fechado and not forcar:
+        resultado = cache.get(chave)
+        if resultado is not None:
+            return resultado
+
+    resultado = _calcular(ano, mes)
+    resultado['mes_fechado'] = fechado
+
+    if fechado:
+        cache.set(chave, resultado, CACHE_TTL)
+        logger.info(f"📊 Indicadores de aluguel {mes:02d}/{ano} calculados e armazenados em cache")
+
+    return resultado
+
+
+def invalidar_indicadores() -> None:
+    """Descarta os indicadores de meses fechados guardados em cache."""
+    cache.set(f"{CACHE_PREFIXO}:versao", time.time_ns(), timeout=None)
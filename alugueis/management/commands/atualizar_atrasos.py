@@ -0,0 +1,79 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Varredura Diária de Atrasos
+Marca parcelas de aluguel vencidas, calcula juros/multa e sincroniza
+as Contas a Receber vinculadas (UPDATEs em lote, uma transação)
+=============================================================================
+
+Agendar diariamente (cron, logo após a meia-noite):
+    python manage.py atualizar_atrasos
+"""
+
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from alugueis.services import atualizar_parcelas_atrasadas
+
+
+class Command(BaseCommand):
+    help = 'Atualiza status, juros e multa das parcelas de aluguel em atraso'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--data',
+            help='Data de referência (YYYY-MM-DD). Padrão: hoje'
+        )
+        parser.add_argument(
+            '--taxa-juros-dia',
+            type=float,
+            default=None,
+            help='Juros ao dia em %% (padrão: 0.033)'
+        )
+        parser.add_argument(
+            '--taxa-multa',
+            type=float,
+            default=None,
+            help='Multa em %% (padrão: 2.0)'
+        )
+
+    def handle(self, *args, **options):
+        data_referencia = None
+        if options['data']:
+            try:
+                data_referencia = datetime.strptime(options['data'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('Data inválida. Use o formato YYYY-MM-DD')
+
+        resultado = atualizar_parcelas_atrasadas(
+            data_referencia=data_referencia,
+            taxa_juros_dia=options['taxa_juros_dia'],
+            taxa_multa=options['taxa_multa'],
+        )
+        tempos = resultado['tempos']
+
+        self.stdout.write(f"Data de referência: {resultado['data_referencia']}")
+        self.stdout.write(
+            f"  Parcelas marcadas como atrasadas: {resultado['parcelas_marcadas_atrasadas']} "
+            f"({tempos['status_ms']} ms)"
+        )
+        self.stdout.write(
+            f"  Parcelas com juros/multa atualizados: {resultado['parcelas_encargos_atualizados']} "
+            f"({tempos['encargos_ms']} ms)"
+        )
+        self.stdout.write(
+            f"  Contas a receber sincronizadas: {resultado['contas_receber_sincronizadas']} "
+            f"({tempos['contas_receber_ms']} ms)"
+        )
+        self.stdout.write(
+            f"  Históricos de atraso registrados: {resultado['historicos_criados']} "
+            f"({tempos['historico_ms']} ms)"
+        )
+        self.stdout.write(
+            f"  Contratos com próxima parcela atualizada: {resultado['proximas_parcelas_atualizadas']} "
+            f"({tempos['proximas_parcelas_ms']} ms)"
+        )
+        self.stdout.write('')
+        self.stdout.write(
+            self.style.SUCCESS(f"✅ Varredura concluída em {tempos['total_ms']} ms")
+        )
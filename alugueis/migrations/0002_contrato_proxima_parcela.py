@@ -0,0 +1,47 @@
+# Generated by Django 4.2.10 on 2026-10-19 01:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+
+def preencher_proxima_parcela(apps, schema_editor):
+    ContratoAluguel = apps.get_model('alugueis', 'ContratoAluguel')
+    ParcelaAluguel = apps.get_model('alugueis', 'ParcelaAluguel')
+
+    proxima = ParcelaAluguel.objects.filter(
+        contrato_id=OuterRef('pk'),
+        status='pendente',
+        data_vencimento__gte=timezone.localdate(),
+    ).order_by('data_vencimento', 'numero')
+
+    ContratoAluguel.objects.update(
+        proxima_parcela_id=Subquery(proxima.values('id')[:1]),
+        proxima_data_vencimento=Subquery(proxima.values('data_vencimento')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alugueis', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contratoaluguel',
+            name='proxima_data_vencimento',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Próximo Vencimento'),
+        ),
+        migrations.AddField(
+            model_name='contratoaluguel',
+            name='proxima_parcela',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='alugueis.parcelaaluguel', verbose_name='Próxima Parcela'),
+        ),
+        migrations.AddIndex(
+            model_name='contratoaluguel',
+            index=models.Index(fields=['status', 'proxima_data_vencimento'], name='alugueis_co_status_fcc2b7_idx'),
+        ),
+        migrations.RunPython(preencher_proxima_parcela, migrations.RunPython.noop),
+    ]
@@ -10,6 +10,7 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import timedelta
+from decimal import Decimal
 from dateutil.relativedelta import relativedelta
 
 
@@ -19,6 +20,9 @@ class ContratoAluguel(models.Model):
     Substitui estrutura de campos aluguel_um a aluguel_doze.
     """
 
+    # Numeração: A{ANO}{000000} (ver numeracao.services)
+    PREFIXO_NUMERO = 'A'
+
     STATUS_ATIVO = 'ativo'
     STATUS_ENCERRADO = 'encerrado'
     STATUS_SUSPENSO = 'suspenso'
@@ -192,6 +196,25 @@ class ContratoAluguel(models.Model):
         blank=True,
         verbose_name='ID Sistema Legado'
     )
+    # Próxima parcela pendente (desnormalizado)
+    # Mantido pelos signals de ParcelaAluguel e pela varredura diária
+    # (python manage.py atualizar_atrasos)
+    proxima_parcela = models.ForeignKey(
+        'ParcelaAluguel',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+',
+        verbose_name='Próxima Parcela'
+    )
+    proxima_data_vencimento = models.DateField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Próximo Vencimento'
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -199,6 +222,9 @@ class ContratoAluguel(models.Model):
         verbose_name = 'Contrato de Aluguel'
         verbose_name_plural = 'Contratos de Aluguel'
         ordering = ['-data_inicio']
+        indexes = [
+            models.Index(fields=['status', 'proxima_data_vencimento']),
+        ]
 
     def __str__(self):
         return f"Contrato #{self.numero} - {self.cliente.nome}"
@@ -206,9 +232,8 @@ class ContratoAluguel(models.Model):
     def save(self, *args, **kwargs):
         # Gerar número do contrato automaticamente
         if not self.numero:
-            ultimo = ContratoAluguel.objects.order_by('-id').first()
-            novo_id = (ultimo.id + 1) if ultimo else 1
-            self.numero = f"A{timezone.now().year}{novo_id:06d}"
+            from numeracao.services import proximo_numero
+            self.numero = proximo_numero(self.PREFIXO_NUMERO, ContratoAluguel)
 
         # Calcular data fim prevista se não informada
         if not self.data_fim_prevista and self.data_inicio and self.duracao_meses:
@@ -259,12 +284,36 @@ class ContratoAluguel(models.Model):
             status=ParcelaAluguel.STATUS_PAGA
         ).aggregate(total=Sum('valor_pago'))['total'] or 0
 
+    def atualizar_proxima_parcela(self):
+        """
+        Recalcula proxima_parcela/proxima_data_vencimento.
+
+        Usa update() para não disparar os signals de post_save do contrato.
+        """
+        proxima = self.parcelas.filter(
+            status=ParcelaAluguel.STATUS_PENDENTE,
+            data_vencimento__gte=timezone.localdate()
+        ).order_by('data_vencimento', 'numero').only('id', 'data_vencimento').first()
+
+        self.proxima_parcela_id = proxima.id if proxima else None
+        self.proxima_data_vencimento = proxima.data_vencimento if proxima else None
+
+        ContratoAluguel.objects.filter(pk=self.pk).update(
+            proxima_parcela_id=self.proxima_parcela_id,
+            proxima_data_vencimento=self.proxima_data_vencimento,
+        )
+
     @property
     def proxima_parcela_vencer(self):
         """Retorna a próxima parcela a vencer"""
+        hoje = timezone.localdate()
+        if self.proxima_data_vencimento is None or self.proxima_data_vencimento >= hoje:
+            return self.proxima_parcela
+
+        # Valor desatualizado (varredura diária ainda não rodou)
         return self.parcelas.filter(
             status=ParcelaAluguel.STATUS_PENDENTE,
-            data_vencimento__gte=timezone.now().date()
+            data_vencimento__gte=hoje
         ).order_by('data_vencimento').first()
 
 
@@ -285,6 +334,10 @@ class ParcelaAluguel(models.Model):
         (STATUS_CANCELADA, 'Cancelada'),
     ]
 
+    # Encargos por atraso: 0.033% ao dia (1% ao mês) + 2% multa
+    TAXA_JUROS_DIA_PADRAO = 0.033
+    TAXA_MULTA_PADRAO = 2.0
+
     contrato = models.ForeignKey(
         ContratoAluguel,
         on_delete=models.CASCADE,
@@ -387,14 +440,19 @@ class ParcelaAluguel(models.Model):
                 return (timezone.now().date() - self.data_vencimento).days
         return 0
 
-    def calcular_valor_com_multa(self, taxa_juros_dia=0.033, taxa_multa=2.0):
+    def calcular_valor_com_multa(self, taxa_juros_dia=TAXA_JUROS_DIA_PADRAO, taxa_multa=TAXA_MULTA_PADRAO):
         """
         Calcula valor com juros e multa por atraso.
         Taxa padrão: 0.033% ao dia (1% ao mês) + 2% multa
+
+        Para a carteira inteira use alugueis.services.atualizar_parcelas_atrasadas,
+        que aplica o mesmo cálculo em lote no banco.
         """
         if self.dias_atraso > 0:
-            self.juros = self.valor * (taxa_juros_dia / 100) * self.dias_atraso
-            self.multa = self.valor * (taxa_multa / 100)
+            taxa_juros_dia = Decimal(str(taxa_juros_dia))
+            taxa_multa = Decimal(str(taxa_multa))
+            self.juros = round(self.valor * (taxa_juros_dia / 100) * self.dias_atraso, 2)
+            self.multa = round(self.valor * (taxa_multa / 100), 2)
             return self.valor + self.juros + self.multa
         return self.valor
 
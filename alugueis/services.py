@@ -0,0 +1,329 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Serviços do Módulo de Aluguéis
+Rotinas de cobrança e agregações executadas diretamente no banco
+=============================================================================
+"""
+
+import logging
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import (
+    CharField, Count, DateField, DecimalField, Exists, ExpressionWrapper, F,
+    Func, IntegerField, OuterRef, Q, Subquery, Sum, Value,
+)
+from django.db.models.functions import Cast, Coalesce, Concat, Round
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class DiasEntre(Func):
+    """
+    Dias corridos entre duas datas (referencia - data), calculados no banco.
+
+    Implementação por backend para permitir UPDATEs set-based sem trazer
+    as linhas para o Python.
+    """
+
+    output_field = IntegerField()
+
+    def __init__(self, referencia, data, **extra):
+        if isinstance(referencia, date):
+            referencia = Value(referencia, output_field=DateField())
+        super().__init__(referencia, data, **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        # MySQL/MariaDB
+        return super().as_sql(
+            compiler, connection,
+            template='DATEDIFF(%(expressions)s)',
+            **extra_context
+        )
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        # date - date retorna integer (dias) no PostgreSQL
+        return super().as_sql(
+            compiler, connection,
+            template='(%(expressions)s)',
+            arg_joiner=' - ',
+            **extra_context
+        )
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection,
+            template='CAST(julianday(%(expressions)s) AS INTEGER)',
+            arg_joiner=') - julianday(',
+            **extra_context
+        )
+
+
+def documento_conta_receber_aluguel():
+    """
+    Expressão do documento usado para vincular ParcelaAluguel ↔ ContaReceber.
+    Mesmo formato gerado em criar_conta_receber_aluguel: ALUGUEL-{contrato}-{parcela}
+    """
+    return Concat(
+        Value('ALUGUEL-'),
+        F('contrato__numero'),
+        Value('-'),
+        Cast('numero', output_field=CharField()),
+        output_field=CharField()
+    )
+
+
+def recalcular_proximas_parcelas(contratos=None, data_referencia: date = None) -> int:
+    """
+    Recalcula proxima_parcela/proxima_data_vencimento em um único UPDATE.
+
+    Args:
+        contratos: QuerySet de ContratoAluguel (padrão: todos)
+        data_referencia: Data considerada como "hoje" (padrão: data local atual)
+
+    Returns:
+        int: Quantidade de contratos atualizados
+    """
+    from alugueis.models import ContratoAluguel, ParcelaAluguel
+
+    hoje = data_referencia or timezone.localdate()
+    if contratos is None:
+        contratos = ContratoAluguel.objects.all()
+
+    proxima = ParcelaAluguel.objects.filter(
+        contrato_id=OuterRef('pk'),
+        status=ParcelaAluguel.STATUS_PENDENTE,
+        data_vencimento__gte=hoje,
+    ).order_by('data_vencimento', 'numero')
+
+    return contratos.update(
+        proxima_parcela_id=Subquery(proxima.values('id')[:1]),
+        proxima_data_vencimento=Subquery(proxima.values('data_vencimento')[:1]),
+    )
+
+
+def atualizar_parcelas_atrasadas(
+    data_referencia: date = None,
+    taxa_juros_dia: Decimal = None,
+    taxa_multa: Decimal = None,
+) -> dict:
+    """
+    Varredura diária de inadimplência dos aluguéis.
+
+    Em uma única transação e com UPDATEs set-based:
+    1. Registra HistoricoAluguel (atraso) para parcelas que acabaram de vencer
+    2. Marca parcelas pendentes vencidas como 'atrasada'
+    3. Recalcula juros/multa de todas as parcelas em atraso
+    4. Sincroniza as ContaReceber vinculadas (status, juros e multa)
+    5. Avança proxima_parcela dos contratos cujo vencimento já passou
+
+    Args:
+        data_referencia: Data considerada como "hoje" (padrão: data local atual)
+        taxa_juros_dia: Percentual de juros ao dia (padrão do ParcelaAluguel)
+        taxa_multa: Percentual de multa (padrão do ParcelaAluguel)
+
+    Returns:
+        dict: Contagens e tempos (ms) de cada etapa
+    """
+    from alugueis.models import ContratoAluguel, ParcelaAluguel, HistoricoAluguel
+    from financeiro.models import ContaReceber
+
+    hoje = data_referencia or timezone.localdate()
+    taxa_juros_dia = Decimal(str(
+        taxa_juros_dia if taxa_juros_dia is not None else ParcelaAluguel.TAXA_JUROS_DIA_PADRAO
+    ))
+    taxa_multa = Decimal(str(
+        taxa_multa if taxa_multa is not None else ParcelaAluguel.TAXA_MULTA_PADRAO
+    ))
+    agora = timezone.now()
+    tempos = {}
+    inicio_total = time.perf_counter()
+
+    em_atraso = ParcelaAluguel.objects.filter(
+        status__in=[ParcelaAluguel.STATUS_PENDENTE, ParcelaAluguel.STATUS_ATRASADA],
+        data_vencimento__lt=hoje,
+    ).exclude(
+        contrato__status=ContratoAluguel.STATUS_CANCELADO
+    )
+
+    with transaction.atomic():
+        # 1. Histórico apenas para as parcelas que mudam de status hoje
+        inicio = time.perf_counter()
+        novas = list(
+            em_atraso.filter(status=ParcelaAluguel.STATUS_PENDENTE).values_list(
+                'id', 'contrato_id', 'numero', 'data_vencimento'
+            )
+        )
+        HistoricoAluguel.objects.bulk_create(
+            [
+                HistoricoAluguel(
+                    contrato_id=contrato_id,
+                    parcela_id=parcela_id,
+                    evento=HistoricoAluguel.EVENTO_ATRASO,
+                    descricao=f"Parcela {numero} vencida em {vencimento.strftime('%d/%m/%Y')} sem pagamento.",
+                    automatico=True,
+                )
+                for parcela_id, contrato_id, numero, vencimento in novas
+            ],
+            batch_size=500
+        )
+        tempos['historico_ms'] = round((time.perf_counter() - inicio) * 1000, 1)
+
+        # 2. pendente → atrasada
+        inicio = time.perf_counter()
+        marcadas = em_atraso.filter(status=ParcelaAluguel.STATUS_PENDENTE).update(
+            status=ParcelaAluguel.STATUS_ATRASADA,
+            updated_at=agora,
+        )
+        tempos['status_ms'] = round((time.perf_counter() - inicio) * 1000, 1)
+
+        # 3. Juros (por dia corrido) e multa, calculados no banco
+        inicio = time.perf_counter()
+        dias = DiasEntre(hoje, F('data_vencimento'))
+        recalculadas = ParcelaAluguel.objects.filter(
+            status=ParcelaAluguel.STATUS_ATRASADA,
+            data_vencimento__lt=hoje,
+        ).exclude(
+            contrato__status=ContratoAluguel.STATUS_CANCELADO
+        ).update(
+            juros=Round(
+                ExpressionWrapper(
+                    F('valor') * Value(taxa_juros_dia / 100) * dias,
+                    output_field=DecimalField(max_digits=10, decimal_places=2)
+                ),
+                2
+            ),
+            multa=Round(
+                ExpressionWrapper(
+                    F('valor') * Value(taxa_multa / 100),
+                    output_field=DecimalField(max_digits=10, decimal_places=2)
+                ),
+                2
+            ),
+            updated_at=agora,
+        )
+        tempos['encargos_ms'] = round((time.perf_counter() - inicio) * 1000, 1)
+
+        # 4. ContaReceber vinculadas (mesmo documento gerado pelo signal)
+        inicio = time.perf_counter()
+        parcela_da_conta = ParcelaAluguel.objects.annotate(
+            documento_conta=documento_conta_receber_aluguel()
+        ).filter(
+            contrato_id=OuterRef('contrato_aluguel_id'),
+            documento_conta=OuterRef('documento'),
+            status=ParcelaAluguel.STATUS_ATRASADA,
+        )
+        contas_sincronizadas = ContaReceber.objects.filter(
+            Exists(parcela_da_conta),
+            contrato_aluguel__isnull=False,
+            status__in=[ContaReceber.STATUS_PENDENTE, ContaReceber.STATUS_ATRASADA],
+        ).update(
+            status=ContaReceber.STATUS_ATRASADA,
+            juros=Subquery(parcela_da_conta.values('juros')[:1]),
+            multa=Subquery(parcela_da_conta.values('multa')[:1]),
+            updated_at=agora,
+        )
+        tempos['contas_receber_ms'] = round((time.perf_counter() - inicio) * 1000, 1)
+
+        # 5. Próxima parcela dos contratos com vencimento desatualizado
+        inicio = time.perf_counter()
+        proximas = recalcular_proximas_parcelas(
+            ContratoAluguel.objects.filter(proxima_data_vencimento__lt=hoje),
+            data_referencia=hoje,
+        )
+        tempos['proximas_parcelas_ms'] = round((time.perf_counter() - inicio) * 1000, 1)
+
+    tempos['total_ms'] = round((time.perf_counter() - inicio_total) * 1000, 1)
+
+    resultado = {
+        'data_referencia': hoje.isoformat(),
+        'parcelas_marcadas_atrasadas': marcadas,
+        'parcelas_encargos_atualizados': recalculadas,
+        'contas_receber_sincronizadas': contas_sincronizadas,
+        'historicos_criados': len(novas),
+        'proximas_parcelas_atualizadas': proximas,
+        'tempos': tempos,
+    }
+
+    logger.info(
+        f"✅ Varredura de atrasos ({hoje}): {marcadas} parcelas marcadas, "
+        f"{recalculadas} com encargos atualizados, "
+        f"{contas_sincronizadas} ContaReceber sincronizadas em {tempos['total_ms']} ms"
+    )
+
+    return resultado
+
+
+def anotar_resumo_financeiro(contratos):
+    """
+    Anota um queryset de ContratoAluguel com o resumo financeiro das parcelas.
+
+    Uma única agregação condicional agrupada por contrato substitui as
+    SUMs/COUNTs individuais por contrato.
+
+    Args:
+        contratos: QuerySet de ContratoAluguel (já filtrado)
+
+    Returns:
+        QuerySet anotado com total_contrato, total_pago, total_pendente,
+        total_atrasado, parcelas_pagas, parcelas_pendentes e parcelas_atrasadas
+    """
+    from alugueis.models import ParcelaAluguel
+
+    zero = Value(Decimal('0.00'), output_field=DecimalField(max_digits=12, decimal_places=2))
+    em_aberto = [ParcelaAluguel.STATUS_PENDENTE, ParcelaAluguel.STATUS_ATRASADA]
+
+    def soma(campo, filtro=None):
+        return Coalesce(
+            Sum(f'parcelas__{campo}', filter=filtro),
+            zero,
+            output_field=DecimalField(max_digits=12, decimal_places=2)
+        )
+
+    return contratos.annotate(
+        total_contrato=soma('valor'),
+        total_pago=soma('valor_pago', Q(parcelas__status=ParcelaAluguel.STATUS_PAGA)),
+        total_pendente=soma('valor', Q(parcelas__status__in=em_aberto)),
+        total_atrasado=soma('valor', Q(parcelas__status=ParcelaAluguel.STATUS_ATRASADA)),
+        parcelas_pagas=Count(
+            'parcelas', filter=Q(parcelas__status=ParcelaAluguel.STATUS_PAGA)
+        ),
+        parcelas_pendentes=Count(
+            'parcelas', filter=Q(parcelas__status=ParcelaAluguel.STATUS_PENDENTE)
+        ),
+        parcelas_atrasadas=Count(
+            'parcelas', filter=Q(parcelas__status=ParcelaAluguel.STATUS_ATRASADA)
+        ),
+    )
+
+
+def formatar_resumo_financeiro(contrato) -> dict:
+    """
+    Converte um contrato anotado por anotar_resumo_financeiro em dict.
+
+    Args:
+        contrato: ContratoAluguel anotado (com cliente carregado)
+
+    Returns:
+        dict: Resumo financeiro do contrato
+    """
+    total_contrato = contrato.total_contrato or 0
+    total_pago = contrato.total_pago or 0
+
+    return {
+        'contrato_id': contrato.id,
+        'contrato_numero': contrato.numero,
+        'cliente': contrato.cliente.nome,
+        'total_contrato': float(total_contrato),
+        'total_pago': float(total_pago),
+        'total_pendente': float(contrato.total_pendente or 0),
+        'total_atrasado': float(contrato.total_atrasado or 0),
+        'percentual_pago': round(float(total_pago / total_contrato * 100), 1) if total_contrato > 0 else 0,
+        'parcelas_pagas': contrato.parcelas_pagas,
+        'parcelas_pendentes': contrato.parcelas_pendentes,
+        'parcelas_atrasadas': contrato.parcelas_atrasadas,
+        'duracao_meses': contrato.duracao_meses,
+    }
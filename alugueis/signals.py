@@ -9,13 +9,15 @@ e o módulo Financeiro:
 1. Ao criar ParcelaAluguel → Cria automaticamente ContaReceber
 2. Ao atualizar status da parcela → Sincroniza ContaReceber
 3. Ao cancelar contrato → Cancela ContaReceber pendentes
+4. Ao salvar/excluir parcela → Atualiza a próxima parcela do contrato
+5. Ao salvar/excluir parcela ou contrato → Invalida os indicadores em cache
 
 Autor: Life Rainbow Team
 Data: Janeiro 2026
 """
 
 import logging
-from django.db.models.signals import post_save, pre_delete
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
 from django.db import transaction
 
@@ -132,6 +134,39 @@ def sincronizar_status_conta_receber_aluguel(sender, instance, **kwargs):
         )
 
 
+@receiver(post_save, sender='alugueis.ParcelaAluguel')
+@receiver(post_delete, sender='alugueis.ParcelaAluguel')
+def atualizar_proxima_parcela_contrato(sender, instance, **kwargs):
+    """
+    Mantém ContratoAluguel.proxima_parcela/proxima_data_vencimento
+    atualizados quando uma parcela é criada, alterada ou excluída.
+    """
+    from alugueis.models import ContratoAluguel
+
+    try:
+        contrato = ContratoAluguel(pk=instance.contrato_id)
+        contrato.atualizar_proxima_parcela()
+    except Exception as e:
+        logger.error(
+            f"❌ Erro ao atualizar próxima parcela do contrato {instance.contrato_id}: {e}"
+        )
+
+
+@receiver(post_save, sender='alugueis.ParcelaAluguel')
+@receiver(post_delete, sender='alugueis.ParcelaAluguel')
+@receiver(post_save, sender='alugueis.ContratoAluguel')
+@receiver(post_delete, sender='alugueis.ContratoAluguel')
+def invalidar_indicadores_carteira(sender, instance, **kwargs):
+    """
+    Pagamento atrasado, edição de datas ou encerramento mudam os
+    indicadores de meses já fechados que estão em cache.
+    """
+    from alugueis.analytics import invalidar_indicadores
+
+    # Após o commit: antes dele um cálculo concorrente ainda vê os dados antigos
+    transaction.on_commit(invalidar_indicadores)
+
+
 @receiver(post_save, sender='alugueis.ContratoAluguel')
 def cancelar_contas_receber_ao_cancelar_contrato(sender, instance, **kwargs):
     """
@@ -251,25 +286,11 @@ def calcular_resumo_financeiro_aluguel(contrato):
     Returns:
         dict: Resumo financeiro
     """
-    from django.db.models import Sum
-
-    parcelas = contrato.parcelas.all()
-
-    total_contrato = parcelas.aggregate(total=Sum('valor'))['total'] or 0
-    total_pago = parcelas.filter(status='paga').aggregate(total=Sum('valor_pago'))['total'] or 0
-    total_pendente = parcelas.filter(status__in=['pendente', 'atrasada']).aggregate(total=Sum('valor'))['total'] or 0
-    total_atrasado = parcelas.filter(status='atrasada').aggregate(total=Sum('valor'))['total'] or 0
-
-    return {
-        'contrato_numero': contrato.numero,
-        'cliente': contrato.cliente.nome,
-        'total_contrato': float(total_contrato),
-        'total_pago': float(total_pago),
-        'total_pendente': float(total_pendente),
-        'total_atrasado': float(total_atrasado),
-        'percentual_pago': round((total_pago / total_contrato * 100), 1) if total_contrato > 0 else 0,
-        'parcelas_pagas': parcelas.filter(status='paga').count(),
-        'parcelas_pendentes': parcelas.filter(status='pendente').count(),
-        'parcelas_atrasadas': parcelas.filter(status='atrasada').count(),
-        'duracao_meses': contrato.duracao_meses,
-    }
+    from alugueis.models import ContratoAluguel
+    from alugueis.services import anotar_resumo_financeiro, formatar_resumo_financeiro
+
+    contrato_anotado = anotar_resumo_financeiro(
+        ContratoAluguel.objects.filter(pk=contrato.pk).select_related('cliente')
+    ).get()
+
+    return formatar_resumo_financeiro(contrato_anotado)
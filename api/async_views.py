@@ -0,0 +1,211 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Views Assíncronas da API
+Endpoints que esperam APIs externas (WhatsApp, OpenAI) sem prender o worker
+=============================================================================
+
+O DRF 3.14 não executa handlers `async def`. AsyncAPIView roda a parte
+síncrona do DRF (autenticação, permissões, throttling e parse do corpo)
+via sync_to_async e aguarda o handler no event loop do servidor ASGI.
+Enquanto uma requisição espera a Graph API ou a OpenAI, o mesmo worker
+atende as demais.
+
+Servir com:
+    gunicorn core.asgi:application -k uvicorn.workers.UvicornWorker
+"""
+
+import asyncio
+import json
+
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from django.http import Http404, StreamingHttpResponse
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import BaseRenderer
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+from whatsapp_integration.models import Conversa
+
+from .serializers import MensagemSaidaSerializer
+
+
+class AsyncAPIView(APIView):
+    """
+    APIView com handlers assíncronos (`async def post(...)`).
+
+    O ORM dentro dos handlers deve usar a API assíncrona (aget, acreate...)
+    ou sync_to_async.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # csrf_exempt do APIView embrulha a view em função síncrona
+        return markcoroutinefunction(view)
+
+    def _inicializar(self, request, *args, **kwargs):
+        self.initial(request, *args, **kwargs)
+        request.data  # parse do corpo fora do event loop
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self._inicializar)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class ConversaEnviarMensagemAPIView(AsyncAPIView):
+    """
+    Enfileira uma mensagem de texto na caixa de saída da conversa.
+
+    O worker enviar_mensagens faz o envio (com novas tentativas em limite
+    de taxa/instabilidade); a resposta é 202 com o envio criado, que pode
+    ser acompanhado em /api/caixa-saida/{id}/.
+
+    POST /api/conversas/{id}/enviar_mensagem/
+    {
+        "texto": "Olá! Seu técnico chega às 14h."
+    }
+    """
+    permission_classes = [IsAuthenticated]
+
+    async def post(self, request, pk=None):
+        from whatsapp_integration.saida import enfileirar
+
+        texto = request.data.get('texto')
+        if not texto:
+            return Response(
+                {'error': 'Texto é obrigatório'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        conversa = await Conversa.objects.filter(pk=pk).afirst()
+        if conversa is None:
+            raise Http404
+
+        if not conversa.dentro_da_janela():
+            return Response(
+                {'error': 'Janela de 24h encerrada: use um template aprovado'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        envio = await sync_to_async(enfileirar)(
+            conversa.telefone,
+            texto,
+            conversa=conversa,
+            usuario=request.user,
+        )
+        return Response(MensagemSaidaSerializer(envio).data, status=status.HTTP_202_ACCEPTED)
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    text/event-stream: permite a negociação de conteúdo para clientes SSE.
+    Respostas comuns (ex.: erros de validação) viram um evento 'erro'.
+    """
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return evento_sse('erro', data).encode('utf-8')
+
+
+def evento_sse(evento: str, dados) -> str:
+    """Um evento no formato Server-Sent Events."""
+    return f"event: {evento}\ndata: {json.dumps(dados, ensure_ascii=False, default=str)}\n\n"
+
+
+class AIAssistantAPIView(AsyncAPIView):
+    """
+    API para interação com o assistente de IA.
+
+    POST /api/ai/comando/
+    {
+        "mensagem": "Quais clientes não receberam contato este mês?",
+        "nova_conversa": false
+    }
+
+    Os comandos seguem a sessão de conversa do usuário (follow-ups como
+    "confirmar campanha" têm o contexto anterior); "nova_conversa": true
+    começa outra.
+
+    Com `Accept: text/event-stream` (ou ?stream=true) a resposta é
+    transmitida em Server-Sent Events enquanto é gerada:
+
+        event: ferramenta   data: {"nome": "listar_clientes_sem_contato", "status": "executando"}
+        event: token        data: {"texto": "Encontrei"}
+        event: fim          data: {"funcoes_executadas": [...], "metricas": {"ttft_ms": 640, ...}}
+
+    Sem isso, a resposta JSON completa (comportamento anterior).
+    """
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, EventStreamRenderer]
+
+    def _quer_stream(self, request) -> bool:
+        if request.query_params.get('stream', '').lower() in ('true', '1'):
+            return True
+        return isinstance(request.accepted_renderer, EventStreamRenderer)
+
+    async def post(self, request):
+        from ai_assistant.services import obter_assistente
+
+        mensagem = request.data.get('mensagem')
+        if not mensagem:
+            return Response(
+                {'error': 'Mensagem é obrigatória'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        nova_conversa = str(request.data.get('nova_conversa', '')).lower() in ('true', '1')
+
+        if self._quer_stream(request):
+            return self._resposta_stream(
+                obter_assistente().processar_comando_stream(
+                    mensagem=mensagem,
+                    usuario=request.user,
+                    nova_conversa=nova_conversa
+                )
+            )
+
+        resultado = await obter_assistente().processar_comando(
+            mensagem=mensagem,
+            usuario=request.user,
+            nova_conversa=nova_conversa
+        )
+
+        return Response(resultado)
+
+    @staticmethod
+    def _resposta_stream(eventos) -> StreamingHttpResponse:
+        async def corpo():
+            async for evento in eventos:
+                dados = dict(evento)
+                yield evento_sse(dados.pop('evento'), dados)
+
+        resposta = StreamingHttpResponse(corpo(), content_type='text/event-stream; charset=utf-8')
+        resposta['Cache-Control'] = 'no-cache'
+        # nginx: não acumular a resposta antes de repassar
+        resposta['X-Accel-Buffering'] = 'no'
+        return resposta
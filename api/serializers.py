@@ -8,9 +8,11 @@ Serializers para todos os módulos do sistema
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth.models import User
+from django.db.models import Q
 
 # Imports dos modelos
 from clientes.models import Cliente, Endereco, HistoricoInteracao, ClienteFoto, ObservacaoCliente
+from clientes.telefones import normalizar_telefone
 from equipamentos.models import ModeloEquipamento, Equipamento, HistoricoManutencao
 from vendas.models import Venda, ItemVenda, Parcela
 from alugueis.models import ContratoAluguel, ParcelaAluguel, HistoricoAluguel
@@ -18,7 +20,9 @@ from financeiro.models import PlanoConta, ContaReceber, ContaPagar, Caixa, Movim
 from agenda.models import Agendamento, FollowUp, Tarefa
 from assistencia.models import OrdemServico, ItemOrdemServico
 from estoque.models import Produto, MovimentacaoEstoque, Inventario
-from whatsapp_integration.models import Conversa, Mensagem, Template, CampanhaMensagem
+from whatsapp_integration.models import (
+    Conversa, Mensagem, MensagemSaida, Template, CampanhaMensagem, JANELA_ATENDIMENTO
+)
 
 
 # =============================================================================
@@ -462,8 +466,12 @@ class ClienteCreateUpdateSerializer(serializers.ModelSerializer):
         if not value:
             return value
 
-        # Verifica se já existe outro cliente com este WhatsApp
-        queryset = Cliente.objects.filter(whatsapp=value)
+        # Verifica se já existe outro cliente com este WhatsApp (em qualquer formato)
+        filtro = Q(whatsapp=value)
+        e164 = normalizar_telefone(value)
+        if e164:
+            filtro |= Q(whatsapp_e164=e164)
+        queryset = Cliente.objects.filter(filtro)
 
         # Se estamos atualizando, exclui o cliente atual da verificação
         if self.instance:
@@ -604,7 +612,7 @@ class ParcelaSerializer(serializers.ModelSerializer):
         model = Parcela
         fields = [
             'id', 'numero', 'valor', 'data_vencimento', 'data_pagamento',
-            'valor_pago', 'forma_pagamento', 'status', 'status_display', 'observacao'
+            'valor_pago', 'forma_pagamento', 'status', 'status_display', 'observacoes'
         ]
         read_only_fields = ['id']
 
@@ -614,12 +622,14 @@ class VendaListSerializer(serializers.ModelSerializer):
     cliente_nome = serializers.CharField(source='cliente.nome', read_only=True)
     vendedor_nome = serializers.CharField(source='vendedor.get_full_name', read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
+    valor_lucro = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    margem = serializers.DecimalField(max_digits=9, decimal_places=2, read_only=True)
 
     class Meta:
         model = Venda
         fields = [
             'id', 'numero', 'cliente', 'cliente_nome', 'vendedor', 'vendedor_nome',
-            'data_venda', 'valor_total', 'status', 'status_display'
+            'data_venda', 'valor_total', 'valor_lucro', 'margem', 'status', 'status_display'
         ]
 
 
@@ -657,6 +667,91 @@ class VendaDetailSerializer(serializers.ModelSerializer):
         return obj.valor_total - self.get_total_pago(obj)
 
 
+class ItemVendaCompletaSerializer(serializers.Serializer):
+    """Item da venda completa (IDs validados em lote no serviço)."""
+    produto = serializers.IntegerField(required=False, allow_null=True)
+    modelo = serializers.IntegerField(required=False, allow_null=True)
+    equipamento = serializers.IntegerField(required=False, allow_null=True)
+    quantidade = serializers.IntegerField(min_value=1, default=1)
+    valor_unitario = serializers.DecimalField(
+        max_digits=10, decimal_places=2, required=False, allow_null=True,
+        help_text='Padrão: preço de venda do produto/modelo'
+    )
+    desconto = serializers.DecimalField(max_digits=10, decimal_places=2, default=0)
+    observacoes = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+    def validate(self, attrs):
+        if bool(attrs.get('produto')) == bool(attrs.get('modelo') or attrs.get('equipamento')):
+            raise serializers.ValidationError(
+                "Informe 'produto' (estoque) ou 'modelo'/'equipamento' (Rainbow)"
+            )
+        return attrs
+
+
+class ParcelaVendaCompletaSerializer(serializers.Serializer):
+    """Parcela do plano de pagamento da venda completa."""
+    valor = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    data_vencimento = serializers.DateField()
+
+
+class VendaCompletaSerializer(serializers.ModelSerializer):
+    """
+    Entrada de POST /api/vendas/completa/: venda, itens e plano de parcelas.
+
+    Se 'parcelas' for omitido, são geradas 'numero_parcelas' parcelas
+    mensais iguais a partir de data_primeiro_vencimento.
+    """
+    itens = ItemVendaCompletaSerializer(many=True)
+    parcelas = ParcelaVendaCompletaSerializer(many=True, required=False)
+
+    class Meta:
+        model = Venda
+        fields = [
+            'cliente', 'vendedor', 'data_venda', 'tipo_entrega', 'data_entrega',
+            'desconto', 'acrescimo', 'valor_frete', 'forma_pagamento',
+            'numero_parcelas', 'data_primeiro_vencimento', 'pontos', 'comissao',
+            'observacoes', 'lancamento', 'itens', 'parcelas',
+        ]
+        extra_kwargs = {'data_venda': {'required': False}}
+
+    def validate_itens(self, value):
+        if not value:
+            raise serializers.ValidationError('Informe ao menos um item')
+        return value
+
+    def validate_numero_parcelas(self, value):
+        if value < 1:
+            raise serializers.ValidationError('Deve ser maior ou igual a 1')
+        return value
+
+    def create(self, validated_data):
+        from django.core.exceptions import ValidationError as DjangoValidationError
+        from vendas.services import criar_venda_completa
+
+        request = self.context.get('request')
+        usuario = request.user if request and request.user.is_authenticated else None
+
+        itens = [
+            {
+                'produto_id': item.get('produto'),
+                'modelo_id': item.get('modelo'),
+                'equipamento_id': item.get('equipamento'),
+                'quantidade': item['quantidade'],
+                'valor_unitario': item.get('valor_unitario'),
+                'desconto': item['desconto'],
+                'observacoes': item.get('observacoes'),
+            }
+            for item in validated_data.pop('itens')
+        ]
+        parcelas = validated_data.pop('parcelas', None)
+        validated_data.setdefault('vendedor', usuario)
+
+        try:
+            return criar_venda_completa(validated_data, itens, parcelas, usuario=usuario)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.message_dict)
+
+
 # =============================================================================
 # ALUGUÉIS
 # =============================================================================
@@ -695,8 +790,8 @@ class ContratoAluguelListSerializer(serializers.ModelSerializer):
         model = ContratoAluguel
         fields = [
             'id', 'numero', 'cliente', 'cliente_nome', 'equipamento', 'equipamento_serie',
-            'data_inicio', 'data_fim', 'valor_mensal', 'status', 'status_display',
-            'parcelas_pendentes'
+            'data_inicio', 'data_fim_prevista', 'valor_mensal', 'status', 'status_display',
+            'parcelas_pendentes', 'proxima_parcela', 'proxima_data_vencimento'
         ]
 
     def get_parcelas_pendentes(self, obj):
@@ -977,7 +1072,43 @@ class MensagemSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'data_hora']
 
 
-class ConversaSerializer(serializers.ModelSerializer):
+class MensagemSaidaSerializer(serializers.ModelSerializer):
+    """Serializer para envios da caixa de saída (somente leitura)."""
+
+    class Meta:
+        model = MensagemSaida
+        fields = [
+            'id', 'conversa', 'cliente', 'telefone', 'tipo', 'conteudo', 'template_nome',
+            'status', 'tentativas', 'proxima_tentativa_em', 'wamid', 'mensagem',
+            'codigo_erro', 'erro_mensagem', 'enviado_por', 'enviado_por_ia',
+            'created_at', 'enviada_em',
+        ]
+        read_only_fields = fields
+
+
+class JanelaConversaMixin(serializers.Serializer):
+    """
+    Janela de 24h: usa as anotações de Conversa.objects.com_janela() e
+    calcula na instância quando o objeto não veio anotado.
+    """
+    janela_ativa = serializers.SerializerMethodField()
+    janela_expira_em = serializers.SerializerMethodField()
+
+    def get_janela_ativa(self, obj):
+        ativa = getattr(obj, 'janela_ativa', None)
+        return obj.dentro_da_janela() if ativa is None else ativa
+
+    def get_janela_expira_em(self, obj):
+        if hasattr(obj, 'janela_expira_em'):
+            expira = obj.janela_expira_em
+        elif obj.ultima_mensagem_cliente:
+            expira = obj.ultima_mensagem_cliente + JANELA_ATENDIMENTO
+        else:
+            expira = None
+        return serializers.DateTimeField().to_representation(expira) if expira else None
+
+
+class ConversaSerializer(JanelaConversaMixin, serializers.ModelSerializer):
     """Serializer para conversas WhatsApp."""
     cliente_nome = serializers.CharField(source='cliente.nome', read_only=True)
     mensagens_recentes = serializers.SerializerMethodField()
@@ -988,10 +1119,23 @@ class ConversaSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'iniciada_em', 'atualizada_em']
 
     def get_mensagens_recentes(self, obj):
-        mensagens = obj.mensagens.order_by('-data_hora')[:20]
+        mensagens = obj.mensagens.order_by('-created_at')[:20]
         return MensagemSerializer(mensagens, many=True).data
 
 
+class ConversaJanelaSerializer(JanelaConversaMixin, serializers.ModelSerializer):
+    """Serializer leve para a caixa de entrada por janela de 24h."""
+    cliente_nome = serializers.CharField(source='cliente.nome', read_only=True, default=None)
+
+    class Meta:
+        model = Conversa
+        fields = [
+            'id', 'cliente', 'cliente_nome', 'telefone', 'nome_contato', 'status',
+            'modo_atendimento', 'atendente', 'ultima_mensagem_cliente',
+            'janela_ativa', 'janela_expira_em',
+        ]
+
+
 class TemplateSerializer(serializers.ModelSerializer):
     """Serializer para templates WhatsApp."""
 
@@ -41,17 +41,18 @@ from .views import (
     MovimentacaoEstoqueViewSet,
     # WhatsApp
     ConversaViewSet,
+    MensagemSaidaViewSet,
     TemplateViewSet,
     CampanhaMensagemViewSet,
-    # Dashboard e AI
+    # Dashboard e webhook
     DashboardAPIView,
-    AIAssistantAPIView,
     WhatsAppWebhookAPIView,
     # Google Places API
     places_autocomplete,
     places_details,
     places_by_cep,
 )
+from .async_views import AIAssistantAPIView, ConversaEnviarMensagemAPIView
 
 # =============================================================================
 # ROUTER CONFIGURATION
@@ -93,6 +94,7 @@ router.register(r'movimentacoes-estoque', MovimentacaoEstoqueViewSet, basename='
 
 # WhatsApp
 router.register(r'conversas', ConversaViewSet, basename='conversa')
+router.register(r'caixa-saida', MensagemSaidaViewSet, basename='caixa-saida')
 router.register(r'templates', TemplateViewSet, basename='template')
 router.register(r'campanhas', CampanhaMensagemViewSet, basename='campanha')
 
@@ -102,6 +104,13 @@ router.register(r'campanhas', CampanhaMensagemViewSet, basename='campanha')
 # =============================================================================
 
 urlpatterns = [
+    # Views assíncronas (antes do router: mesma URL da antiga action do ViewSet)
+    path(
+        'conversas/<int:pk>/enviar_mensagem/',
+        ConversaEnviarMensagemAPIView.as_view(),
+        name='conversa-enviar-mensagem'
+    ),
+
     # Router URLs
     path('', include(router.urls)),
 
@@ -13,26 +13,27 @@ from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.views import APIView
+from rest_framework.exceptions import ValidationError
 from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Sum, Count, Q, Avg
+from django.db.models import Sum, Q, Avg
 from django.utils import timezone
 from django.conf import settings
-from datetime import timedelta
-from decimal import Decimal
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
 
 logger = logging.getLogger(__name__)
 
 # Imports dos modelos
 from clientes.models import Cliente, Endereco, HistoricoInteracao, ClienteFoto
 from equipamentos.models import ModeloEquipamento, Equipamento, HistoricoManutencao
-from vendas.models import Venda, ItemVenda, Parcela
-from alugueis.models import ContratoAluguel, ParcelaAluguel
+from vendas.models import Venda, ItemVenda, Parcela, ResumoVendaDiario
+from alugueis.models import ContratoAluguel
 from financeiro.models import PlanoConta, ContaReceber, ContaPagar, Caixa, Movimentacao
 from agenda.models import Agendamento, FollowUp, Tarefa
 from assistencia.models import OrdemServico, ItemOrdemServico
 from estoque.models import Produto, MovimentacaoEstoque, Inventario
-from whatsapp_integration.models import Conversa, Mensagem, Template, CampanhaMensagem
+from whatsapp_integration.models import Conversa, MensagemSaida, Template, CampanhaMensagem
 
 # Imports dos serializers
 from .serializers import (
@@ -46,6 +47,7 @@ from .serializers import (
     HistoricoManutencaoSerializer,
     # Vendas
     VendaListSerializer, VendaDetailSerializer, ItemVendaSerializer, ParcelaSerializer,
+    VendaCompletaSerializer,
     # Aluguéis
     ContratoAluguelListSerializer, ContratoAluguelDetailSerializer,
     ParcelaAluguelSerializer, HistoricoAluguelSerializer,
@@ -60,7 +62,8 @@ from .serializers import (
     # Estoque
     ProdutoSerializer, MovimentacaoEstoqueSerializer, InventarioSerializer,
     # WhatsApp
-    ConversaSerializer, MensagemSerializer, TemplateSerializer, CampanhaMensagemSerializer,
+    ConversaSerializer, ConversaJanelaSerializer, MensagemSaidaSerializer,
+    TemplateSerializer, CampanhaMensagemSerializer,
     # Dashboard
     DashboardSerializer, RelatorioVendasSerializer,
 )
@@ -70,6 +73,22 @@ from .serializers import (
 # CLIENTES
 # =============================================================================
 
+class BuscaClienteFilter(filters.SearchFilter):
+    """
+    SearchFilter que trata telefones em qualquer formato como igualdade
+    nas colunas E.164 indexadas (em vez de icontains em telefone).
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        from clientes.telefones import filtro_telefone, telefone_da_busca
+
+        termo = request.query_params.get(self.search_param, '')
+        e164 = telefone_da_busca(termo)
+        if e164:
+            return queryset.filter(filtro_telefone(e164))
+        return super().filter_queryset(request, queryset, view)
+
+
 class ClienteViewSet(viewsets.ModelViewSet):
     """
     ViewSet completo para gerenciamento de clientes.
@@ -86,7 +105,7 @@ class ClienteViewSet(viewsets.ModelViewSet):
     """
     queryset = Cliente.objects.all()
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, BuscaClienteFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'perfil', 'possui_rainbow', 'consultor_responsavel']
     search_fields = ['nome', 'email', 'telefone', 'cpf_cnpj']
     ordering_fields = ['nome', 'created_at', 'data_ultimo_contato']
@@ -336,15 +355,41 @@ class VendaViewSet(viewsets.ModelViewSet):
 
     Endpoints adicionais:
     - GET /api/vendas/resumo/ - Resumo de vendas do período
+    - GET /api/vendas/lucratividade/ - Lucro e margem por vendedor/modelo
+    - POST /api/vendas/completa/ - Cria venda com itens e parcelas em uma transação
     - POST /api/vendas/{id}/registrar-pagamento/ - Registra pagamento de parcela
     """
     queryset = Venda.objects.select_related('cliente', 'vendedor')
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['status', 'vendedor', 'cliente']
-    ordering_fields = ['data_venda', 'valor_total']
+    ordering_fields = ['data_venda', 'valor_total', 'valor_lucro', 'margem']
     ordering = ['-data_venda']
 
+    # Query params de faixa sobre as anotações de lucratividade
+    FILTROS_LUCRATIVIDADE = {
+        'lucro_min': 'valor_lucro__gte',
+        'lucro_max': 'valor_lucro__lte',
+        'margem_min': 'margem__gte',
+        'margem_max': 'margem__lte',
+    }
+
+    def get_queryset(self):
+        from vendas.services import anotar_lucratividade
+
+        queryset = anotar_lucratividade(super().get_queryset())
+
+        for param, lookup in self.FILTROS_LUCRATIVIDADE.items():
+            valor = self.request.query_params.get(param)
+            if valor in (None, ''):
+                continue
+            try:
+                queryset = queryset.filter(**{lookup: Decimal(valor)})
+            except InvalidOperation:
+                raise ValidationError({param: 'Informe um número válido.'})
+
+        return queryset
+
     def get_serializer_class(self):
         if self.action == 'list':
             return VendaListSerializer
@@ -354,21 +399,25 @@ class VendaViewSet(viewsets.ModelViewSet):
     def resumo(self, request):
         """Retorna resumo de vendas do período."""
         dias = int(request.query_params.get('dias', 30))
-        data_inicio = timezone.now() - timedelta(days=dias)
+        data_inicio = (timezone.now() - timedelta(days=dias)).date()
 
-        vendas = Venda.objects.filter(data_venda__gte=data_inicio)
+        # Tabela de fatos diária (linhas de total por venda)
+        vendas = ResumoVendaDiario.objects.filter(
+            tipo_venda=ResumoVendaDiario.TIPO_VENDA,
+            data__gte=data_inicio
+        )
 
         resumo = vendas.aggregate(
-            total_vendas=Count('id'),
-            valor_total=Sum('valor_total'),
+            total_vendas=Sum('quantidade'),
+            valor_total=Sum('valor'),
         )
 
         # Vendas por vendedor
         por_vendedor = vendas.values(
             'vendedor__first_name', 'vendedor__last_name'
         ).annotate(
-            quantidade=Count('id'),
-            valor=Sum('valor_total')
+            quantidade=Sum('quantidade'),
+            valor=Sum('valor')
         ).order_by('-valor')
 
         return Response({
@@ -378,6 +427,52 @@ class VendaViewSet(viewsets.ModelViewSet):
             'por_vendedor': list(por_vendedor),
         })
 
+    @action(detail=False, methods=['get'])
+    def lucratividade(self, request):
+        """
+        Lucro e margem agregados no banco.
+
+        Query params: agrupar_por (vendedor|modelo|vendedor_modelo),
+        inicio, fim (AAAA-MM-DD), status (padrão: concluida; 'todos' = sem filtro)
+        """
+        from vendas.services import relatorio_lucratividade
+
+        agrupar_por = request.query_params.get('agrupar_por', 'vendedor')
+        status_venda = request.query_params.get('status', Venda.STATUS_CONCLUIDA)
+
+        try:
+            inicio = request.query_params.get('inicio')
+            fim = request.query_params.get('fim')
+            linhas = relatorio_lucratividade(
+                agrupar_por=agrupar_por,
+                data_inicio=date.fromisoformat(inicio) if inicio else None,
+                data_fim=date.fromisoformat(fim) if fim else None,
+                status=None if status_venda == 'todos' else status_venda,
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        page = self.paginate_queryset(linhas)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(linhas)
+
+    @action(detail=False, methods=['post'])
+    def completa(self, request):
+        """
+        Cria venda, itens, parcelas, baixa de estoque e contas a receber
+        em uma única transação (inserções em lote).
+        """
+        serializer = VendaCompletaSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        venda = serializer.save()
+
+        venda = Venda.objects.select_related('cliente', 'vendedor').prefetch_related(
+            'itens__produto', 'itens__modelo', 'itens__equipamento', 'parcelas'
+        ).get(pk=venda.pk)
+
+        return Response(VendaDetailSerializer(venda).data, status=status.HTTP_201_CREATED)
+
     @action(detail=True, methods=['post'], url_path='registrar-pagamento')
     def registrar_pagamento(self, request, pk=None):
         """Registra pagamento de uma parcela."""
@@ -413,6 +508,8 @@ class ContratoAluguelViewSet(viewsets.ModelViewSet):
     Endpoints adicionais:
     - GET /api/alugueis/vencendo/ - Contratos com parcelas vencendo
     - GET /api/alugueis/atrasados/ - Contratos com parcelas atrasadas
+    - GET /api/alugueis/resumo-financeiro/ - Resumo financeiro da carteira
+    - GET /api/alugueis/indicadores/ - MRR, churn, inadimplência e coortes
     """
     queryset = ContratoAluguel.objects.select_related('cliente', 'equipamento')
     permission_classes = [IsAuthenticated]
@@ -433,33 +530,104 @@ class ContratoAluguelViewSet(viewsets.ModelViewSet):
     def vencendo(self, request):
         """Lista contratos com parcelas vencendo nos próximos dias."""
         dias = int(request.query_params.get('dias', 7))
-        hoje = timezone.now().date()
+        hoje = timezone.localdate()
         data_limite = hoje + timedelta(days=dias)
 
         contratos = ContratoAluguel.objects.filter(
-            parcelas__data_vencimento__gte=hoje,
-            parcelas__data_vencimento__lte=data_limite,
-            parcelas__status='pendente',
-            status='ativo'
-        ).distinct()
+            status='ativo',
+            proxima_data_vencimento__gte=hoje,
+            proxima_data_vencimento__lte=data_limite,
+        ).select_related('cliente', 'equipamento').order_by('proxima_data_vencimento')
 
         serializer = ContratoAluguelListSerializer(contratos, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
     def atrasados(self, request):
-        """Lista contratos com parcelas atrasadas."""
-        hoje = timezone.now().date()
+        """
+        Lista contratos com parcelas atrasadas.
+
+        O status 'atrasada' é mantido pela varredura diária
+        (python manage.py atualizar_atrasos); parcelas pendentes vencidas
+        desde a última varredura também são consideradas.
+        """
+        hoje = timezone.localdate()
 
         contratos = ContratoAluguel.objects.filter(
-            parcelas__data_vencimento__lt=hoje,
-            parcelas__status='pendente',
+            Q(parcelas__status='atrasada') |
+            Q(parcelas__status='pendente', parcelas__data_vencimento__lt=hoje),
             status='ativo'
         ).distinct()
 
         serializer = ContratoAluguelListSerializer(contratos, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'], url_path='resumo-financeiro')
+    def resumo_financeiro(self, request):
+        """
+        Resumo financeiro (totais e contagens de parcelas) por contrato.
+
+        Aceita os mesmos filtros/ordenação da listagem (status, cliente,
+        ordering) e é paginado. Os totais vêm de uma única agregação
+        condicional agrupada por contrato.
+        """
+        from alugueis.services import anotar_resumo_financeiro, formatar_resumo_financeiro
+
+        contratos = anotar_resumo_financeiro(
+            self.filter_queryset(self.get_queryset())
+        )
+
+        pagina = self.paginate_queryset(contratos)
+        if pagina is not None:
+            return self.get_paginated_response(
+                [formatar_resumo_financeiro(c) for c in pagina]
+            )
+
+        return Response([formatar_resumo_financeiro(c) for c in contratos])
+
+    @action(detail=False, methods=['get'])
+    def indicadores(self, request):
+        """
+        Indicadores da carteira de aluguéis (MRR, churn, renovações,
+        inadimplência e retenção por coorte).
+
+        Query params: mes, ano (padrão: mês corrente), recalcular=true
+        """
+        from alugueis.analytics import calcular_indicadores_carteira
+
+        mes = ano = None
+        try:
+            if 'mes' in request.query_params:
+                mes = int(request.query_params['mes'])
+                if not 1 <= mes <= 12:
+                    raise ValueError
+        except ValueError:
+            return Response(
+                {'error': 'mes deve ser um inteiro entre 1 e 12'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            if 'ano' in request.query_params:
+                ano = int(request.query_params['ano'])
+                if not 1 <= ano <= 9999:
+                    raise ValueError
+        except ValueError:
+            return Response(
+                {'error': 'ano deve ser um inteiro (ex: 2026)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            resultado = calcular_indicadores_carteira(
+                ano=ano,
+                mes=mes,
+                forcar=request.query_params.get('recalcular') == 'true'
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(resultado)
+
 
 # =============================================================================
 # FINANCEIRO
@@ -487,7 +655,7 @@ class ContaReceberViewSet(viewsets.ModelViewSet):
         hoje = timezone.now().date()
         contas = ContaReceber.objects.filter(
             data_vencimento__lt=hoje,
-            status='pendente'
+            status__in=['pendente', 'atrasada']
         ).order_by('data_vencimento')
 
         serializer = ContaReceberSerializer(contas, many=True)
@@ -818,48 +986,97 @@ class MovimentacaoEstoqueViewSet(viewsets.ModelViewSet):
 # =============================================================================
 
 class ConversaViewSet(viewsets.ModelViewSet):
-    """ViewSet para conversas WhatsApp."""
+    """
+    ViewSet para conversas WhatsApp.
+
+    A janela de 24h (janela_ativa, janela_expira_em) é calculada na consulta
+    a partir de ultima_mensagem_cliente. Filtro: ?janela_ativa=true|false
+
+    POST conversas/{id}/enviar_mensagem/ é assíncrono (async_views.py) e
+    apenas enfileira o envio na caixa de saída.
+    """
     queryset = Conversa.objects.select_related('cliente')
     serializer_class = ConversaSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['status', 'cliente']
 
-    @action(detail=True, methods=['post'])
-    def enviar_mensagem(self, request, pk=None):
-        """Envia uma mensagem na conversa."""
-        from whatsapp_integration.services import whatsapp_service
-        import asyncio
-
-        conversa = self.get_object()
-        texto = request.data.get('texto')
-
-        # Envia via WhatsApp API
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        resultado = loop.run_until_complete(
-            whatsapp_service.enviar_mensagem_texto(
-                conversa.telefone,
-                texto
+    def get_queryset(self):
+        queryset = super().get_queryset().com_janela()
+
+        janela = self.request.query_params.get('janela_ativa')
+        if janela is not None:
+            if janela.lower() in ('true', '1'):
+                queryset = queryset.janela_aberta()
+            elif janela.lower() in ('false', '0'):
+                queryset = queryset.janela_fechada()
+
+        return queryset
+
+    @action(detail=False, url_path='janela-fechando')
+    def janela_fechando(self, request):
+        """
+        Caixa de entrada: conversas cuja janela de 24h fecha nas próximas N horas
+        (as mais urgentes primeiro).
+
+        GET /api/v1/conversas/janela-fechando/?horas=2
+        """
+        try:
+            horas = float(request.query_params.get('horas', 2))
+        except ValueError:
+            horas = -1
+        if not 0 < horas <= 24:
+            return Response(
+                {'error': 'horas deve ser um número entre 0 e 24'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-        )
-        loop.close()
-
-        if resultado.get('success'):
-            mensagem = Mensagem.objects.create(
-                conversa=conversa,
-                direcao='enviada',
-                tipo='text',
-                conteudo=texto,
-                wamid=resultado.get('message_id'),
-                status='enviada'
+
+        conversas = self.filter_queryset(
+            self.get_queryset().janela_fechando(horas)
+        ).order_by('ultima_mensagem_cliente')
+
+        pagina = self.paginate_queryset(conversas)
+        if pagina is not None:
+            return self.get_paginated_response(ConversaJanelaSerializer(pagina, many=True).data)
+        return Response(ConversaJanelaSerializer(conversas, many=True).data)
+
+
+class MensagemSaidaViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Caixa de saída do WhatsApp (envios avulsos feitos pelo worker
+    enviar_mensagens). Filtros: ?status=, ?conversa=, ?cliente=
+    """
+    queryset = MensagemSaida.objects.all().order_by('-id')
+    serializer_class = MensagemSaidaSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['status', 'tipo', 'conversa', 'cliente']
+
+    @action(detail=False)
+    def metricas(self, request):
+        """
+        Profundidade da fila e latência de envio.
+
+        GET /api/v1/caixa-saida/metricas/
+        """
+        from whatsapp_integration.saida import metricas_saida
+
+        return Response(metricas_saida())
+
+    @action(detail=True, methods=['post'])
+    def reenviar(self, request, pk=None):
+        """Devolve à fila um envio descartado (status 'falha')."""
+        from whatsapp_integration.saida import reenfileirar
+
+        envio = self.get_object()
+        if not reenfileirar([envio.pk]):
+            return Response(
+                {'error': 'Somente envios com falha definitiva podem ser reenviados'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-            return Response(MensagemSerializer(mensagem).data)
 
-        return Response(
-            {'error': resultado.get('error')},
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
+        envio.refresh_from_db()
+        return Response(self.get_serializer(envio).data)
 
 
 class TemplateViewSet(viewsets.ModelViewSet):
@@ -891,7 +1108,7 @@ class CampanhaMensagemViewSet(viewsets.ModelViewSet):
         campanha.status = 'agendada'
         campanha.save()
 
-        # TODO: Disparar task Celery para executar campanha
+        # Envio feito pelo comando executar_campanhas (cron a cada minuto)
 
         return Response({'message': 'Campanha agendada com sucesso'})
 
@@ -923,17 +1140,20 @@ class DashboardAPIView(APIView):
         ).count()
 
         # Vendas do mês
-        vendas_mes = Venda.objects.filter(data_venda__gte=inicio_mes)
-        vendas_count = vendas_mes.count()
-        vendas_valor = vendas_mes.aggregate(total=Sum('valor_total'))['total'] or Decimal('0')
+        vendas_mes = ResumoVendaDiario.objects.filter(
+            tipo_venda=ResumoVendaDiario.TIPO_VENDA,
+            data__gte=inicio_mes
+        ).aggregate(quantidade=Sum('quantidade'), total=Sum('valor'))
+        vendas_count = vendas_mes['quantidade'] or 0
+        vendas_valor = vendas_mes['total'] or Decimal('0')
 
         # Aluguéis
         alugueis_ativos = ContratoAluguel.objects.filter(status='ativo').count()
-        alugueis_vencendo = ParcelaAluguel.objects.filter(
-            contrato__status='ativo',
-            status='pendente',
-            data_vencimento__lte=hoje + timedelta(days=7)
-        ).values('contrato').distinct().count()
+        alugueis_vencendo = ContratoAluguel.objects.filter(
+            status='ativo',
+            proxima_data_vencimento__gte=hoje,
+            proxima_data_vencimento__lte=hoje + timedelta(days=7)
+        ).count()
 
         # Ordens de serviço
         os_abertas = OrdemServico.objects.filter(
@@ -947,7 +1167,7 @@ class DashboardAPIView(APIView):
         # Financeiro
         contas_receber_vencidas = ContaReceber.objects.filter(
             data_vencimento__lt=hoje,
-            status='pendente'
+            status__in=['pendente', 'atrasada']
         ).aggregate(total=Sum('valor'))['total'] or Decimal('0')
 
         contas_pagar_vencidas = ContaPagar.objects.filter(
@@ -984,49 +1204,7 @@ class DashboardAPIView(APIView):
         return Response(serializer.data)
 
 
-# =============================================================================
-# AI ASSISTANT
-# =============================================================================
-
-class AIAssistantAPIView(APIView):
-    """
-    API para interação com o assistente de IA.
-
-    POST /api/ai/comando/
-    {
-        "mensagem": "Quais clientes não receberam contato este mês?"
-    }
-    """
-    permission_classes = [IsAuthenticated]
-
-    def post(self, request):
-        from ai_assistant.services import AIAssistant
-        import asyncio
-
-        mensagem = request.data.get('mensagem')
-        if not mensagem:
-            return Response(
-                {'error': 'Mensagem é obrigatória'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        assistant = AIAssistant()
-
-        # Executar processamento assíncrono
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            resultado = loop.run_until_complete(
-                assistant.processar_comando(
-                    mensagem=mensagem,
-                    usuario=request.user
-                )
-            )
-        finally:
-            loop.close()
-
-        return Response(resultado)
-
+# AIAssistantAPIView e o envio de mensagem em conversa estão em async_views.py
 
 # =============================================================================
 # WEBHOOKS
@@ -1055,41 +1233,16 @@ class WhatsAppWebhookAPIView(APIView):
         return Response({'error': 'Invalid token'}, status=403)
 
     def post(self, request):
-        """Processa eventos recebidos do WhatsApp."""
-        from whatsapp_integration.services import whatsapp_service
-
-        payload = request.data
-        resultado = whatsapp_service.processar_webhook(payload)
-
-        if resultado['tipo'] == 'mensagem_recebida':
-            # Processar mensagem recebida
-            telefone = resultado['telefone']
+        """
+        Recebe eventos do WhatsApp.
 
-            # Buscar ou criar conversa
-            try:
-                cliente = Cliente.objects.get(telefone__endswith=telefone[-8:])
-                conversa, _ = Conversa.objects.get_or_create(
-                    cliente=cliente,
-                    telefone=telefone,
-                    defaults={'status': 'ativa'}
-                )
-            except Cliente.DoesNotExist:
-                conversa, _ = Conversa.objects.get_or_create(
-                    telefone=telefone,
-                    defaults={'status': 'ativa'}
-                )
-
-            # Salvar mensagem
-            Mensagem.objects.create(
-                conversa=conversa,
-                direcao='recebida',
-                tipo=resultado.get('tipo_mensagem', 'text'),
-                conteudo=resultado.get('conteudo', ''),
-                wamid=resultado.get('wamid'),
-                status='recebida'
-            )
+        Apenas grava o payload bruto na caixa de entrada e confirma; o
+        processamento (todas as mensagens e status) é feito pelo worker
+        `python manage.py processar_webhooks`.
+        """
+        from whatsapp_integration.models import EventoWebhook
 
-            # TODO: Processar com IA se necessário
+        EventoWebhook.objects.create(payload=request.data)
 
         return Response({'status': 'ok'})
 
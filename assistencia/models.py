@@ -15,6 +15,9 @@ class OrdemServico(models.Model):
     Ordens de serviço para assistência técnica.
     """
 
+    # Numeração: OS{ANO}{000000} (ver numeracao.services)
+    PREFIXO_NUMERO = 'OS'
+
     STATUS_ABERTA = 'aberta'
     STATUS_ANALISE = 'analise'
     STATUS_ORCAMENTO = 'orcamento'
@@ -211,9 +214,8 @@ class OrdemServico(models.Model):
     def save(self, *args, **kwargs):
         # Gerar número da OS automaticamente
         if not self.numero:
-            ultimo = OrdemServico.objects.order_by('-id').first()
-            novo_id = (ultimo.id + 1) if ultimo else 1
-            self.numero = f"OS{timezone.now().year}{novo_id:06d}"
+            from numeracao.services import proximo_numero
+            self.numero = proximo_numero(self.PREFIXO_NUMERO, OrdemServico)
 
         # Calcular valor total
         self.valor_total = self.valor_mao_obra + self.valor_pecas - self.desconto
@@ -162,6 +162,10 @@ class Atendimento(models.Model):
     Registro de atendimento em campo.
     Integra com Agendamento, Cliente, Equipamento e Financeiro.
     """
+    # Numeração: ATD{ANO}{00000} (ver numeracao.services)
+    PREFIXO_NUMERO = 'ATD'
+    DIGITOS_NUMERO = 5
+
     STATUS_CHOICES = [
         ('agendado', 'Agendado'),
         ('em_andamento', 'Em Andamento'),
@@ -365,18 +369,10 @@ class Atendimento(models.Model):
     def save(self, *args, **kwargs):
         # Gerar número automático se não existir
         if not self.numero:
-            ano = timezone.now().year
-            ultimo = Atendimento.objects.filter(
-                numero__startswith=f'ATD{ano}'
-            ).order_by('-numero').first()
-            if ultimo and ultimo.numero:
-                try:
-                    seq = int(ultimo.numero[-5:]) + 1
-                except ValueError:
-                    seq = 1
-            else:
-                seq = 1
-            self.numero = f'ATD{ano}{seq:05d}'
+            from numeracao.services import proximo_numero
+            self.numero = proximo_numero(
+                self.PREFIXO_NUMERO, Atendimento, digitos=self.DIGITOS_NUMERO
+            )
         super().save(*args, **kwargs)
 
     def iniciar(self, latitude=None, longitude=None, endereco=''):
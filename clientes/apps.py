@@ -5,3 +5,7 @@ class ClientesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'clientes'
     verbose_name = 'Gestão de Clientes'
+
+    def ready(self):
+        """Registra signals de cache de telefones."""
+        import clientes.signals  # noqa: F401
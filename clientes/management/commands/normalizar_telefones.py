@@ -0,0 +1,100 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Normalização de Telefones (E.164)
+Preenche whatsapp_e164, telefone_e164 e telefone_secundario_e164
+=============================================================================
+
+Executar uma vez após a migração (e após importações em massa):
+    python manage.py normalizar_telefones
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from clientes.models import Cliente
+from clientes.telefones import invalidar_telefones, normalizar_telefone
+
+TAMANHO_LOTE = 2000
+
+
+class Command(BaseCommand):
+    help = 'Preenche as colunas de telefone normalizado (E.164) dos clientes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--todos',
+            action='store_true',
+            help='Recalcula também clientes que já possuem telefones normalizados'
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+
+        clientes = Cliente.objects.only(
+            'id', 'whatsapp', 'telefone', 'telefone_secundario',
+            'whatsapp_e164', 'telefone_e164', 'telefone_secundario_e164'
+        ).order_by('id')
+        if not options['todos']:
+            clientes = clientes.filter(
+                whatsapp_e164__isnull=True,
+                telefone_e164__isnull=True,
+                telefone_secundario_e164__isnull=True
+            )
+
+        # whatsapp_e164 é único: números iguais após normalização ficam só no 1º cliente
+        whatsapps_usados = set(
+            Cliente.objects.exclude(whatsapp_e164__isnull=True)
+            .exclude(pk__in=clientes.values('pk'))
+            .values_list('whatsapp_e164', flat=True)
+        )
+
+        atualizados = 0
+        duplicados = []
+        lote = []
+
+        for cliente in clientes.iterator(chunk_size=TAMANHO_LOTE):
+            whatsapp = normalizar_telefone(cliente.whatsapp)
+            if whatsapp and whatsapp in whatsapps_usados:
+                duplicados.append((cliente.pk, cliente.whatsapp))
+                whatsapp = None
+            elif whatsapp:
+                whatsapps_usados.add(whatsapp)
+
+            cliente.whatsapp_e164 = whatsapp
+            cliente.telefone_e164 = normalizar_telefone(cliente.telefone)
+            cliente.telefone_secundario_e164 = normalizar_telefone(cliente.telefone_secundario)
+            lote.append(cliente)
+
+            if len(lote) >= TAMANHO_LOTE:
+                atualizados += self._gravar(lote)
+                lote = []
+
+        if lote:
+            atualizados += self._gravar(lote)
+
+        self.stdout.write(f"Clientes atualizados: {atualizados}")
+        for cliente_id, whatsapp in duplicados:
+            self.stdout.write(self.style.WARNING(
+                f"  ⚠️ Cliente {cliente_id}: WhatsApp {whatsapp} duplicado após normalização"
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Normalização concluída em {(time.perf_counter() - inicio) * 1000:.0f} ms"
+        ))
+
+    def _gravar(self, lote):
+        with transaction.atomic():
+            Cliente.objects.bulk_update(
+                lote,
+                ['whatsapp_e164', 'telefone_e164', 'telefone_secundario_e164']
+            )
+
+        # bulk_update não dispara signals: resultados em cache (inclusive
+        # "sem cliente") desses números ficam inválidos
+        invalidar_telefones(*{
+            numero
+            for c in lote
+            for numero in (c.whatsapp_e164, c.telefone_e164, c.telefone_secundario_e164)
+        })
+        return len(lote)
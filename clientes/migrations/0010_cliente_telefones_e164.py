@@ -0,0 +1,28 @@
+# Generated by Django 4.2.10 on 2026-10-19 01:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0009_add_observacao_geral'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='telefone_e164',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20, null=True, verbose_name='Telefone (E.164)'),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='telefone_secundario_e164',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20, null=True, verbose_name='Telefone Secundário (E.164)'),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='whatsapp_e164',
+            field=models.CharField(blank=True, editable=False, max_length=20, null=True, unique=True, verbose_name='WhatsApp (E.164)'),
+        ),
+    ]
@@ -197,6 +197,32 @@ class Cliente(models.Model):
         blank=True,
         verbose_name='Telefone Secundário'
     )
+
+    # Telefones normalizados em E.164 (preenchidos no save; ver clientes/telefones.py)
+    whatsapp_e164 = models.CharField(
+        max_length=20,
+        null=True,
+        blank=True,
+        unique=True,
+        editable=False,
+        verbose_name='WhatsApp (E.164)'
+    )
+    telefone_e164 = models.CharField(
+        max_length=20,
+        null=True,
+        blank=True,
+        db_index=True,
+        editable=False,
+        verbose_name='Telefone (E.164)'
+    )
+    telefone_secundario_e164 = models.CharField(
+        max_length=20,
+        null=True,
+        blank=True,
+        db_index=True,
+        editable=False,
+        verbose_name='Telefone Secundário (E.164)'
+    )
     email = models.EmailField(
         null=True,
         blank=True,
@@ -392,6 +418,34 @@ class Cliente(models.Model):
     def __str__(self):
         return f"{self.nome} ({self.telefone})"
 
+    def normalizar_telefones(self):
+        """
+        Preenche as colunas E.164 a partir dos telefones digitados.
+
+        whatsapp_e164 é único: se outro cliente já tem o mesmo número
+        (cadastros antigos em formatos diferentes), a coluna fica vazia
+        neste cliente em vez de impedir o save.
+        """
+        from clientes.telefones import normalizar_telefone
+
+        whatsapp = normalizar_telefone(self.whatsapp)
+        if whatsapp and whatsapp != self.whatsapp_e164 and Cliente.objects.filter(
+            whatsapp_e164=whatsapp
+        ).exclude(pk=self.pk).exists():
+            whatsapp = None
+        self.whatsapp_e164 = whatsapp
+        self.telefone_e164 = normalizar_telefone(self.telefone)
+        self.telefone_secundario_e164 = normalizar_telefone(self.telefone_secundario)
+
+    def save(self, *args, **kwargs):
+        self.normalizar_telefones()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {
+                'whatsapp_e164', 'telefone_e164', 'telefone_secundario_e164'
+            }
+        super().save(*args, **kwargs)
+
     @property
     def endereco_principal(self):
         """Retorna o endereço principal do cliente"""
@@ -0,0 +1,39 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Signals de Clientes
+=============================================================================
+
+1. Ao alterar/remover Cliente → Invalida o cache telefone → cliente
+   (números antigos e novos, nos dois níveis de cache)
+"""
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+CAMPOS_E164 = ('whatsapp_e164', 'telefone_e164', 'telefone_secundario_e164')
+
+
+@receiver(pre_save, sender='clientes.Cliente')
+def guardar_telefones_anteriores(sender, instance, **kwargs):
+    """Guarda os telefones E.164 anteriores para invalidar o cache."""
+    if not instance.pk:
+        instance._telefones_anteriores = ()
+        return
+
+    from clientes.models import Cliente
+
+    instance._telefones_anteriores = Cliente.objects.filter(
+        pk=instance.pk
+    ).values_list(*CAMPOS_E164).first() or ()
+
+
+@receiver(post_save, sender='clientes.Cliente')
+@receiver(post_delete, sender='clientes.Cliente')
+def invalidar_cache_telefones(sender, instance, **kwargs):
+    """Remove do cache os números antigos e novos do cliente."""
+    from clientes.telefones import invalidar_telefones
+
+    atuais = tuple(getattr(instance, campo) for campo in CAMPOS_E164)
+    anteriores = getattr(instance, '_telefones_anteriores', ())
+
+    invalidar_telefones(*set(atuais + tuple(anteriores)))
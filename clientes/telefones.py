@@ -0,0 +1,191 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Telefones Normalizados (E.164)
+Normalização com phonenumbers e resolução telefone → cliente com cache
+=============================================================================
+
+Cliente.save() grava whatsapp_e164, telefone_e164 e telefone_secundario_e164
+(ex: '(11) 98888-7777', '5511988887777' e '+55 11 98888-7777' viram
+'+5511988887777'). A busca por telefone passa a ser igualdade em coluna
+indexada, em vez de `telefone__endswith` (varredura completa).
+whatsapp_e164 é único: um cliente cujo WhatsApp normalizado já pertence a
+outro fica com a coluna vazia (normalizar_telefones lista esses casos).
+
+resolver_cliente_por_telefone() usa dois níveis de cache:
+- LRU em memória do processo (sem ida à rede; TTL de 60 s)
+- Cache compartilhado do Django (Redis em produção)
+Os signals de Cliente invalidam o cache compartilhado e o LRU do processo
+que salvou; nos demais processos a entrada expira pelo TTL do LRU.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import phonenumbers
+from django.core.cache import cache
+from django.db.models import Case, IntegerField, Q, Value, When
+
+logger = logging.getLogger(__name__)
+
+REGIAO_PADRAO = 'BR'
+
+CACHE_PREFIXO = 'clientes:telefone:'
+CACHE_TIMEOUT = 60 * 60
+LRU_TAMANHO = 4096
+LRU_TTL = 60
+
+# Valor guardado no cache para "nenhum cliente" (distingue de ausência no cache)
+SEM_CLIENTE = 0
+
+
+def normalizar_telefone(numero: str, regiao: str = REGIAO_PADRAO) -> Optional[str]:
+    """
+    Normaliza um telefone para E.164 ('+5511988887777').
+
+    Aceita números com ou sem DDI, com máscara, e o wa_id do WhatsApp.
+    Celulares brasileiros sem o nono dígito (formato antigo, ainda usado
+    em wa_ids) recebem o 9.
+
+    Returns:
+        str ou None se o número não for um telefone possível
+    """
+    if not numero:
+        return None
+
+    digitos = ''.join(filter(str.isdigit, str(numero)))
+    if not digitos:
+        return None
+
+    # Com DDI explícito ('+55...') ou no formato wa_id (DDI sem '+')
+    if str(numero).strip().startswith('+') or len(digitos) > 11:
+        texto = f'+{digitos}'
+    else:
+        texto = digitos
+
+    try:
+        telefone = phonenumbers.parse(texto, regiao)
+    except phonenumbers.NumberParseException:
+        return None
+
+    if telefone.country_code == 55:
+        nacional = str(telefone.national_number)
+        # DDD + 8 dígitos começando em 6-9 = celular sem o nono dígito
+        if len(nacional) == 10 and nacional[2] in '6789':
+            telefone.national_number = int(f'{nacional[:2]}9{nacional[2:]}')
+
+    if not phonenumbers.is_possible_number(telefone):
+        return None
+
+    return phonenumbers.format_number(telefone, phonenumbers.PhoneNumberFormat.E164)
+
+
+def telefone_da_busca(termo: str) -> Optional[str]:
+    """
+    E.164 do termo de busca se ele for um telefone (só dígitos/máscara,
+    10+ dígitos); None para nomes, CPFs com pontuação, e-mails etc.
+    """
+    if not termo or any(c not in '0123456789+()- .' for c in termo.strip()):
+        return None
+    if sum(c.isdigit() for c in termo) < 10 or '.' in termo:
+        return None
+    return normalizar_telefone(termo)
+
+
+def filtro_telefone(e164: str) -> Q:
+    """Q sobre as três colunas E.164 indexadas."""
+    return Q(whatsapp_e164=e164) | Q(telefone_e164=e164) | Q(telefone_secundario_e164=e164)
+
+
+# =============================================================================
+# CACHE
+# =============================================================================
+
+class _CacheLRU:
+    """LRU thread-safe com TTL por entrada (cache local do processo)."""
+
+    def __init__(self, tamanho: int, ttl: float):
+        self.tamanho = tamanho
+        self.ttl = ttl
+        self._dados = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, chave):
+        with self._lock:
+            item = self._dados.get(chave)
+            if item is None:
+                return None
+            valor, expira = item
+            if expira < time.monotonic():
+                del self._dados[chave]
+                return None
+            self._dados.move_to_end(chave)
+            return valor
+
+    def definir(self, chave, valor):
+        with self._lock:
+            self._dados[chave] = (valor, time.monotonic() + self.ttl)
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.tamanho:
+                self._dados.popitem(last=False)
+
+    def remover(self, chave):
+        with self._lock:
+            self._dados.pop(chave, None)
+
+    def limpar(self):
+        with self._lock:
+            self._dados.clear()
+
+
+_lru = _CacheLRU(LRU_TAMANHO, LRU_TTL)
+
+
+def _buscar_cliente_id(e164: str) -> int:
+    """Consulta nas colunas E.164 (WhatsApp tem prioridade; sem MultipleObjectsReturned)."""
+    from clientes.models import Cliente
+
+    cliente_id = Cliente.objects.filter(filtro_telefone(e164)).annotate(
+        prioridade=Case(
+            When(whatsapp_e164=e164, then=Value(0)),
+            When(telefone_e164=e164, then=Value(1)),
+            default=Value(2),
+            output_field=IntegerField(),
+        )
+    ).order_by('prioridade', 'id').values_list('id', flat=True).first()
+
+    return cliente_id or SEM_CLIENTE
+
+
+def resolver_cliente_por_telefone(numero: str) -> Optional[int]:
+    """
+    ID do cliente dono do telefone (qualquer formato), ou None.
+
+    Ordem: LRU do processo → cache compartilhado → banco (índices E.164).
+    """
+    e164 = normalizar_telefone(numero)
+    if not e164:
+        return None
+
+    cliente_id = _lru.obter(e164)
+    if cliente_id is None:
+        chave = f'{CACHE_PREFIXO}{e164}'
+        cliente_id = cache.get(chave)
+        if cliente_id is None:
+            cliente_id = _buscar_cliente_id(e164)
+            cache.set(chave, cliente_id, CACHE_TIMEOUT)
+        _lru.definir(e164, cliente_id)
+
+    return cliente_id or None
+
+
+def invalidar_telefones(*numeros_e164: str):
+    """Remove números dos dois níveis de cache (chamado pelos signals)."""
+    numeros = [n for n in numeros_e164 if n]
+    if not numeros:
+        return
+    for numero in numeros:
+        _lru.remover(numero)
+    cache.delete_many([f'{CACHE_PREFIXO}{n}' for n in numeros])
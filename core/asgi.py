@@ -0,0 +1,15 @@
+"""
+ASGI config for Life Rainbow 2.0 project.
+
+Views assíncronas (WhatsApp e assistente de IA) só liberam o worker durante
+as chamadas externas quando servidas via ASGI:
+
+    gunicorn core.asgi:application -k uvicorn.workers.UvicornWorker
+"""
+
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+application = get_asgi_application()
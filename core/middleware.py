@@ -0,0 +1,41 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Middlewares do Projeto
+=============================================================================
+"""
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+class WhiteNoiseAsyncMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise compatível com ASGI.
+
+    O WhiteNoiseMiddleware 6.x é apenas síncrono: sob ASGI o Django executa
+    toda a cadeia abaixo dele em uma thread por requisição, e as views
+    assíncronas (api/async_views.py) deixam de atender requisições em
+    paralelo. Aqui só a busca/entrega do arquivo estático roda em thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
@@ -61,6 +61,7 @@ INSTALLED_APPS = [
     'assistencia.apps.AssistenciaConfig',
     'estoque.apps.EstoqueConfig',
     'atendimentos.apps.AtendimentosConfig',  # Sistema de Atendimentos em Campo
+    'numeracao.apps.NumeracaoConfig',  # Numeração de documentos (V, A, OS, ATD)
     'whatsapp_integration.apps.WhatsappIntegrationConfig',
     'ai_assistant.apps.AiAssistantConfig',
     'api.apps.ApiConfig',
@@ -69,7 +70,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.WhiteNoiseAsyncMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -97,6 +98,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'core.wsgi.application'
+ASGI_APPLICATION = 'core.asgi.application'
 
 # =============================================================================
 # DATABASE
@@ -218,6 +220,23 @@ CORS_ALLOW_CREDENTIALS = True
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', '')
 OPENAI_MODEL = os.environ.get('OPENAI_MODEL', 'gpt-4o-mini')
 OPENAI_MAX_TOKENS = int(os.environ.get('OPENAI_MAX_TOKENS', '2000'))
+# Endpoint alternativo (proxy/gateway compatível); vazio = API oficial
+OPENAI_BASE_URL = os.environ.get('OPENAI_BASE_URL') or None
+
+# Funções do assistente: threads para o ORM e timeout padrão por função (s)
+AI_FERRAMENTAS_WORKERS = int(os.environ.get('AI_FERRAMENTAS_WORKERS', '8'))
+AI_FERRAMENTA_TIMEOUT = float(os.environ.get('AI_FERRAMENTA_TIMEOUT', '15'))
+# Cache dos resultados das funções somente leitura (TTL por função no executor)
+AI_CACHE_FERRAMENTAS = os.environ.get('AI_CACHE_FERRAMENTAS', 'True').lower() == 'true'
+# Memória de conversa: orçamento de tokens do histórico (resumo incluso),
+# limite por resultado de função, resumo dos turnos antigos e expiração da sessão
+AI_MEMORIA_TOKENS = int(os.environ.get('AI_MEMORIA_TOKENS', '4000'))
+AI_MEMORIA_TOKENS_FERRAMENTA = int(os.environ.get('AI_MEMORIA_TOKENS_FERRAMENTA', '800'))
+AI_MEMORIA_RESUMO = os.environ.get('AI_MEMORIA_RESUMO', 'True').lower() == 'true'
+AI_MEMORIA_TOKENS_RESUMO = int(os.environ.get('AI_MEMORIA_TOKENS_RESUMO', '400'))
+AI_SESSAO_EXPIRA_HORAS = int(os.environ.get('AI_SESSAO_EXPIRA_HORAS', '12'))
+# Índice de busca textual nas anotações dos clientes (indexar_anotacoes)
+AI_INDICE_ANOTACOES_DIR = os.environ.get('AI_INDICE_ANOTACOES_DIR') or BASE_DIR / 'indices' / 'anotacoes'
 
 # =============================================================================
 # GOOGLE MAPS API SETTINGS (Life Rainbow - API separada do iCiclo)
@@ -235,6 +254,29 @@ WHATSAPP_ACCESS_TOKEN = os.environ.get('WHATSAPP_ACCESS_TOKEN', '')
 WHATSAPP_VERIFY_TOKEN = os.environ.get('WHATSAPP_VERIFY_TOKEN', '')
 WHATSAPP_WEBHOOK_SECRET = os.environ.get('WHATSAPP_WEBHOOK_SECRET', '')
 
+# Pool de conexões do cliente HTTP (um por processo)
+WHATSAPP_HTTP2 = os.environ.get('WHATSAPP_HTTP2', 'True').lower() == 'true'
+WHATSAPP_HTTP_MAX_CONEXOES = int(os.environ.get('WHATSAPP_HTTP_MAX_CONEXOES', '100'))
+WHATSAPP_HTTP_MAX_KEEPALIVE = int(os.environ.get('WHATSAPP_HTTP_MAX_KEEPALIVE', '20'))
+WHATSAPP_HTTP_KEEPALIVE_EXPIRY = float(os.environ.get('WHATSAPP_HTTP_KEEPALIVE_EXPIRY', '60'))
+
+# Campanhas: taxa sustentada (Cloud API aceita até 80 msgs/s por número) e envios simultâneos
+WHATSAPP_CAMPANHA_TAXA = float(os.environ.get('WHATSAPP_CAMPANHA_TAXA', '20'))
+WHATSAPP_CAMPANHA_CONCORRENCIA = int(os.environ.get('WHATSAPP_CAMPANHA_CONCORRENCIA', '10'))
+
+# Áudios TTS: threads de síntese e validade do media_id em cache (a API guarda mídias por 30 dias)
+WHATSAPP_TTS_WORKERS = int(os.environ.get('WHATSAPP_TTS_WORKERS', '4'))
+WHATSAPP_MEDIA_ID_VALIDADE_DIAS = int(os.environ.get('WHATSAPP_MEDIA_ID_VALIDADE_DIAS', '29'))
+
+# Download de mídias recebidas: downloads simultâneos por worker
+WHATSAPP_MIDIA_CONCORRENCIA = int(os.environ.get('WHATSAPP_MIDIA_CONCORRENCIA', '5'))
+
+# Caixa de saída: envios simultâneos, tentativas antes do descarte e espera exponencial (s)
+WHATSAPP_SAIDA_CONCORRENCIA = int(os.environ.get('WHATSAPP_SAIDA_CONCORRENCIA', '10'))
+WHATSAPP_SAIDA_MAX_TENTATIVAS = int(os.environ.get('WHATSAPP_SAIDA_MAX_TENTATIVAS', '6'))
+WHATSAPP_SAIDA_ESPERA_BASE = float(os.environ.get('WHATSAPP_SAIDA_ESPERA_BASE', '2'))
+WHATSAPP_SAIDA_ESPERA_MAX = float(os.environ.get('WHATSAPP_SAIDA_ESPERA_MAX', '300'))
+
 # =============================================================================
 # CELERY SETTINGS
 # =============================================================================
@@ -240,7 +240,7 @@ class ContaReceber(models.Model):
 
     @property
     def dias_atraso(self):
-        if self.status == self.STATUS_PENDENTE and self.data_vencimento < timezone.now().date():
+        if self.status in [self.STATUS_PENDENTE, self.STATUS_ATRASADA] and self.data_vencimento < timezone.now().date():
             return (timezone.now().date() - self.data_vencimento).days
         return 0
 
@@ -0,0 +1,20 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Admin de Numeração
+=============================================================================
+"""
+
+from django.contrib import admin
+
+from .models import SequenciaNumeracao
+
+
+@admin.register(SequenciaNumeracao)
+class SequenciaNumeracaoAdmin(admin.ModelAdmin):
+    """Admin para sequências de numeração (somente leitura)."""
+    list_display = ['prefixo', 'ano', 'ultimo_valor', 'updated_at']
+    list_filter = ['prefixo', 'ano']
+    readonly_fields = ['prefixo', 'ano', 'ultimo_valor', 'created_at', 'updated_at']
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class NumeracaoConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'numeracao'
+    verbose_name = 'Numeração de Documentos'
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.10 on 2026-10-19 01:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SequenciaNumeracao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefixo', models.CharField(max_length=10, verbose_name='Prefixo')),
+                ('ano', models.IntegerField(verbose_name='Ano')),
+                ('ultimo_valor', models.BigIntegerField(default=0, verbose_name='Último Valor Emitido')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Sequência de Numeração',
+                'verbose_name_plural': 'Sequências de Numeração',
+                'ordering': ['prefixo', '-ano'],
+                'unique_together': {('prefixo', 'ano')},
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Numeração de Documentos
+Model: SequenciaNumeracao (contador por prefixo e ano)
+=============================================================================
+"""
+
+from django.db import models
+
+
+class SequenciaNumeracao(models.Model):
+    """
+    Contador de numeração por prefixo e ano (ex: V2026, A2026, OS2026).
+
+    Usado pelo serviço de numeração em bancos sem sequências nativas;
+    no PostgreSQL são usadas SEQUENCEs (ver numeracao.services).
+    """
+
+    prefixo = models.CharField(
+        max_length=10,
+        verbose_name='Prefixo'
+    )
+    ano = models.IntegerField(
+        verbose_name='Ano'
+    )
+    ultimo_valor = models.BigIntegerField(
+        default=0,
+        verbose_name='Último Valor Emitido'
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Sequência de Numeração'
+        verbose_name_plural = 'Sequências de Numeração'
+        unique_together = ['prefixo', 'ano']
+        ordering = ['prefixo', '-ano']
+
+    def __str__(self):
+        return f"{self.prefixo}{self.ano} → {self.ultimo_valor}"
@@ -0,0 +1,138 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Serviço de Numeração de Documentos
+Números sequenciais por prefixo e ano, seguros para inserções concorrentes
+=============================================================================
+
+Formato: {PREFIXO}{ANO}{SEQUENCIAL} (ex: V2026000042, OS2026000007)
+
+- PostgreSQL: uma SEQUENCE por prefixo/ano (nextval não bloqueia outras
+  transações; números de transações desfeitas são perdidos)
+- Demais bancos: linha de SequenciaNumeracao incrementada com UPDATE,
+  que mantém o lock da linha até o fim da transação
+
+Na primeira emissão de um prefixo/ano o contador parte do maior número
+já existente na tabela do modelo, preservando a numeração anterior.
+"""
+
+import logging
+import re
+from typing import List
+
+from django.db import connection, transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from .models import SequenciaNumeracao
+
+logger = logging.getLogger(__name__)
+
+PREFIXO_VALIDO = re.compile(r'^[A-Z]{1,10}$')
+
+# Sequências do PostgreSQL já garantidas (e commitadas) neste processo
+_sequencias_criadas = set()
+
+
+def _maior_sequencial(modelo, campo: str, prefixo: str, ano: int) -> int:
+    """Maior sequencial já emitido para prefixo/ano na tabela do modelo."""
+    inicio = f"{prefixo}{ano}"
+    maior = modelo.objects.filter(
+        **{f'{campo}__startswith': inicio}
+    ).aggregate(maior=Max(campo))['maior']
+
+    if not maior:
+        return 0
+
+    try:
+        return int(maior[len(inicio):])
+    except ValueError:
+        return 0
+
+
+def _reservar_postgresql(prefixo, ano, quantidade, modelo, campo) -> List[int]:
+    nome = f"numeracao_{prefixo.lower()}_{ano}"
+
+    with connection.cursor() as cursor:
+        if nome not in _sequencias_criadas:
+            cursor.execute("SELECT to_regclass(%s)", [nome])
+            if cursor.fetchone()[0] is None:
+                semente = _maior_sequencial(modelo, campo, prefixo, ano)
+                cursor.execute(
+                    f"CREATE SEQUENCE IF NOT EXISTS {nome} START WITH {semente + 1}"
+                )
+                logger.info(f"🔢 Sequência {nome} criada a partir de {semente + 1}")
+            # CREATE SEQUENCE é desfeito junto com a transação de quem chamou
+            # (ex: venda que falhou na validação): só lembra após o commit
+            transaction.on_commit(lambda: _sequencias_criadas.add(nome))
+
+        cursor.execute(
+            "SELECT nextval(%s) FROM generate_series(1, %s)",
+            [nome, quantidade]
+        )
+        return [linha[0] for linha in cursor.fetchall()]
+
+
+def _reservar_contador(prefixo, ano, quantidade, modelo, campo) -> List[int]:
+    with transaction.atomic():
+        contador = SequenciaNumeracao.objects.filter(prefixo=prefixo, ano=ano)
+
+        if not contador.update(ultimo_valor=F('ultimo_valor') + quantidade):
+            SequenciaNumeracao.objects.get_or_create(
+                prefixo=prefixo,
+                ano=ano,
+                defaults={'ultimo_valor': _maior_sequencial(modelo, campo, prefixo, ano)}
+            )
+            contador.update(ultimo_valor=F('ultimo_valor') + quantidade)
+
+        ultimo = contador.values_list('ultimo_valor', flat=True).get()
+
+    return list(range(ultimo - quantidade + 1, ultimo + 1))
+
+
+def reservar_numeros(
+    prefixo: str,
+    modelo,
+    quantidade: int = 1,
+    digitos: int = 6,
+    campo: str = 'numero',
+    ano: int = None,
+) -> List[str]:
+    """
+    Reserva um bloco de números de documento.
+
+    Uma única ida ao banco para qualquer quantidade (útil em importações).
+
+    Args:
+        prefixo: Prefixo do documento (ex: 'V', 'A', 'OS', 'ATD')
+        modelo: Model numerado (usado para iniciar o contador)
+        quantidade: Quantos números reservar
+        digitos: Dígitos do sequencial
+        campo: Campo do número no modelo
+        ano: Ano da numeração (padrão: ano atual)
+
+    Returns:
+        list: Números formatados, em ordem crescente
+    """
+    if not PREFIXO_VALIDO.match(prefixo):
+        raise ValueError(f"Prefixo de numeração inválido: {prefixo!r}")
+    if quantidade < 1:
+        return []
+
+    ano = ano or timezone.localdate().year
+
+    if connection.vendor == 'postgresql':
+        valores = _reservar_postgresql(prefixo, ano, quantidade, modelo, campo)
+    else:
+        valores = _reservar_contador(prefixo, ano, quantidade, modelo, campo)
+
+    return [f"{prefixo}{ano}{valor:0{digitos}d}" for valor in valores]
+
+
+def proximo_numero(prefixo: str, modelo, digitos: int = 6, campo: str = 'numero') -> str:
+    """
+    Próximo número de documento para o prefixo no ano atual.
+
+    Exemplo:
+        self.numero = proximo_numero('V', Venda)  # V2026000001
+    """
+    return reservar_numeros(prefixo, modelo, 1, digitos=digitos, campo=campo)[0]
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Benchmark das Views Assíncronas
+Vazão com muitas requisições em andamento: workers síncronos × ASGI
+=============================================================================
+
+USO:
+    python scripts/benchmark_async.py --requisicoes 200 --workers 4 --latencia-ms 500
+
+Sobe um servidor local que imita a OpenAI (/chat/completions) e a Graph API
+(/{phone_number_id}/messages) com latência fixa e chama os endpoints
+POST /api/v1/ai/comando/ e POST /api/v1/conversas/{id}/enviar_mensagem/
+de duas formas:
+
+    - sincrono:   `--workers` threads, cada requisição prende uma thread
+                  durante a chamada externa (como workers síncronos do gunicorn)
+    - assincrono: um único event loop (como um worker uvicorn) com todas as
+                  requisições em andamento ao mesmo tempo (até `--concorrencia`)
+
+Requer banco migrado (cria e remove um usuário e uma conversa de teste).
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Configurar Django
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+import django
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import AsyncClient, Client
+from django.utils import timezone
+
+from api.async_views import AIAssistantAPIView, ConversaEnviarMensagemAPIView
+from whatsapp_integration.models import Conversa
+from whatsapp_integration.services import whatsapp_service
+
+logging.getLogger('httpx').setLevel(logging.WARNING)
+logging.getLogger('openai').setLevel(logging.WARNING)
+logging.getLogger('ai_assistant').setLevel(logging.WARNING)
+
+
+class MockAPIHandler(BaseHTTPRequestHandler):
+    """Responde como a OpenAI (chat completions) e a Graph API (messages)."""
+    protocol_version = 'HTTP/1.1'
+    latencia = 0.0
+    contador = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        tamanho = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(tamanho)
+
+        with self.lock:
+            MockAPIHandler.contador += 1
+            numero = MockAPIHandler.contador
+
+        time.sleep(self.latencia)
+
+        if self.path.endswith('/chat/completions'):
+            resposta = {
+                'id': f'chatcmpl-{numero}',
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': settings.OPENAI_MODEL,
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': 'Tudo certo por aqui.'},
+                    'finish_reason': 'stop',
+                }],
+                'usage': {'prompt_tokens': 10, 'completion_tokens': 5, 'total_tokens': 15},
+            }
+        else:
+            resposta = {'messaging_product': 'whatsapp', 'messages': [{'id': f'wamid.BENCH{numero}'}]}
+
+        corpo = json.dumps(resposta).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+class MockServidor(ThreadingHTTPServer):
+    # Fila de conexões grande o bastante para todas as requisições simultâneas
+    request_queue_size = 1024
+
+
+def iniciar_servidor(latencia_ms: float) -> ThreadingHTTPServer:
+    MockAPIHandler.latencia = latencia_ms / 1000
+    servidor = MockServidor(('127.0.0.1', 0), MockAPIHandler)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def rodar_sincrono(usuario, url: str, corpo: dict, total: int, workers: int) -> int:
+    """Cada requisição ocupa uma thread (worker) até a resposta."""
+    locais = threading.local()
+
+    def requisitar(_):
+        if not hasattr(locais, 'cliente'):
+            locais.cliente = Client()
+            locais.cliente.force_login(usuario)
+        resposta = locais.cliente.post(url, corpo, content_type='application/json')
+        return resposta.status_code == 200
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(requisitar, range(total)))
+
+
+def rodar_assincrono(usuario, url: str, corpo: dict, total: int, concorrencia: int) -> int:
+    """Todas as requisições no mesmo event loop."""
+    cliente = AsyncClient()
+    cliente.force_login(usuario)
+
+    async def executar():
+        semaforo = asyncio.Semaphore(concorrencia)
+
+        async def requisitar():
+            async with semaforo:
+                resposta = await cliente.post(url, corpo, content_type='application/json')
+                return resposta.status_code == 200
+
+        return sum(await asyncio.gather(*(requisitar() for _ in range(total))))
+
+    return asyncio.run(executar())
+
+
+def medir(nome: str, funcao, *args) -> float:
+    inicio = time.perf_counter()
+    sucesso = funcao(*args)
+    duracao = time.perf_counter() - inicio
+    taxa = sucesso / duracao if duracao else 0
+    print(f'  {nome:<11} {sucesso:>5} req em {duracao:6.2f}s → {taxa:7.1f} req/s')
+    return taxa
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark das views assíncronas')
+    parser.add_argument('--requisicoes', type=int, default=200, help='Requisições por rodada')
+    parser.add_argument('--workers', type=int, default=4, help='Threads do modo síncrono')
+    parser.add_argument('--concorrencia', type=int, default=100, help='Requisições simultâneas no modo assíncrono')
+    parser.add_argument('--latencia-ms', type=float, default=500, help='Latência simulada da OpenAI/Graph API')
+    args = parser.parse_args()
+
+    servidor = iniciar_servidor(args.latencia_ms)
+    base = f'http://127.0.0.1:{servidor.server_address[1]}'
+
+    settings.OPENAI_BASE_URL = f'{base}/v1'
+    settings.OPENAI_API_KEY = settings.OPENAI_API_KEY or 'BENCH'
+    whatsapp_service.api_url = base
+    whatsapp_service.phone_number_id = 'BENCH'
+    whatsapp_service.headers['Authorization'] = 'Bearer BENCH'
+
+    # Host padrão do cliente de teste do Django
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+
+    # O benchmark mede o servidor, não o limite de requisições por usuário
+    AIAssistantAPIView.throttle_classes = []
+    ConversaEnviarMensagemAPIView.throttle_classes = []
+
+    usuario, _ = User.objects.get_or_create(username='benchmark_async')
+    conversa = Conversa.objects.create(
+        wa_id='BENCH-ASYNC', telefone='5511999990000', ultima_mensagem_cliente=timezone.now()
+    )
+
+    endpoints = [
+        ('IA', '/api/v1/ai/comando/', {'mensagem': 'Resumo do dia'}),
+        ('WhatsApp', f'/api/v1/conversas/{conversa.pk}/enviar_mensagem/', {'texto': 'Olá!'}),
+    ]
+
+    print(f'Mock OpenAI/Graph API em {base} | {args.requisicoes} requisições, '
+          f'latência {args.latencia_ms} ms | síncrono: {args.workers} workers | '
+          f'assíncrono: 1 event loop, concorrência {args.concorrencia}\n')
+
+    try:
+        for nome, url, corpo in endpoints:
+            print(nome)
+            sincrono = medir('sincrono', rodar_sincrono, usuario, url, corpo, args.requisicoes, args.workers)
+            assincrono = medir('assincrono', rodar_assincrono, usuario, url, corpo, args.requisicoes, args.concorrencia)
+            if sincrono:
+                print(f'  Ganho: {assincrono / sincrono:.1f}x\n')
+    finally:
+        conversa.delete()
+        usuario.delete()
+        whatsapp_service.fechar()
+        servidor.shutdown()
+
+
+if __name__ == '__main__':
+    main()
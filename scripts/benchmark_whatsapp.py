@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Benchmark do Cliente HTTP do WhatsApp
+Compara mensagens/segundo: cliente novo por mensagem × cliente compartilhado
+=============================================================================
+
+USO:
+    python scripts/benchmark_whatsapp.py --mensagens 500 --concorrencia 20
+
+Sobe um servidor local que imita o endpoint /{phone_number_id}/messages da
+Graph API (HTTP/1.1 com keep-alive, latência opcional) e envia as mesmas
+mensagens de duas formas:
+
+    - antes:  um httpx.AsyncClient novo por mensagem (comportamento anterior)
+    - depois: WhatsAppService com o cliente HTTP compartilhado do processo
+
+O servidor local não usa TLS: em produção a economia por conexão reaproveitada
+é maior (handshake TLS com graph.facebook.com).
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Configurar Django
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+import django
+django.setup()
+
+import httpx
+from whatsapp_integration.services import WhatsAppService
+
+logging.getLogger('httpx').setLevel(logging.WARNING)
+
+
+class MockGraphAPIHandler(BaseHTTPRequestHandler):
+    """Responde como a Graph API a envios de mensagem."""
+    protocol_version = 'HTTP/1.1'
+    latencia = 0.0
+    conexoes = set()
+    contador = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        tamanho = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(tamanho)
+
+        with self.lock:
+            MockGraphAPIHandler.contador += 1
+            MockGraphAPIHandler.conexoes.add(self.client_address)
+            numero = MockGraphAPIHandler.contador
+
+        if self.latencia:
+            time.sleep(self.latencia)
+
+        corpo = json.dumps({
+            'messaging_product': 'whatsapp',
+            'messages': [{'id': f'wamid.BENCH{numero}'}],
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+def iniciar_servidor(latencia_ms: float) -> ThreadingHTTPServer:
+    MockGraphAPIHandler.latencia = latencia_ms / 1000
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), MockGraphAPIHandler)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def payload(i: int) -> dict:
+    return {
+        'messaging_product': 'whatsapp',
+        'to': '5511999990000',
+        'type': 'text',
+        'text': {'body': f'Mensagem de benchmark {i}'},
+    }
+
+
+async def enviar_antes(url: str, total: int, concorrencia: int) -> int:
+    """Comportamento anterior: cliente (e conexão) novo por mensagem."""
+    semaforo = asyncio.Semaphore(concorrencia)
+
+    async def enviar(i):
+        async with semaforo:
+            async with httpx.AsyncClient() as client:
+                response = await client.post(url, json=payload(i), timeout=30.0)
+                return response.status_code == 200
+
+    return sum(await asyncio.gather(*(enviar(i) for i in range(total))))
+
+
+async def enviar_depois(servico: WhatsAppService, total: int, concorrencia: int) -> int:
+    """Cliente compartilhado do WhatsAppService."""
+    semaforo = asyncio.Semaphore(concorrencia)
+
+    async def enviar(i):
+        async with semaforo:
+            resultado = await servico._fazer_requisicao(payload(i))
+            return resultado.get('success', False)
+
+    return sum(await asyncio.gather(*(enviar(i) for i in range(total))))
+
+
+def medir(nome: str, corrotina) -> float:
+    MockGraphAPIHandler.conexoes = set()
+    inicio = time.perf_counter()
+    sucesso = asyncio.run(corrotina)
+    duracao = time.perf_counter() - inicio
+    taxa = sucesso / duracao if duracao else 0
+    print(
+        f'{nome:<8} {sucesso:>6} msgs em {duracao:6.2f}s → {taxa:8.1f} msgs/s '
+        f'({len(MockGraphAPIHandler.conexoes)} conexões TCP)'
+    )
+    return taxa
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do cliente HTTP do WhatsApp')
+    parser.add_argument('--mensagens', type=int, default=500, help='Mensagens por rodada')
+    parser.add_argument('--concorrencia', type=int, default=20, help='Envios simultâneos')
+    parser.add_argument('--latencia-ms', type=float, default=0, help='Latência simulada da API')
+    args = parser.parse_args()
+
+    servidor = iniciar_servidor(args.latencia_ms)
+    api_url = f'http://127.0.0.1:{servidor.server_address[1]}/v18.0'
+
+    servico = WhatsAppService()
+    servico.api_url = api_url
+    servico.phone_number_id = 'BENCH'
+    servico.access_token = 'BENCH'
+    servico.headers['Authorization'] = 'Bearer BENCH'
+
+    print(f'Mock Graph API em {api_url} | {args.mensagens} mensagens, '
+          f'concorrência {args.concorrencia}, latência {args.latencia_ms} ms\n')
+
+    antes = medir('antes', enviar_antes(
+        f'{api_url}/BENCH/messages', args.mensagens, args.concorrencia
+    ))
+    depois = medir('depois', enviar_depois(servico, args.mensagens, args.concorrencia))
+
+    servico.fechar()
+    servidor.shutdown()
+
+    if antes:
+        print(f'\nGanho: {depois / antes:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -50,6 +50,7 @@ from financeiro.models import PlanoConta, ContaReceber, ContaPagar
 from agenda.models import Agendamento
 from assistencia.models import OrdemServico
 from estoque.models import Produto
+from numeracao.services import reservar_numeros
 
 # Configuração de logging
 logging.basicConfig(
@@ -285,6 +286,12 @@ class MySQLMigrator:
             self.stats['alugueis']['total'] = len(rows)
             logger.info(f"   Encontrados {len(rows)} contratos de aluguel")
 
+            # Números reservados em bloco (uma ida ao banco para todo o lote)
+            numeros = iter(
+                reservar_numeros(ContratoAluguel.PREFIXO_NUMERO, ContratoAluguel, len(rows))
+                if rows and not self.dry_run else []
+            )
+
             for row in rows:
                 try:
                     if self.dry_run:
@@ -302,6 +309,7 @@ class MySQLMigrator:
 
                     # Criar contrato
                     contrato = ContratoAluguel.objects.create(
+                        numero=next(numeros),
                         cliente=cliente,
                         data_inicio=self.safe_date(row['data_inicio']) or timezone.now().date(),
                         duracao_meses=row.get('duracao_meses', 12),
@@ -382,6 +390,12 @@ class MySQLMigrator:
             self.stats['vendas']['total'] = len(rows)
             logger.info(f"   Encontradas {len(rows)} vendas")
 
+            # Números reservados em bloco (uma ida ao banco para todo o lote)
+            numeros = iter(
+                reservar_numeros(Venda.PREFIXO_NUMERO, Venda, len(rows))
+                if rows and not self.dry_run else []
+            )
+
             for row in rows:
                 try:
                     if self.dry_run:
@@ -399,6 +413,7 @@ class MySQLMigrator:
 
                     # Criar venda
                     venda = Venda.objects.create(
+                        numero=next(numeros),
                         cliente=cliente,
                         data_venda=self.safe_datetime(row['data_venda']) or timezone.now(),
                         tipo_venda=self._map_tipo_venda(row.get('tipo_venda')),
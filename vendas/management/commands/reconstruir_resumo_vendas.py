@@ -0,0 +1,47 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Reconstrução do Resumo Diário de Vendas
+Recria a tabela de fatos ResumoVendaDiario a partir de Venda/ItemVenda
+=============================================================================
+
+A tabela é mantida pelos signals de vendas; use este comando após
+importações em lote, correções diretas no banco ou no primeiro deploy:
+    python manage.py reconstruir_resumo_vendas
+    python manage.py reconstruir_resumo_vendas --inicio 2026-01-01 --fim 2026-01-31
+"""
+
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from vendas.services import reconstruir_resumo_vendas
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói a tabela de fatos ResumoVendaDiario'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--inicio',
+            help='Data inicial (YYYY-MM-DD). Padrão: todo o histórico'
+        )
+        parser.add_argument(
+            '--fim',
+            help='Data final (YYYY-MM-DD). Padrão: todo o histórico'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            inicio = datetime.strptime(options['inicio'], '%Y-%m-%d').date() if options['inicio'] else None
+            fim = datetime.strptime(options['fim'], '%Y-%m-%d').date() if options['fim'] else None
+        except ValueError:
+            raise CommandError('Data inválida. Use o formato YYYY-MM-DD')
+
+        inicio_exec = time.perf_counter()
+        linhas = reconstruir_resumo_vendas(inicio, fim)
+        duracao = round((time.perf_counter() - inicio_exec) * 1000, 1)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"✅ {linhas} linhas de resumo gravadas em {duracao} ms")
+        )
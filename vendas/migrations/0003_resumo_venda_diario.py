@@ -0,0 +1,39 @@
+# Generated by Django 4.2.10 on 2026-10-19 01:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipamentos', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('vendas', '0002_add_produto_to_itemvenda'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoVendaDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField(verbose_name='Data')),
+                ('tipo_venda', models.CharField(choices=[('venda', 'Total da Venda'), ('rainbow', 'Equipamento Rainbow'), ('acessorio', 'Peça/Acessório')], max_length=20, verbose_name='Tipo')),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('parcial', 'Parcialmente Paga'), ('concluida', 'Concluída'), ('cancelada', 'Cancelada')], max_length=20, verbose_name='Status da Venda')),
+                ('quantidade', models.IntegerField(default=0, verbose_name='Quantidade')),
+                ('valor', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Valor')),
+                ('custo', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Custo')),
+                ('pontos', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Pontos')),
+                ('modelo', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='equipamentos.modeloequipamento', verbose_name='Modelo')),
+                ('vendedor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Vendedor')),
+            ],
+            options={
+                'verbose_name': 'Resumo Diário de Vendas',
+                'verbose_name_plural': 'Resumos Diários de Vendas',
+                'ordering': ['-data'],
+                'indexes': [models.Index(fields=['tipo_venda', 'status', 'data'], name='vendas_resu_tipo_ve_4279b1_idx')],
+                'unique_together': {('data', 'vendedor', 'modelo', 'tipo_venda', 'status')},
+            },
+        ),
+    ]
@@ -0,0 +1,77 @@
+from django.db import migrations
+from django.db.models import Case, CharField, Count, DecimalField, ExpressionWrapper, F, Sum, Value, When
+
+
+def preencher_resumo_vendas(apps, schema_editor):
+    """
+    Carga inicial de ResumoVendaDiario com as vendas já existentes
+    (mesma agregação de vendas.services._agregar_resumo_vendas).
+    """
+    Venda = apps.get_model('vendas', 'Venda')
+    ItemVenda = apps.get_model('vendas', 'ItemVenda')
+    ResumoVendaDiario = apps.get_model('vendas', 'ResumoVendaDiario')
+
+    ResumoVendaDiario.objects.all().delete()
+    linhas = []
+
+    totais = Venda.objects.values('data_venda', 'vendedor_id', 'status').annotate(
+        qtd=Count('id'),
+        soma_valor=Sum('valor_total'),
+        soma_custo=Sum('valor_custo'),
+        soma_pontos=Sum('pontos'),
+    ).order_by()
+    for t in totais:
+        linhas.append(ResumoVendaDiario(
+            data=t['data_venda'],
+            vendedor_id=t['vendedor_id'],
+            modelo_id=None,
+            tipo_venda='venda',
+            status=t['status'],
+            quantidade=t['qtd'],
+            valor=t['soma_valor'] or 0,
+            custo=t['soma_custo'] or 0,
+            pontos=t['soma_pontos'] or 0,
+        ))
+
+    itens = ItemVenda.objects.values(
+        'modelo_id',
+        venda_data=F('venda__data_venda'),
+        venda_vendedor=F('venda__vendedor_id'),
+        venda_status=F('venda__status'),
+        tipo=Case(
+            When(produto__isnull=False, then=Value('acessorio')),
+            default=Value('rainbow'),
+            output_field=CharField(),
+        ),
+    ).annotate(
+        qtd=Sum('quantidade'),
+        soma_valor=Sum('valor_total'),
+        soma_custo=Sum(ExpressionWrapper(
+            F('valor_custo_unitario') * F('quantidade'),
+            output_field=DecimalField(max_digits=14, decimal_places=2)
+        )),
+    ).order_by()
+    for i in itens:
+        linhas.append(ResumoVendaDiario(
+            data=i['venda_data'],
+            vendedor_id=i['venda_vendedor'],
+            modelo_id=i['modelo_id'],
+            tipo_venda=i['tipo'],
+            status=i['venda_status'],
+            quantidade=i['qtd'] or 0,
+            valor=i['soma_valor'] or 0,
+            custo=i['soma_custo'] or 0,
+        ))
+
+    ResumoVendaDiario.objects.bulk_create(linhas, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendas', '0003_resumo_venda_diario'),
+    ]
+
+    operations = [
+        migrations.RunPython(preencher_resumo_vendas, migrations.RunPython.noop),
+    ]
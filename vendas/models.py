@@ -16,6 +16,9 @@ class Venda(models.Model):
     Registro de vendas de equipamentos e acessórios Rainbow.
     """
 
+    # Numeração: V{ANO}{000000} (ver numeracao.services)
+    PREFIXO_NUMERO = 'V'
+
     STATUS_PENDENTE = 'pendente'
     STATUS_PARCIAL = 'parcial'
     STATUS_CONCLUIDA = 'concluida'
@@ -230,9 +233,8 @@ class Venda(models.Model):
     def save(self, *args, **kwargs):
         # Gerar número da venda automaticamente
         if not self.numero:
-            ultimo = Venda.objects.order_by('-id').first()
-            novo_id = (ultimo.id + 1) if ultimo else 1
-            self.numero = f"V{timezone.now().year}{novo_id:06d}"
+            from numeracao.services import proximo_numero
+            self.numero = proximo_numero(self.PREFIXO_NUMERO, Venda)
 
         # Calcular valor total
         self.valor_total = (
@@ -447,3 +449,92 @@ class Parcela(models.Model):
         if self.status == self.STATUS_PENDENTE and self.data_vencimento < timezone.now().date():
             return (timezone.now().date() - self.data_vencimento).days
         return 0
+
+
+class ResumoVendaDiario(models.Model):
+    """
+    Tabela de fatos diária de vendas, usada por relatórios e rankings.
+
+    Mantida pelos signals de Venda/ItemVenda (recalcula apenas o dia e o
+    vendedor afetados) e reconstruída com:
+        python manage.py reconstruir_resumo_vendas
+
+    Linhas com tipo_venda='venda' trazem os totais das vendas (quantidade =
+    nº de vendas, valor = valor_total); as demais detalham os itens por modelo.
+    """
+
+    TIPO_VENDA = 'venda'
+    TIPO_RAINBOW = 'rainbow'
+    TIPO_ACESSORIO = 'acessorio'
+    TIPO_CHOICES = [
+        (TIPO_VENDA, 'Total da Venda'),
+        (TIPO_RAINBOW, 'Equipamento Rainbow'),
+        (TIPO_ACESSORIO, 'Peça/Acessório'),
+    ]
+
+    # Dimensões
+    data = models.DateField(
+        verbose_name='Data'
+    )
+    vendedor = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Vendedor'
+    )
+    modelo = models.ForeignKey(
+        'equipamentos.ModeloEquipamento',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Modelo'
+    )
+    tipo_venda = models.CharField(
+        max_length=20,
+        choices=TIPO_CHOICES,
+        verbose_name='Tipo'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=Venda.STATUS_CHOICES,
+        verbose_name='Status da Venda'
+    )
+
+    # Métricas
+    quantidade = models.IntegerField(
+        default=0,
+        verbose_name='Quantidade'
+    )
+    valor = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        verbose_name='Valor'
+    )
+    custo = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        verbose_name='Custo'
+    )
+    pontos = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        verbose_name='Pontos'
+    )
+
+    class Meta:
+        verbose_name = 'Resumo Diário de Vendas'
+        verbose_name_plural = 'Resumos Diários de Vendas'
+        ordering = ['-data']
+        unique_together = ['data', 'vendedor', 'modelo', 'tipo_venda', 'status']
+        indexes = [
+            models.Index(fields=['tipo_venda', 'status', 'data']),
+        ]
+
+    def __str__(self):
+        return f"{self.data} - {self.get_tipo_venda_display()} ({self.status}): R$ {self.valor}"
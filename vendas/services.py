@@ -0,0 +1,455 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Serviços do Módulo de Vendas
+Criação de venda completa (itens, parcelas, estoque e financeiro) em lote
+manutenção da tabela de fatos ResumoVendaDiario e lucratividade no banco
+=============================================================================
+"""
+
+import logging
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal, ROUND_DOWN
+
+from dateutil.relativedelta import relativedelta
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import (
+    Case, CharField, Count, DecimalField, ExpressionWrapper, F, FloatField, IntegerField,
+    Sum, Value, When,
+)
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CENTAVO = Decimal('0.01')
+
+
+def _gerar_plano_parcelas(valor_total: Decimal, numero_parcelas: int, primeiro_vencimento: date) -> list:
+    """Divide o valor em parcelas mensais iguais (diferença de centavos na 1ª)."""
+    valor_parcela = (valor_total / numero_parcelas).quantize(CENTAVO, rounding=ROUND_DOWN)
+    diferenca = valor_total - valor_parcela * numero_parcelas
+
+    return [
+        {
+            'valor': valor_parcela + (diferenca if i == 0 else 0),
+            'data_vencimento': primeiro_vencimento + relativedelta(months=i),
+        }
+        for i in range(numero_parcelas)
+    ]
+
+
+def criar_venda_completa(dados_venda: dict, itens: list, parcelas: list = None, usuario=None):
+    """
+    Cria uma Venda com itens, parcelas, baixa de estoque e contas a receber
+    em uma única transação, usando bulk_create.
+
+    Os signals por item/parcela (baixar_estoque_ao_vender,
+    criar_conta_receber_por_parcela, criar_contas_receber_venda_a_vista)
+    não são disparados: o mesmo efeito é gravado em lote aqui.
+
+    Args:
+        dados_venda: Campos da Venda (cliente, vendedor, forma_pagamento, ...)
+        itens: Lista de dicts com produto_id ou modelo_id (+ equipamento_id),
+            quantidade, valor_unitario (opcional) e desconto
+        parcelas: Lista de dicts com valor e data_vencimento. Se omitida,
+            gera numero_parcelas parcelas mensais iguais
+        usuario: Usuário responsável (movimentações de estoque)
+
+    Returns:
+        Venda: Venda criada
+
+    Raises:
+        ValidationError: Estoque insuficiente, produto/modelo inexistente
+            ou parcelas que não somam o total
+    """
+    from equipamentos.models import Equipamento, ModeloEquipamento
+    from estoque.models import MovimentacaoEstoque, Produto
+    from financeiro.models import ContaReceber
+    from vendas.models import ItemVenda, Parcela, Venda
+
+    if not itens:
+        raise ValidationError({'itens': 'Informe ao menos um item'})
+
+    produto_ids = {i['produto_id'] for i in itens if i.get('produto_id')}
+    modelo_ids = {i['modelo_id'] for i in itens if i.get('modelo_id')}
+    equipamento_ids = {i['equipamento_id'] for i in itens if i.get('equipamento_id')}
+
+    with transaction.atomic():
+        # Uma consulta por tabela; produtos bloqueados até o fim da transação
+        produtos = Produto.objects.select_for_update().in_bulk(produto_ids)
+        modelos = ModeloEquipamento.objects.in_bulk(modelo_ids)
+        equipamentos = Equipamento.objects.in_bulk(equipamento_ids)
+
+        erros = []
+        for faltando, nome in (
+            (produto_ids - produtos.keys(), 'Produto'),
+            (modelo_ids - modelos.keys(), 'Modelo'),
+            (equipamento_ids - equipamentos.keys(), 'Equipamento'),
+        ):
+            erros.extend(f"{nome} {pk} não encontrado" for pk in sorted(faltando))
+
+        quantidade_por_produto = defaultdict(int)
+        for item in itens:
+            if item.get('produto_id'):
+                quantidade_por_produto[item['produto_id']] += item.get('quantidade', 1)
+
+        for produto_id, quantidade in quantidade_por_produto.items():
+            produto = produtos.get(produto_id)
+            if produto and produto.estoque_atual < quantidade:
+                erros.append(
+                    f"Estoque insuficiente para '{produto.nome}': "
+                    f"disponível {produto.estoque_atual}, solicitado {quantidade}"
+                )
+
+        if erros:
+            raise ValidationError({'itens': erros})
+
+        # Itens com preço/custo padrão do cadastro
+        itens_venda = []
+        for item in itens:
+            produto = produtos.get(item.get('produto_id'))
+            modelo = modelos.get(item.get('modelo_id'))
+            equipamento = equipamentos.get(item.get('equipamento_id'))
+            if equipamento and not modelo:
+                modelo = modelos.get(equipamento.modelo_id)
+
+            origem = produto or modelo
+            quantidade = item.get('quantidade', 1)
+            valor_unitario = item.get('valor_unitario')
+            if valor_unitario is None:
+                valor_unitario = origem.preco_venda if origem else Decimal('0')
+            custo = (origem.preco_custo if origem else None) or Decimal('0')
+            desconto = item.get('desconto') or Decimal('0')
+
+            itens_venda.append(ItemVenda(
+                produto=produto,
+                modelo=modelo,
+                equipamento=equipamento,
+                quantidade=quantidade,
+                valor_unitario=valor_unitario,
+                valor_custo_unitario=custo,
+                desconto=desconto,
+                valor_total=valor_unitario * quantidade - desconto,
+                observacoes=item.get('observacoes'),
+            ))
+
+        venda = Venda(**{'data_venda': timezone.localdate(), **dados_venda})
+        venda.valor_produtos = sum(i.valor_total for i in itens_venda)
+        venda.valor_custo = sum(i.valor_custo_unitario * i.quantidade for i in itens_venda)
+        if parcelas:
+            venda.numero_parcelas = len(parcelas)
+        venda.numero_parcelas = venda.numero_parcelas or 1
+        # Contas a receber e resumo diário são gerados abaixo, em lote
+        venda._criada_em_lote = True
+        venda._usuario = usuario
+        venda.save()
+
+        # Parcelas: plano informado ou parcelas mensais iguais
+        if parcelas:
+            soma = sum(Decimal(str(p['valor'])) for p in parcelas)
+            if abs(soma - venda.valor_total) > CENTAVO:
+                raise ValidationError({
+                    'parcelas': f"Soma das parcelas (R$ {soma}) difere do total da venda (R$ {venda.valor_total})"
+                })
+        else:
+            parcelas = _gerar_plano_parcelas(
+                venda.valor_total,
+                venda.numero_parcelas,
+                venda.data_primeiro_vencimento or venda.data_venda,
+            )
+
+        for item in itens_venda:
+            item.venda = venda
+        ItemVenda.objects.bulk_create(itens_venda)
+
+        # Baixa de estoque: movimentações encadeadas por produto + um UPDATE
+        movimentacoes = []
+        estoque = {pk: p.estoque_atual for pk, p in produtos.items()}
+        for item in itens_venda:
+            if not item.produto:
+                continue
+            anterior = estoque[item.produto_id]
+            estoque[item.produto_id] = anterior - item.quantidade
+            movimentacoes.append(MovimentacaoEstoque(
+                produto=item.produto,
+                tipo=MovimentacaoEstoque.TIPO_SAIDA,
+                motivo=MovimentacaoEstoque.MOTIVO_VENDA,
+                quantidade=item.quantidade,
+                estoque_anterior=anterior,
+                estoque_posterior=estoque[item.produto_id],
+                valor_unitario=item.valor_unitario,
+                venda=venda,
+                observacoes=f"Venda #{venda.numero} - Baixa automática",
+                usuario=usuario,
+            ))
+
+        if movimentacoes:
+            MovimentacaoEstoque.objects.bulk_create(movimentacoes)
+            Produto.objects.filter(pk__in=quantidade_por_produto.keys()).update(
+                estoque_atual=Case(
+                    *[When(pk=pk, then=Value(estoque[pk])) for pk in quantidade_por_produto],
+                    output_field=IntegerField()
+                ),
+                updated_at=timezone.now(),
+            )
+
+        objetos_parcela = Parcela.objects.bulk_create([
+            Parcela(
+                venda=venda,
+                numero=numero,
+                valor=Decimal(str(p['valor'])),
+                data_vencimento=p['data_vencimento'],
+            )
+            for numero, p in enumerate(parcelas, 1)
+        ])
+
+        pontos_parcela = venda.pontos / venda.numero_parcelas if venda.numero_parcelas > 0 else 0
+        ContaReceber.objects.bulk_create([
+            ContaReceber(
+                descricao=f"Venda #{venda.numero} - Parcela {p.numero}/{venda.numero_parcelas}",
+                cliente=venda.cliente,
+                valor=p.valor,
+                data_emissao=venda.data_venda,
+                data_vencimento=p.data_vencimento,
+                status=ContaReceber.STATUS_PENDENTE,
+                forma_pagamento=venda.forma_pagamento,
+                documento=f"PARCELA-{venda.numero}-{p.numero}",
+                venda=venda,
+                consultor=venda.vendedor,
+                pontos=pontos_parcela,
+                observacoes=f"Gerado automaticamente da Venda #{venda.numero}",
+            )
+            for p in objetos_parcela
+        ])
+
+        recalcular_resumo_vendas(venda.data_venda, venda.vendedor_id)
+
+    logger.info(
+        f"✅ Venda completa #{venda.numero}: {len(itens_venda)} itens, "
+        f"{len(objetos_parcela)} parcelas, {len(movimentacoes)} baixas de estoque - "
+        f"R$ {venda.valor_total}"
+    )
+
+    return venda
+
+
+# =============================================================================
+# TABELA DE FATOS: ResumoVendaDiario
+# =============================================================================
+
+def _agregar_resumo_vendas(vendas) -> list:
+    """
+    Agrega um QuerySet de Venda nas linhas de ResumoVendaDiario
+    (totais por venda + itens por modelo).
+    """
+    from vendas.models import ItemVenda, ResumoVendaDiario
+
+    linhas = []
+
+    totais = vendas.values('data_venda', 'vendedor_id', 'status').annotate(
+        qtd=Count('id'),
+        soma_valor=Sum('valor_total'),
+        soma_custo=Sum('valor_custo'),
+        soma_pontos=Sum('pontos'),
+    ).order_by()
+    for t in totais:
+        linhas.append(ResumoVendaDiario(
+            data=t['data_venda'],
+            vendedor_id=t['vendedor_id'],
+            modelo_id=None,
+            tipo_venda=ResumoVendaDiario.TIPO_VENDA,
+            status=t['status'],
+            quantidade=t['qtd'],
+            valor=t['soma_valor'] or 0,
+            custo=t['soma_custo'] or 0,
+            pontos=t['soma_pontos'] or 0,
+        ))
+
+    itens = ItemVenda.objects.filter(venda__in=vendas).values(
+        'modelo_id',
+        venda_data=F('venda__data_venda'),
+        venda_vendedor=F('venda__vendedor_id'),
+        venda_status=F('venda__status'),
+        tipo=Case(
+            When(produto__isnull=False, then=Value(ResumoVendaDiario.TIPO_ACESSORIO)),
+            default=Value(ResumoVendaDiario.TIPO_RAINBOW),
+            output_field=CharField(),
+        ),
+    ).annotate(
+        qtd=Sum('quantidade'),
+        soma_valor=Sum('valor_total'),
+        soma_custo=Sum(ExpressionWrapper(
+            F('valor_custo_unitario') * F('quantidade'),
+            output_field=DecimalField(max_digits=14, decimal_places=2)
+        )),
+    ).order_by()
+    for i in itens:
+        linhas.append(ResumoVendaDiario(
+            data=i['venda_data'],
+            vendedor_id=i['venda_vendedor'],
+            modelo_id=i['modelo_id'],
+            tipo_venda=i['tipo'],
+            status=i['venda_status'],
+            quantidade=i['qtd'] or 0,
+            valor=i['soma_valor'] or 0,
+            custo=i['soma_custo'] or 0,
+        ))
+
+    return linhas
+
+
+def recalcular_resumo_vendas(data: date, vendedor_id) -> int:
+    """
+    Recalcula ResumoVendaDiario de um dia/vendedor (chamado pelos signals).
+
+    Returns:
+        int: Linhas gravadas
+    """
+    from vendas.models import ResumoVendaDiario, Venda
+
+    if data is None:
+        return 0
+
+    with transaction.atomic():
+        ResumoVendaDiario.objects.filter(data=data, vendedor_id=vendedor_id).delete()
+        linhas = _agregar_resumo_vendas(
+            Venda.objects.filter(data_venda=data, vendedor_id=vendedor_id)
+        )
+        ResumoVendaDiario.objects.bulk_create(linhas)
+
+    return len(linhas)
+
+
+def reconstruir_resumo_vendas(data_inicio: date = None, data_fim: date = None) -> int:
+    """
+    Reconstrói ResumoVendaDiario para o período (padrão: todo o histórico).
+
+    Returns:
+        int: Linhas gravadas
+    """
+    from vendas.models import ResumoVendaDiario, Venda
+
+    filtros = {}
+    if data_inicio:
+        filtros['data_venda__gte'] = data_inicio
+    if data_fim:
+        filtros['data_venda__lte'] = data_fim
+
+    with transaction.atomic():
+        ResumoVendaDiario.objects.filter(
+            **{k.replace('data_venda', 'data'): v for k, v in filtros.items()}
+        ).delete()
+        linhas = _agregar_resumo_vendas(Venda.objects.filter(**filtros))
+        ResumoVendaDiario.objects.bulk_create(linhas, batch_size=1000)
+
+    logger.info(f"✅ ResumoVendaDiario reconstruído: {len(linhas)} linhas")
+    return len(linhas)
+
+
+def periodo_mes(ano: int, mes: int) -> tuple:
+    """Primeiro e último dia do mês (filtro por faixa, usa índice de data)."""
+    inicio = date(ano, mes, 1)
+    return inicio, inicio + relativedelta(months=1, days=-1)
+
+
+# =============================================================================
+# LUCRATIVIDADE
+# =============================================================================
+
+AGRUPAMENTOS_LUCRATIVIDADE = {
+    'vendedor': ['vendedor_id', 'vendedor__first_name', 'vendedor__last_name'],
+    'modelo': ['modelo_id', 'modelo__nome'],
+    'vendedor_modelo': [
+        'vendedor_id', 'vendedor__first_name', 'vendedor__last_name',
+        'modelo_id', 'modelo__nome',
+    ],
+}
+
+
+def _expressao_margem(valor: str, lucro: str):
+    """Margem percentual (lucro / valor * 100), 0 quando não há valor."""
+    percentual = DecimalField(max_digits=9, decimal_places=2)
+    # Divisão em ponto flutuante (no SQLite NUMERIC/NUMERIC trunca o resultado)
+    return Case(
+        When(**{f'{valor}__gt': 0}, then=Cast(
+            F(lucro) * Value(100.0, output_field=FloatField()) / F(valor),
+            output_field=percentual
+        )),
+        default=Value(Decimal('0.00')),
+        output_field=percentual,
+    )
+
+
+def anotar_lucratividade(vendas):
+    """
+    Anota um queryset de Venda com valor_lucro e margem (%) calculados no banco.
+
+    Equivalente às properties Venda.lucro e Venda.margem_lucro, mas
+    permite filtrar, ordenar e agregar sem carregar as linhas.
+    """
+    return vendas.annotate(
+        valor_lucro=ExpressionWrapper(
+            F('valor_total') - F('valor_custo'),
+            output_field=DecimalField(max_digits=12, decimal_places=2)
+        ),
+    ).annotate(
+        margem=_expressao_margem('valor_total', 'valor_lucro'),
+    )
+
+
+def relatorio_lucratividade(
+    agrupar_por: str = 'vendedor',
+    data_inicio: date = None,
+    data_fim: date = None,
+    status: str = 'concluida',
+) -> list:
+    """
+    Relatório de lucratividade agrupado, calculado inteiramente em SQL
+    sobre a tabela de fatos ResumoVendaDiario.
+
+    Args:
+        agrupar_por: 'vendedor', 'modelo' ou 'vendedor_modelo'
+        data_inicio / data_fim: Período (padrão: todo o histórico)
+        status: Status das vendas consideradas (None = todos)
+
+    Returns:
+        list: Linhas com quantidade, valor, custo, lucro e margem,
+        ordenadas por lucro decrescente
+    """
+    from vendas.models import ResumoVendaDiario
+
+    if agrupar_por not in AGRUPAMENTOS_LUCRATIVIDADE:
+        raise ValueError(
+            f"agrupar_por inválido: {agrupar_por!r} "
+            f"(use {', '.join(AGRUPAMENTOS_LUCRATIVIDADE)})"
+        )
+
+    resumo = ResumoVendaDiario.objects.all()
+    if data_inicio:
+        resumo = resumo.filter(data__gte=data_inicio)
+    if data_fim:
+        resumo = resumo.filter(data__lte=data_fim)
+    if status:
+        resumo = resumo.filter(status=status)
+
+    # Por vendedor: linhas de total da venda (inclui descontos/frete);
+    # com modelo: linhas de itens
+    if agrupar_por == 'vendedor':
+        resumo = resumo.filter(tipo_venda=ResumoVendaDiario.TIPO_VENDA)
+    else:
+        resumo = resumo.exclude(tipo_venda=ResumoVendaDiario.TIPO_VENDA)
+
+    decimal = DecimalField(max_digits=14, decimal_places=2)
+    linhas = resumo.values(*AGRUPAMENTOS_LUCRATIVIDADE[agrupar_por]).annotate(
+        quantidade_total=Sum('quantidade'),
+        valor_total=Sum('valor', output_field=decimal),
+        custo_total=Sum('custo', output_field=decimal),
+    ).annotate(
+        lucro=ExpressionWrapper(F('valor_total') - F('custo_total'), output_field=decimal),
+    ).annotate(
+        margem=_expressao_margem('valor_total', 'lucro'),
+    ).order_by('-lucro')
+
+    return list(linhas)
@@ -9,13 +9,14 @@ e o controle de Estoque:
 1. Ao adicionar item com produto à Venda → Baixa automática do estoque
 2. Ao remover item da Venda → Devolução automática ao estoque
 3. Ao cancelar Venda → Reverte todas as movimentações de estoque
+4. Ao alterar Venda/ItemVenda → Atualiza a tabela de fatos ResumoVendaDiario
 
 Autor: Life Rainbow Team
 Data: Janeiro 2026
 """
 
 import logging
-from django.db.models.signals import post_save, pre_delete
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 from django.db import transaction
 
@@ -383,6 +384,10 @@ def criar_contas_receber_venda_a_vista(sender, instance, created, **kwargs):
     if not created:
         return
 
+    # Venda criada com parcelas e contas a receber em lote (vendas.services)
+    if getattr(instance, '_criada_em_lote', False):
+        return
+
     # Verificar se é venda à vista ou se parcelas serão geradas depois
     if instance.numero_parcelas == 1 and not instance.parcelas.exists():
         try:
@@ -422,3 +427,63 @@ def criar_contas_receber_venda_a_vista(sender, instance, created, **kwargs):
             logger.error(
                 f"❌ Erro ao criar ContaReceber para Venda à Vista #{instance.numero}: {e}"
             )
+
+
+# =============================================================================
+# TABELA DE FATOS: ResumoVendaDiario
+# =============================================================================
+
+@receiver(pre_save, sender='vendas.Venda')
+def guardar_chave_resumo_anterior(sender, instance, **kwargs):
+    """
+    Guarda data/vendedor anteriores para recalcular também o resumo
+    do dia/vendedor de origem quando a venda é movida.
+    """
+    if not instance.pk:
+        return
+
+    from vendas.models import Venda
+
+    instance._chave_resumo_anterior = Venda.objects.filter(
+        pk=instance.pk
+    ).values_list('data_venda', 'vendedor_id').first()
+
+
+@receiver(post_save, sender='vendas.Venda')
+@receiver(post_delete, sender='vendas.Venda')
+def atualizar_resumo_venda(sender, instance, **kwargs):
+    """Recalcula ResumoVendaDiario do dia/vendedor da venda."""
+    if getattr(instance, '_criada_em_lote', False):
+        return
+
+    from vendas.services import recalcular_resumo_vendas
+
+    try:
+        chave = (instance.data_venda, instance.vendedor_id)
+        anterior = getattr(instance, '_chave_resumo_anterior', None)
+
+        recalcular_resumo_vendas(*chave)
+        if anterior and anterior != chave:
+            recalcular_resumo_vendas(*anterior)
+
+    except Exception as e:
+        logger.error(f"❌ Erro ao atualizar resumo diário da Venda #{instance.numero}: {e}")
+
+
+@receiver(post_save, sender='vendas.ItemVenda')
+@receiver(post_delete, sender='vendas.ItemVenda')
+def atualizar_resumo_item_venda(sender, instance, **kwargs):
+    """Recalcula ResumoVendaDiario quando itens são incluídos/alterados/removidos."""
+    from vendas.models import Venda
+    from vendas.services import recalcular_resumo_vendas
+
+    try:
+        chave = Venda.objects.filter(
+            pk=instance.venda_id
+        ).values_list('data_venda', 'vendedor_id').first()
+
+        if chave:
+            recalcular_resumo_vendas(*chave)
+
+    except Exception as e:
+        logger.error(f"❌ Erro ao atualizar resumo diário do item {instance.pk}: {e}")
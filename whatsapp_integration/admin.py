@@ -8,7 +8,10 @@ Configuração do Django Admin para gestão de WhatsApp
 from django.contrib import admin
 from django.utils.html import format_html
 
-from .models import Conversa, Mensagem, Template, CampanhaMensagem
+from .models import (
+    Conversa, Mensagem, Template, CampanhaMensagem, DestinatarioCampanha, EventoWebhook,
+    MensagemSaida
+)
 
 
 class MensagemInline(admin.TabularInline):
@@ -254,3 +257,60 @@ class CampanhaMensagemAdmin(admin.ModelAdmin):
     @admin.action(description="Cancelar campanha")
     def cancelar_campanha(self, request, queryset):
         queryset.exclude(status='concluida').update(status='cancelada')
+
+
+@admin.register(DestinatarioCampanha)
+class DestinatarioCampanhaAdmin(admin.ModelAdmin):
+    """Admin (somente leitura) do estado de envio por destinatário."""
+    list_display = ['campanha', 'telefone', 'cliente', 'status', 'tentativas', 'data_envio']
+    list_filter = ['status', 'campanha']
+    search_fields = ['telefone', 'wamid', 'cliente__nome']
+    raw_id_fields = ['campanha', 'cliente']
+    readonly_fields = [
+        'campanha', 'cliente', 'telefone', 'variaveis', 'status', 'tentativas',
+        'wamid', 'erro_mensagem', 'data_envio', 'created_at'
+    ]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(EventoWebhook)
+class EventoWebhookAdmin(admin.ModelAdmin):
+    """Admin (somente leitura) da caixa de entrada do webhook."""
+    list_display = ['id', 'recebido_em', 'processado_em', 'tentativas']
+    list_filter = ['processado_em']
+    readonly_fields = ['payload', 'recebido_em', 'processado_em', 'tentativas', 'erro']
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(MensagemSaida)
+class MensagemSaidaAdmin(admin.ModelAdmin):
+    """Admin (somente leitura) da caixa de saída; falhas podem voltar à fila."""
+    list_display = [
+        'id', 'telefone', 'tipo', 'status', 'tentativas',
+        'proxima_tentativa_em', 'created_at', 'enviada_em'
+    ]
+    list_filter = ['status', 'tipo', 'enviado_por_ia']
+    search_fields = ['telefone', 'wamid', 'cliente__nome']
+    raw_id_fields = ['conversa', 'cliente', 'mensagem', 'enviado_por']
+    readonly_fields = [
+        'conversa', 'cliente', 'telefone', 'tipo', 'conteudo', 'template_nome',
+        'variaveis', 'status', 'tentativas', 'proxima_tentativa_em', 'reservada_em',
+        'wamid', 'mensagem', 'codigo_erro', 'erro_mensagem', 'enviado_por',
+        'enviado_por_ia', 'created_at', 'enviada_em'
+    ]
+
+    actions = ['reenviar']
+
+    @admin.action(description="Reenviar (devolver falhas à fila)")
+    def reenviar(self, request, queryset):
+        from .saida import reenfileirar
+
+        total = reenfileirar(list(queryset.values_list('id', flat=True)))
+        self.message_user(request, f'{total} envio(s) devolvido(s) à fila')
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,353 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Execução de Campanhas WhatsApp
+Público, estado por destinatário, limite de taxa e retomada após falhas
+=============================================================================
+
+Fluxo:
+1. preparar_destinatarios(): grava um DestinatarioCampanha por telefone do
+   público (filtro_perfil, filtro_segmento, filtro_consultor), lido em
+   fluxo por publico.Publico. Idempotente.
+2. executar_campanha(): reserva lotes de pendentes (status 'enviando'),
+   envia com concorrência limitada sob um balde de tokens e grava o
+   resultado do lote de uma vez (bulk_update + contadores com F()).
+3. Erros temporários (limite de taxa, indisponibilidade) voltam para a
+   fila e o próximo lote espera com backoff exponencial + jitter
+   (retentativas.py) enquanto os lotes seguidos continuarem falhando.
+4. Retomada: linhas que ficaram 'enviando' após uma queda podem ter sido
+   aceitas pela API; viram 'incerto' e não são reenviadas automaticamente.
+
+Sem Celery configurado, a execução é feita pelo comando
+`python manage.py executar_campanhas` (cron a cada minuto).
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import CampanhaMensagem, DestinatarioCampanha
+from .publico import Publico
+from .retentativas import calcular_espera, erro_temporario
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_LOTE = 100
+MAX_TENTATIVAS = 3
+
+
+class BaldeTokens:
+    """
+    Limitador de taxa (token bucket) para corrotinas.
+
+    Permite rajadas de até `capacidade` mensagens e sustenta `taxa` msgs/s.
+    """
+
+    def __init__(self, taxa: float, capacidade: int = None):
+        if taxa <= 0:
+            raise ValueError('A taxa do balde de tokens deve ser positiva')
+        self.taxa = taxa
+        self.capacidade = capacidade or max(1, int(taxa))
+        self._tokens = float(self.capacidade)
+        self._ultimo = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def adquirir(self):
+        async with self._lock:
+            while True:
+                agora = time.monotonic()
+                self._tokens = min(
+                    self.capacidade,
+                    self._tokens + (agora - self._ultimo) * self.taxa
+                )
+                self._ultimo = agora
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.taxa)
+
+
+# =============================================================================
+# PÚBLICO
+# =============================================================================
+
+def _gravar_destinatarios(campanha: CampanhaMensagem, lote: List[DestinatarioCampanha]):
+    # Clientes já gravados (execução retomada) mantêm a linha e o estado
+    existentes = set(campanha.destinatarios.filter(
+        cliente_id__in=[d.cliente_id for d in lote]
+    ).values_list('cliente_id', flat=True))
+    DestinatarioCampanha.objects.bulk_create(
+        [d for d in lote if d.cliente_id not in existentes],
+        ignore_conflicts=True
+    )
+
+
+def preparar_destinatarios(campanha: CampanhaMensagem) -> int:
+    """
+    Grava os destinatários da campanha (um por telefone), lendo o público
+    em fluxo (ver publico.py). Pode ser chamada novamente: clientes e
+    telefones já gravados são mantidos com seu estado.
+
+    Returns:
+        int: Total de destinatários da campanha
+    """
+    publico = Publico.da_campanha(campanha)
+    nomes_variaveis = campanha.template.variaveis or []
+    lote = []
+
+    for cliente_id, telefone, variaveis in publico.destinatarios(nomes_variaveis):
+        lote.append(DestinatarioCampanha(
+            campanha=campanha,
+            cliente_id=cliente_id,
+            telefone=telefone,
+            variaveis=variaveis,
+        ))
+        if len(lote) >= 1000:
+            _gravar_destinatarios(campanha, lote)
+            lote = []
+
+    if lote:
+        _gravar_destinatarios(campanha, lote)
+
+    total = campanha.destinatarios.count()
+    CampanhaMensagem.objects.filter(pk=campanha.pk).update(total_destinatarios=total)
+    campanha.total_destinatarios = total
+    return total
+
+
+# =============================================================================
+# EXECUÇÃO
+# =============================================================================
+
+def _marcar_incertos(campanha_id: int) -> int:
+    """Linhas 'enviando' de uma execução interrompida (podem ter sido enviadas)."""
+    return DestinatarioCampanha.objects.filter(
+        campanha_id=campanha_id,
+        status=DestinatarioCampanha.STATUS_ENVIANDO
+    ).update(
+        status=DestinatarioCampanha.STATUS_INCERTO,
+        erro_mensagem='Execução interrompida durante o envio'
+    )
+
+
+def _reservar_lote(campanha_id: int, tamanho: int) -> List[Dict[str, Any]]:
+    """Reserva pendentes marcando-os como 'enviando' (skip_locked no PostgreSQL)."""
+    if CampanhaMensagem.objects.filter(
+        pk=campanha_id, status=CampanhaMensagem.STATUS_CANCELADA
+    ).exists():
+        return []
+
+    with transaction.atomic():
+        pendentes = DestinatarioCampanha.objects.filter(
+            campanha_id=campanha_id,
+            status=DestinatarioCampanha.STATUS_PENDENTE
+        ).order_by('id').select_for_update(skip_locked=True)
+
+        lote = list(pendentes.values('id', 'telefone', 'variaveis', 'tentativas')[:tamanho])
+        if lote:
+            DestinatarioCampanha.objects.filter(
+                id__in=[d['id'] for d in lote]
+            ).update(status=DestinatarioCampanha.STATUS_ENVIANDO)
+
+    return lote
+
+
+def _gravar_resultados(campanha_id: int, resultados: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Grava o resultado de um lote: um bulk_update e um UPDATE de contadores."""
+    agora = timezone.now()
+    objetos = []
+    enviados = falhas = reenviar = 0
+
+    for r in resultados:
+        destinatario = DestinatarioCampanha(
+            id=r['id'],
+            tentativas=r['tentativas'] + 1,
+            wamid=r.get('message_id'),
+            erro_mensagem=r.get('error'),
+            data_envio=agora if r['success'] else None,
+        )
+        if r['success']:
+            destinatario.status = DestinatarioCampanha.STATUS_ENVIADO
+            enviados += 1
+        elif r.get('temporario') and destinatario.tentativas < MAX_TENTATIVAS:
+            destinatario.status = DestinatarioCampanha.STATUS_PENDENTE
+            reenviar += 1
+        else:
+            destinatario.status = DestinatarioCampanha.STATUS_FALHA
+            falhas += 1
+        objetos.append(destinatario)
+
+    with transaction.atomic():
+        DestinatarioCampanha.objects.bulk_update(
+            objetos,
+            ['status', 'tentativas', 'wamid', 'erro_mensagem', 'data_envio']
+        )
+        if enviados or falhas:
+            CampanhaMensagem.objects.filter(pk=campanha_id).update(
+                total_enviados=F('total_enviados') + enviados,
+                total_falhas=F('total_falhas') + falhas,
+            )
+
+    return {'enviados': enviados, 'falhas': falhas, 'reenviar': reenviar}
+
+
+async def _enviar_um(servico, template: str, destinatario: Dict, balde: BaldeTokens,
+                     semaforo: asyncio.Semaphore) -> Dict[str, Any]:
+    async with semaforo:
+        await balde.adquirir()
+        try:
+            resultado = await servico.enviar_template(
+                telefone=destinatario['telefone'],
+                template_name=template,
+                variaveis=destinatario['variaveis'],
+            )
+        except Exception as e:
+            resultado = {'success': False, 'error': str(e)}
+
+    return {
+        **destinatario,
+        'success': bool(resultado.get('success')),
+        'message_id': resultado.get('message_id'),
+        'error': resultado.get('error'),
+        'temporario': erro_temporario(resultado),
+    }
+
+
+async def _executar_lotes(campanha: CampanhaMensagem, servico, taxa: float,
+                          concorrencia: int) -> Dict[str, int]:
+    balde = BaldeTokens(taxa)
+    semaforo = asyncio.Semaphore(concorrencia)
+    totais = {'enviados': 0, 'falhas': 0, 'reenviar': 0, 'lotes': 0}
+    template = campanha.template.nome
+    lotes_com_erro = 0
+
+    while True:
+        lote = await sync_to_async(_reservar_lote)(campanha.pk, TAMANHO_LOTE)
+        if not lote:
+            break
+
+        resultados = await asyncio.gather(*(
+            _enviar_um(servico, template, d, balde, semaforo) for d in lote
+        ))
+        parcial = await sync_to_async(_gravar_resultados)(campanha.pk, resultados)
+
+        totais['lotes'] += 1
+        for chave in ('enviados', 'falhas', 'reenviar'):
+            totais[chave] += parcial[chave]
+
+        # API sob limite/instável: espera crescente antes de tentar de novo
+        if parcial['reenviar']:
+            lotes_com_erro += 1
+            espera = calcular_espera(
+                lotes_com_erro,
+                settings.WHATSAPP_SAIDA_ESPERA_BASE,
+                settings.WHATSAPP_SAIDA_ESPERA_MAX
+            )
+            logger.warning(
+                f"⏳ Campanha '{campanha.nome}': {parcial['reenviar']} erros temporários, "
+                f"aguardando {espera:.1f}s"
+            )
+            await asyncio.sleep(espera)
+        else:
+            lotes_com_erro = 0
+
+    return totais
+
+
+def executar_campanha(
+    campanha_id: int,
+    retomar: bool = False,
+    servico=None,
+    taxa: float = None,
+    concorrencia: int = None,
+) -> Dict[str, Any]:
+    """
+    Executa (ou retoma) uma campanha até não restarem pendentes.
+
+    Args:
+        campanha_id: ID da CampanhaMensagem ('agendada', ou 'enviando' com retomar=True)
+        retomar: Continua uma execução interrompida
+        servico: WhatsAppService (padrão: instância global; útil para API de teste)
+        taxa: Mensagens por segundo (padrão: WHATSAPP_CAMPANHA_TAXA)
+        concorrencia: Envios simultâneos (padrão: WHATSAPP_CAMPANHA_CONCORRENCIA)
+
+    Returns:
+        dict: Totais da execução
+    """
+    if servico is None:
+        from .services import whatsapp_service
+        servico = whatsapp_service
+
+    taxa = taxa or settings.WHATSAPP_CAMPANHA_TAXA
+    concorrencia = concorrencia or settings.WHATSAPP_CAMPANHA_CONCORRENCIA
+
+    # Reivindica a campanha com UPDATE condicional (um executor por campanha)
+    status_permitidos = [CampanhaMensagem.STATUS_AGENDADA]
+    if retomar:
+        status_permitidos.append(CampanhaMensagem.STATUS_ENVIANDO)
+
+    campanha = CampanhaMensagem.objects.select_related('template').get(pk=campanha_id)
+    reivindicada = CampanhaMensagem.objects.filter(
+        pk=campanha_id, status__in=status_permitidos
+    ).update(
+        status=CampanhaMensagem.STATUS_ENVIANDO,
+        data_inicio=campanha.data_inicio or timezone.now()
+    )
+    if not reivindicada:
+        raise ValueError(
+            f"Campanha {campanha_id} está '{campanha.status}' e não pode ser executada"
+            + ('' if retomar else ' (use retomar para continuar uma execução interrompida)')
+        )
+
+    incertos = _marcar_incertos(campanha_id) if retomar else 0
+    total = preparar_destinatarios(campanha)
+
+    logger.info(
+        f"📣 Campanha '{campanha.nome}': {total} destinatários, "
+        f"{taxa:g} msgs/s, concorrência {concorrencia}"
+    )
+
+    inicio = time.perf_counter()
+    totais = asyncio.run(_executar_lotes(campanha, servico, taxa, concorrencia))
+    duracao = time.perf_counter() - inicio
+
+    restantes = DestinatarioCampanha.objects.filter(
+        campanha_id=campanha_id,
+        status__in=[DestinatarioCampanha.STATUS_PENDENTE, DestinatarioCampanha.STATUS_ENVIANDO]
+    ).exists()
+    if not restantes:
+        CampanhaMensagem.objects.filter(
+            pk=campanha_id, status=CampanhaMensagem.STATUS_ENVIANDO
+        ).update(status=CampanhaMensagem.STATUS_CONCLUIDA, data_conclusao=timezone.now())
+
+    logger.info(
+        f"✅ Campanha '{campanha.nome}': {totais['enviados']} enviadas, "
+        f"{totais['falhas']} falhas em {duracao:.1f}s"
+    )
+
+    return {
+        'campanha_id': campanha_id,
+        'total_destinatarios': total,
+        'enviados': totais['enviados'],
+        'falhas': totais['falhas'],
+        'incertos': incertos,
+        'lotes': totais['lotes'],
+        'duracao_s': round(duracao, 2),
+        'msgs_por_segundo': round(totais['enviados'] / duracao, 1) if duracao else 0,
+    }
+
+
+def campanhas_para_executar():
+    """IDs de campanhas agendadas cujo horário já chegou."""
+    return list(CampanhaMensagem.objects.filter(
+        Q(data_agendada__isnull=True) | Q(data_agendada__lte=timezone.now()),
+        status=CampanhaMensagem.STATUS_AGENDADA
+    ).values_list('id', flat=True))
@@ -0,0 +1,70 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Worker de Download de Mídias Recebidas
+Baixa imagens, áudios e documentos recebidos para o storage
+=============================================================================
+
+Worker contínuo (supervisor/systemd):
+    python manage.py baixar_midias --continuo
+
+Execução única (cron):
+    python manage.py baixar_midias
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from whatsapp_integration.midias import TAMANHO_LOTE, processar_midias
+
+
+class Command(BaseCommand):
+    help = 'Baixa as mídias pendentes das mensagens recebidas no WhatsApp'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--continuo',
+            action='store_true',
+            help='Continua aguardando novas mídias (worker)'
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=5.0,
+            help='Segundos de espera quando não há mídias pendentes (padrão: 5)'
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=TAMANHO_LOTE,
+            help=f'Mensagens por lote (padrão: {TAMANHO_LOTE})'
+        )
+        parser.add_argument(
+            '--concorrencia',
+            type=int,
+            default=settings.WHATSAPP_MIDIA_CONCORRENCIA,
+            help=f'Downloads simultâneos (padrão: {settings.WHATSAPP_MIDIA_CONCORRENCIA})'
+        )
+
+    def handle(self, *args, **options):
+        totais = {'mensagens': 0, 'baixadas': 0, 'reaproveitadas': 0, 'erros': 0}
+
+        try:
+            while True:
+                resultado = processar_midias(options['lote'], options['concorrencia'])
+                for chave in totais:
+                    totais[chave] += resultado[chave]
+
+                if resultado['mensagens'] == 0:
+                    if not options['continuo']:
+                        break
+                    time.sleep(options['intervalo'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(
+            f"Mensagens: {totais['mensagens']} | Baixadas: {totais['baixadas']} | "
+            f"Reaproveitadas: {totais['reaproveitadas']} | Erros: {totais['erros']}"
+        )
+        self.stdout.write(self.style.SUCCESS('✅ Mídias processadas'))
@@ -0,0 +1,81 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Worker da Caixa de Saída do WhatsApp
+Envia as mensagens enfileiradas com novas tentativas e ordem por telefone
+=============================================================================
+
+Worker contínuo (supervisor/systemd):
+    python manage.py enviar_mensagens --continuo
+
+Métricas da fila:
+    python manage.py enviar_mensagens --metricas
+"""
+
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from whatsapp_integration.saida import TAMANHO_LOTE, metricas_saida, processar_saida
+
+
+class Command(BaseCommand):
+    help = 'Envia as mensagens pendentes da caixa de saída do WhatsApp'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--continuo',
+            action='store_true',
+            help='Continua aguardando novos envios (worker)'
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=1.0,
+            help='Segundos de espera quando não há envios vencidos (padrão: 1)'
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=TAMANHO_LOTE,
+            help=f'Envios por lote (padrão: {TAMANHO_LOTE})'
+        )
+        parser.add_argument(
+            '--concorrencia',
+            type=int,
+            default=settings.WHATSAPP_SAIDA_CONCORRENCIA,
+            help=f'Envios simultâneos (padrão: {settings.WHATSAPP_SAIDA_CONCORRENCIA})'
+        )
+        parser.add_argument(
+            '--metricas',
+            action='store_true',
+            help='Apenas mostra profundidade da fila e latência de envio'
+        )
+
+    def handle(self, *args, **options):
+        if options['metricas']:
+            self.stdout.write(json.dumps(metricas_saida(), indent=2, ensure_ascii=False))
+            return
+
+        totais = {'envios': 0, 'enviadas': 0, 'reenviar': 0, 'falhas': 0, 'recuperados': 0}
+
+        try:
+            while True:
+                resultado = processar_saida(options['lote'], options['concorrencia'])
+                for chave in totais:
+                    totais[chave] += resultado[chave]
+
+                if resultado['envios'] == 0:
+                    if not options['continuo']:
+                        break
+                    time.sleep(options['intervalo'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(
+            f"Envios: {totais['envios']} | Enviadas: {totais['enviadas']} | "
+            f"Em espera: {totais['reenviar']} | Falhas: {totais['falhas']} | "
+            f"Recuperados: {totais['recuperados']}"
+        )
+        self.stdout.write(self.style.SUCCESS('✅ Caixa de saída processada'))
@@ -0,0 +1,113 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Execução de Campanhas WhatsApp
+Envia campanhas agendadas com limite de taxa e estado por destinatário
+=============================================================================
+
+Agendar a cada minuto (cron):
+    python manage.py executar_campanhas
+
+Retomar uma campanha interrompida:
+    python manage.py executar_campanhas --campanha 12 --retomar
+
+Testar contra uma API local (ex: mock do scripts/benchmark_whatsapp.py):
+    python manage.py executar_campanhas --campanha 12 --api-url http://127.0.0.1:8081/v18.0
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from whatsapp_integration.campanhas import campanhas_para_executar, executar_campanha
+from whatsapp_integration.models import CampanhaMensagem
+
+
+class Command(BaseCommand):
+    help = 'Executa campanhas de WhatsApp agendadas (ou retoma uma campanha interrompida)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--campanha',
+            type=int,
+            help='ID da campanha (padrão: todas as agendadas com horário vencido)'
+        )
+        parser.add_argument(
+            '--retomar',
+            action='store_true',
+            help='Retoma campanha em "enviando" (destinatários interrompidos viram "incerto")'
+        )
+        parser.add_argument(
+            '--taxa',
+            type=float,
+            default=None,
+            help='Mensagens por segundo (padrão: WHATSAPP_CAMPANHA_TAXA)'
+        )
+        parser.add_argument(
+            '--concorrencia',
+            type=int,
+            default=None,
+            help='Envios simultâneos (padrão: WHATSAPP_CAMPANHA_CONCORRENCIA)'
+        )
+        parser.add_argument(
+            '--api-url',
+            help='URL base alternativa da Graph API (testes com servidor local)'
+        )
+
+    def handle(self, *args, **options):
+        servico = None
+        if options['api_url']:
+            from whatsapp_integration.services import WhatsAppService
+            servico = WhatsAppService()
+            servico.api_url = options['api_url'].rstrip('/')
+
+        try:
+            erros = self._executar(servico, options)
+        finally:
+            if servico is not None:
+                servico.fechar()
+
+        # Campanha pedida explicitamente: falha vira código de saída de erro
+        if erros and options['campanha']:
+            raise CommandError(erros[0])
+
+    def _executar(self, servico, options):
+        """Executa cada campanha; o erro de uma não impede as demais."""
+        if options['campanha']:
+            ids = [options['campanha']]
+        else:
+            ids = campanhas_para_executar()
+
+        if not ids:
+            self.stdout.write('Nenhuma campanha para executar')
+            return []
+
+        erros = []
+        for campanha_id in ids:
+            try:
+                resultado = executar_campanha(
+                    campanha_id,
+                    retomar=options['retomar'],
+                    servico=servico,
+                    taxa=options['taxa'],
+                    concorrencia=options['concorrencia'],
+                )
+            except CampanhaMensagem.DoesNotExist:
+                erros.append(f'Campanha {campanha_id} não encontrada')
+                self.stderr.write(self.style.ERROR(f'❌ {erros[-1]}'))
+                continue
+            except ValueError as e:
+                # Ex: campanha já assumida por outra execução do cron
+                erros.append(f'Campanha {campanha_id}: {e}')
+                self.stderr.write(self.style.ERROR(f'❌ {erros[-1]}'))
+                continue
+
+            self.stdout.write(f"Campanha {campanha_id}: {resultado['total_destinatarios']} destinatários")
+            self.stdout.write(
+                f"  Enviadas: {resultado['enviados']} | Falhas: {resultado['falhas']} | "
+                f"Incertas: {resultado['incertos']}"
+            )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"✅ {resultado['duracao_s']}s ({resultado['msgs_por_segundo']} msgs/s)"
+                )
+            )
+
+        return erros
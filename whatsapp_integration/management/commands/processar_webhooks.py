@@ -0,0 +1,63 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Worker da Caixa de Entrada do Webhook
+Processa os payloads gravados pelo webhook (mensagens e status em lote)
+=============================================================================
+
+Worker contínuo (supervisor/systemd):
+    python manage.py processar_webhooks --continuo
+
+Execução única (cron):
+    python manage.py processar_webhooks
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from whatsapp_integration.webhook import TAMANHO_LOTE, processar_inbox
+
+
+class Command(BaseCommand):
+    help = 'Processa eventos pendentes da caixa de entrada do webhook do WhatsApp'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--continuo',
+            action='store_true',
+            help='Continua aguardando novos eventos (worker)'
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=1.0,
+            help='Segundos de espera quando a caixa de entrada está vazia (padrão: 1)'
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=TAMANHO_LOTE,
+            help=f'Eventos por lote (padrão: {TAMANHO_LOTE})'
+        )
+
+    def handle(self, *args, **options):
+        totais = {'eventos': 0, 'mensagens': 0, 'status': 0, 'erros': 0}
+
+        try:
+            while True:
+                resultado = processar_inbox(options['lote'])
+                for chave in totais:
+                    totais[chave] += resultado[chave]
+
+                if resultado['eventos'] == 0:
+                    if not options['continuo']:
+                        break
+                    time.sleep(options['intervalo'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(
+            f"Eventos: {totais['eventos']} | Mensagens: {totais['mensagens']} | "
+            f"Status: {totais['status']} | Erros: {totais['erros']}"
+        )
+        self.stdout.write(self.style.SUCCESS('✅ Caixa de entrada processada'))
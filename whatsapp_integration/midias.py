@@ -0,0 +1,194 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Download de Mídias Recebidas
+Baixa imagens, áudios e documentos do WhatsApp para o storage em lote
+=============================================================================
+
+O webhook grava apenas media_id/mime_type. Este worker, para cada lote
+de mensagens recebidas com mídia pendente:
+
+0. Reserva o lote (media_reservada_em, conta a tentativa) em uma
+   transação curta - a rede fica fora de transação e sem locks; reservas
+   de um worker que caiu expiram após RESERVA_EXPIRA
+1. Resolve as URLs temporárias na Graph API (em paralelo)
+2. Reaproveita arquivos já baixados com o mesmo hash (sha256 informado
+   pela Meta) sem baixar de novo
+3. Baixa o restante em blocos, com no máximo N downloads simultâneos,
+   para um arquivo temporário em disco (acima de 1 MB) e grava no
+   storage em whatsapp/midias/<xx>/<hash>.<ext> - conteúdo igual é guardado
+   uma única vez
+4. Preenche Mensagem.media_url e media_sha256 com um bulk_update
+
+Executar continuamente:
+    python manage.py baixar_midias --continuo
+"""
+
+import asyncio
+import logging
+import mimetypes
+import tempfile
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Mensagem
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_LOTE = 50
+MAX_TENTATIVAS = 3
+PASTA_MIDIAS = 'whatsapp/midias'
+
+# Maior que o pior caso de um lote (TAMANHO_LOTE / concorrência × 120 s)
+RESERVA_EXPIRA = timedelta(minutes=30)
+
+# Arquivos até este tamanho ficam em memória; acima disso vão para disco
+LIMITE_MEMORIA = 1024 * 1024
+
+
+def _nome_arquivo(sha256: str, mime_type: Optional[str]) -> str:
+    """Caminho endereçado pelo conteúdo (prefixo de 2 caracteres por pasta)."""
+    extensao = mimetypes.guess_extension((mime_type or '').split(';')[0].strip()) or ''
+    return f'{PASTA_MIDIAS}/{sha256[:2]}/{sha256}{extensao}'
+
+
+def _gravar(arquivo, nome: str) -> str:
+    """Grava no storage (se ainda não existir) e devolve a URL pública."""
+    if not default_storage.exists(nome):
+        arquivo.seek(0)
+        salvo = default_storage.save(nome, File(arquivo))
+        if salvo != nome:
+            # Outro worker gravou o mesmo conteúdo ao mesmo tempo
+            default_storage.delete(salvo)
+    return default_storage.url(nome)
+
+
+async def _resolver(servico, media_ids: List[str], concorrencia: int) -> Dict[str, Dict[str, Any]]:
+    """media_id → info da Graph API (url, mime_type, sha256)."""
+    semaforo = asyncio.Semaphore(concorrencia)
+
+    async def resolver(media_id):
+        async with semaforo:
+            return media_id, await servico.obter_info_media(media_id)
+
+    resultados = await asyncio.gather(*(resolver(m) for m in media_ids))
+    return {media_id: info for media_id, info in resultados if info and info.get('url')}
+
+
+async def _baixar(servico, infos: Dict[str, Dict], concorrencia: int) -> Dict[str, Tuple[str, str]]:
+    """media_id → (sha256, media_url) dos downloads concluídos."""
+    semaforo = asyncio.Semaphore(concorrencia)
+
+    async def baixar(media_id, info):
+        async with semaforo:
+            with tempfile.SpooledTemporaryFile(max_size=LIMITE_MEMORIA) as arquivo:
+                sha256 = await servico.baixar_media(info['url'], arquivo)
+                if not sha256:
+                    return media_id, None
+
+                nome = _nome_arquivo(sha256, info.get('mime_type'))
+                url = await asyncio.to_thread(_gravar, arquivo, nome)
+                return media_id, (sha256, url)
+
+    resultados = await asyncio.gather(*(baixar(m, i) for m, i in infos.items()))
+    return {media_id: resultado for media_id, resultado in resultados if resultado}
+
+
+def _reservar_lote(tamanho: int) -> List[Mensagem]:
+    """Pendentes sem reserva válida: marca a reserva e conta a tentativa."""
+    agora = timezone.now()
+
+    with transaction.atomic():
+        lote = list(Mensagem.objects.filter(
+            Q(media_reservada_em__isnull=True) | Q(media_reservada_em__lt=agora - RESERVA_EXPIRA),
+            direcao=Mensagem.DIRECAO_ENTRADA,
+            media_id__isnull=False,
+            media_url__isnull=True,
+            media_tentativas__lt=MAX_TENTATIVAS
+        ).order_by('id').select_for_update(skip_locked=True)[:tamanho])
+
+        for mensagem in lote:
+            mensagem.media_tentativas += 1
+            mensagem.media_reservada_em = agora
+        Mensagem.objects.bulk_update(lote, ['media_tentativas', 'media_reservada_em'])
+
+    return lote
+
+
+def processar_midias(
+    tamanho_lote: int = TAMANHO_LOTE,
+    concorrencia: int = None,
+    servico=None
+) -> Dict[str, int]:
+    """
+    Baixa as mídias de um lote de mensagens recebidas.
+
+    Returns:
+        dict: mensagens do lote, baixadas, reaproveitadas e erros
+    """
+    if servico is None:
+        from .services import whatsapp_service as servico
+    concorrencia = concorrencia or settings.WHATSAPP_MIDIA_CONCORRENCIA
+
+    resultado = {'mensagens': 0, 'baixadas': 0, 'reaproveitadas': 0, 'erros': 0}
+
+    lote = _reservar_lote(tamanho_lote)
+    if not lote:
+        return resultado
+
+    media_ids = list({m.media_id for m in lote})
+    infos = asyncio.run(_resolver(servico, media_ids, concorrencia))
+
+    # Conteúdo já baixado antes (mesmo hash): só aponta para o arquivo existente
+    hashes_meta = {info['sha256'] for info in infos.values() if info.get('sha256')}
+    existentes = dict(Mensagem.objects.filter(
+        media_sha256__in=hashes_meta,
+        media_url__isnull=False
+    ).values_list('media_sha256', 'media_url')) if hashes_meta else {}
+
+    prontos = {
+        media_id: (info['sha256'], existentes[info['sha256']])
+        for media_id, info in infos.items()
+        if info.get('sha256') in existentes
+    }
+
+    # Mesmo arquivo repetido no lote: baixa uma vez
+    a_baixar, repetidos = {}, {}
+    vistos = {}
+    for media_id, info in infos.items():
+        if media_id in prontos:
+            continue
+        sha_meta = info.get('sha256')
+        if sha_meta and sha_meta in vistos:
+            repetidos[media_id] = vistos[sha_meta]
+            continue
+        if sha_meta:
+            vistos[sha_meta] = media_id
+        a_baixar[media_id] = info
+
+    baixados = asyncio.run(_baixar(servico, a_baixar, concorrencia)) if a_baixar else {}
+    for media_id, original in repetidos.items():
+        if original in baixados:
+            prontos[media_id] = baixados[original]
+    resultado['reaproveitadas'] = len(prontos)
+    prontos.update(baixados)
+
+    # Tentativa já contada na reserva: só grava o resultado e libera a reserva
+    for mensagem in lote:
+        mensagem.media_reservada_em = None
+        concluido = prontos.get(mensagem.media_id)
+        if concluido:
+            mensagem.media_sha256, mensagem.media_url = concluido
+        else:
+            resultado['erros'] += 1
+    Mensagem.objects.bulk_update(lote, ['media_url', 'media_sha256', 'media_reservada_em'])
+
+    resultado['mensagens'] = len(lote)
+    resultado['baixadas'] = len(baixados)
+    return resultado
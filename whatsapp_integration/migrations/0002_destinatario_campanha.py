@@ -0,0 +1,38 @@
+# Generated by Django 4.2.10 on 2026-10-19 01:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0009_add_observacao_geral'),
+        ('whatsapp_integration', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DestinatarioCampanha',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('telefone', models.CharField(max_length=20, verbose_name='Telefone')),
+                ('variaveis', models.JSONField(blank=True, default=list, verbose_name='Variáveis do Template')),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('enviando', 'Enviando'), ('enviado', 'Enviado'), ('falha', 'Falha'), ('incerto', 'Incerto (interrompido durante o envio)')], default='pendente', max_length=20, verbose_name='Status')),
+                ('tentativas', models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas')),
+                ('wamid', models.CharField(blank=True, db_index=True, max_length=100, null=True, verbose_name='WhatsApp Message ID')),
+                ('erro_mensagem', models.TextField(blank=True, null=True, verbose_name='Mensagem de Erro')),
+                ('data_envio', models.DateTimeField(blank=True, null=True, verbose_name='Data de Envio')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('campanha', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='destinatarios', to='whatsapp_integration.campanhamensagem', verbose_name='Campanha')),
+                ('cliente', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='campanhas_whatsapp', to='clientes.cliente', verbose_name='Cliente')),
+            ],
+            options={
+                'verbose_name': 'Destinatário de Campanha',
+                'verbose_name_plural': 'Destinatários de Campanha',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['campanha', 'status'], name='whatsapp_in_campanh_b3b425_idx')],
+                'unique_together': {('campanha', 'telefone')},
+            },
+        ),
+    ]
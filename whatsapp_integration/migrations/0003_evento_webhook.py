@@ -0,0 +1,30 @@
+# Generated by Django 4.2.10 on 2026-10-19 01:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_integration', '0002_destinatario_campanha'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoWebhook',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payload', models.JSONField(verbose_name='Payload')),
+                ('recebido_em', models.DateTimeField(auto_now_add=True, verbose_name='Recebido em')),
+                ('processado_em', models.DateTimeField(blank=True, null=True, verbose_name='Processado em')),
+                ('tentativas', models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas')),
+                ('erro', models.TextField(blank=True, null=True, verbose_name='Erro')),
+            ],
+            options={
+                'verbose_name': 'Evento de Webhook',
+                'verbose_name_plural': 'Eventos de Webhook',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['processado_em', 'id'], name='whatsapp_in_process_bae2d5_idx')],
+            },
+        ),
+    ]
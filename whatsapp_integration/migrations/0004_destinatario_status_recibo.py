@@ -0,0 +1,18 @@
+# Generated by Django 4.2.10 on 2026-10-19 01:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_integration', '0003_evento_webhook'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='destinatariocampanha',
+            name='status',
+            field=models.CharField(choices=[('pendente', 'Pendente'), ('enviando', 'Enviando'), ('enviado', 'Enviado'), ('entregue', 'Entregue'), ('lido', 'Lido'), ('falha', 'Falha'), ('incerto', 'Incerto (interrompido durante o envio)')], default='pendente', max_length=20, verbose_name='Status'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.10 on 2026-10-19 01:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_integration', '0004_destinatario_status_recibo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mensagem',
+            name='media_sha256',
+            field=models.CharField(blank=True, db_index=True, help_text='Hash do conteúdo baixado (arquivos iguais são guardados uma vez)', max_length=64, null=True, verbose_name='SHA-256 da Mídia'),
+        ),
+        migrations.AddField(
+            model_name='mensagem',
+            name='media_tentativas',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas de Download'),
+        ),
+        migrations.AddIndex(
+            model_name='mensagem',
+            index=models.Index(condition=models.Q(('media_id__isnull', False), ('media_url__isnull', True)), fields=['id'], name='mensagem_midia_pendente'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.10 on 2026-10-19 01:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_integration', '0005_mensagem_download_midia'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='conversa',
+            name='janela_ativa',
+        ),
+        migrations.AlterField(
+            model_name='conversa',
+            name='ultima_mensagem_cliente',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='Para controle da janela de 24h', null=True, verbose_name='Última Msg do Cliente'),
+        ),
+    ]
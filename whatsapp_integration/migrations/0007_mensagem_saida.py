@@ -0,0 +1,49 @@
+# Generated by Django 4.2.10 on 2026-10-19 01:45
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('clientes', '0010_cliente_telefones_e164'),
+        ('whatsapp_integration', '0006_conversa_janela_calculada'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MensagemSaida',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('telefone', models.CharField(help_text='Número no formato da API (só dígitos, com DDI)', max_length=20, verbose_name='Telefone')),
+                ('tipo', models.CharField(choices=[('texto', 'Texto'), ('template', 'Template'), ('audio', 'Áudio (TTS)')], default='texto', max_length=20, verbose_name='Tipo')),
+                ('conteudo', models.TextField(help_text='Texto da mensagem ou texto do áudio', verbose_name='Conteúdo')),
+                ('template_nome', models.CharField(blank=True, max_length=100, null=True, verbose_name='Template')),
+                ('variaveis', models.JSONField(blank=True, default=list, verbose_name='Variáveis do Template')),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('enviando', 'Enviando'), ('enviada', 'Enviada'), ('falha', 'Falha definitiva')], default='pendente', max_length=20, verbose_name='Status')),
+                ('tentativas', models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas')),
+                ('proxima_tentativa_em', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Próxima Tentativa')),
+                ('reservada_em', models.DateTimeField(blank=True, help_text='Início do envio pelo worker (linhas presas voltam para a fila)', null=True, verbose_name='Reservada em')),
+                ('wamid', models.CharField(blank=True, db_index=True, max_length=100, null=True, verbose_name='WhatsApp Message ID')),
+                ('codigo_erro', models.IntegerField(blank=True, null=True, verbose_name='Código de Erro')),
+                ('erro_mensagem', models.TextField(blank=True, null=True, verbose_name='Mensagem de Erro')),
+                ('enviado_por_ia', models.BooleanField(default=False, verbose_name='Enviado por IA')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('enviada_em', models.DateTimeField(blank=True, null=True, verbose_name='Enviada em')),
+                ('cliente', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='envios_whatsapp', to='clientes.cliente', verbose_name='Cliente')),
+                ('conversa', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='envios', to='whatsapp_integration.conversa', verbose_name='Conversa')),
+                ('enviado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Enviado por')),
+                ('mensagem', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='envio', to='whatsapp_integration.mensagem', verbose_name='Mensagem')),
+            ],
+            options={
+                'verbose_name': 'Mensagem na Caixa de Saída',
+                'verbose_name_plural': 'Caixa de Saída',
+                'ordering': ['id'],
+                'indexes': [models.Index(condition=models.Q(('status', 'pendente')), fields=['proxima_tentativa_em', 'id'], name='saida_pendente'), models.Index(condition=models.Q(('status__in', ['pendente', 'enviando'])), fields=['telefone', 'id'], name='saida_em_aberto')],
+            },
+        ),
+    ]
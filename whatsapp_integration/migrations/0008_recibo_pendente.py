@@ -0,0 +1,28 @@
+# Generated by Django 4.2.10 on 2026-10-19 02:16
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_integration', '0007_mensagem_saida'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReciboPendente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('wamid', models.CharField(max_length=100, unique=True, verbose_name='WhatsApp Message ID')),
+                ('estado', models.JSONField(verbose_name='Estado')),
+                ('recebido_em', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Recebido em')),
+            ],
+            options={
+                'verbose_name': 'Recibo Pendente',
+                'verbose_name_plural': 'Recibos Pendentes',
+                'ordering': ['recebido_em'],
+            },
+        ),
+    ]
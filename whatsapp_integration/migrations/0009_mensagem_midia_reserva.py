@@ -0,0 +1,18 @@
+# Generated by Django 4.2.10 on 2026-10-19 02:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_integration', '0008_recibo_pendente'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mensagem',
+            name='media_reservada_em',
+            field=models.DateTimeField(blank=True, help_text='Worker baixando a mídia (reserva expira se ele cair)', null=True, verbose_name='Download Reservado em'),
+        ),
+    ]
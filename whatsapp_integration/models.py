@@ -1,14 +1,58 @@
 """
 =============================================================================
 LIFE RAINBOW 2.0 - Integração WhatsApp Business API
-Models: Conversa, Mensagem, Template, CampanhaMensagem
+Models: Conversa, Mensagem, Template, CampanhaMensagem, DestinatarioCampanha,
+        EventoWebhook, MensagemSaida, ReciboPendente
 =============================================================================
 """
 
+from datetime import timedelta
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+# Janela de atendimento: mensagens livres só até 24h após a última mensagem do cliente
+JANELA_ATENDIMENTO = timedelta(hours=24)
+
+
+class ConversaQuerySet(models.QuerySet):
+    """
+    Janela de 24h calculada na consulta a partir de ultima_mensagem_cliente
+    (indexado), sem flag gravada por conversa.
+    """
+
+    def com_janela(self):
+        """Anota janela_ativa (bool) e janela_expira_em."""
+        limite = timezone.now() - JANELA_ATENDIMENTO
+        return self.annotate(
+            janela_ativa=models.Case(
+                models.When(ultima_mensagem_cliente__gt=limite, then=models.Value(True)),
+                default=models.Value(False),
+                output_field=models.BooleanField(),
+            ),
+            janela_expira_em=models.ExpressionWrapper(
+                models.F('ultima_mensagem_cliente') + JANELA_ATENDIMENTO,
+                output_field=models.DateTimeField(),
+            ),
+        )
+
+    def janela_aberta(self):
+        """Conversas que ainda aceitam mensagem livre."""
+        return self.filter(ultima_mensagem_cliente__gt=timezone.now() - JANELA_ATENDIMENTO)
+
+    def janela_fechada(self):
+        """Conversas que só aceitam template."""
+        return self.exclude(ultima_mensagem_cliente__gt=timezone.now() - JANELA_ATENDIMENTO)
+
+    def janela_fechando(self, horas: float):
+        """Janela ainda aberta, mas expira nas próximas `horas`."""
+        limite = timezone.now() - JANELA_ATENDIMENTO
+        return self.filter(
+            ultima_mensagem_cliente__gt=limite,
+            ultima_mensagem_cliente__lte=limite + timedelta(hours=horas),
+        )
+
 
 class Conversa(models.Model):
     """
@@ -86,17 +130,14 @@ class Conversa(models.Model):
         verbose_name='Atendente'
     )
 
-    # Janela de 24h
+    # Janela de 24h (status calculado na consulta: Conversa.objects.com_janela())
     ultima_mensagem_cliente = models.DateTimeField(
         null=True,
         blank=True,
+        db_index=True,
         verbose_name='Última Msg do Cliente',
         help_text='Para controle da janela de 24h'
     )
-    janela_ativa = models.BooleanField(
-        default=False,
-        verbose_name='Janela 24h Ativa'
-    )
 
     # Contexto para IA
     contexto_ia = models.JSONField(
@@ -109,6 +150,8 @@ class Conversa(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ConversaQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Conversa WhatsApp'
         verbose_name_plural = 'Conversas WhatsApp'
@@ -118,14 +161,11 @@ class Conversa(models.Model):
         nome = self.nome_contato or self.telefone
         return f"Conversa com {nome}"
 
-    def atualizar_janela(self):
-        """Atualiza status da janela de 24h"""
-        if self.ultima_mensagem_cliente:
-            delta = timezone.now() - self.ultima_mensagem_cliente
-            self.janela_ativa = delta.total_seconds() < 86400  # 24h em segundos
-        else:
-            self.janela_ativa = False
-        self.save()
+    def dentro_da_janela(self) -> bool:
+        """Janela de 24h aberta para esta conversa (sem gravar nada)."""
+        if not self.ultima_mensagem_cliente:
+            return False
+        return timezone.now() - self.ultima_mensagem_cliente < JANELA_ATENDIMENTO
 
 
 class Mensagem(models.Model):
@@ -232,6 +272,24 @@ class Mensagem(models.Model):
         blank=True,
         verbose_name='MIME Type'
     )
+    media_sha256 = models.CharField(
+        max_length=64,
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name='SHA-256 da Mídia',
+        help_text='Hash do conteúdo baixado (arquivos iguais são guardados uma vez)'
+    )
+    media_tentativas = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Tentativas de Download'
+    )
+    media_reservada_em = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Download Reservado em',
+        help_text='Worker baixando a mídia (reserva expira se ele cair)'
+    )
 
     # Template usado (se for mensagem de template)
     template = models.ForeignKey(
@@ -285,6 +343,14 @@ class Mensagem(models.Model):
         verbose_name = 'Mensagem'
         verbose_name_plural = 'Mensagens'
         ordering = ['created_at']
+        indexes = [
+            # Fila do download de mídias recebidas (ver midias.py)
+            models.Index(
+                fields=['id'],
+                name='mensagem_midia_pendente',
+                condition=models.Q(media_id__isnull=False, media_url__isnull=True),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.get_direcao_display()} - {self.conteudo[:50]}..."
@@ -542,3 +608,323 @@ class CampanhaMensagem(models.Model):
         if self.total_lidos > 0:
             return (self.total_respostas / self.total_lidos) * 100
         return 0
+
+
+class DestinatarioCampanha(models.Model):
+    """
+    Estado de envio de uma campanha por destinatário.
+    Persistido para retomar a execução sem reenviar mensagens.
+    """
+
+    STATUS_PENDENTE = 'pendente'
+    STATUS_ENVIANDO = 'enviando'
+    STATUS_ENVIADO = 'enviado'
+    STATUS_ENTREGUE = 'entregue'
+    STATUS_LIDO = 'lido'
+    STATUS_FALHA = 'falha'
+    STATUS_INCERTO = 'incerto'
+    STATUS_CHOICES = [
+        (STATUS_PENDENTE, 'Pendente'),
+        (STATUS_ENVIANDO, 'Enviando'),
+        (STATUS_ENVIADO, 'Enviado'),
+        (STATUS_ENTREGUE, 'Entregue'),
+        (STATUS_LIDO, 'Lido'),
+        (STATUS_FALHA, 'Falha'),
+        (STATUS_INCERTO, 'Incerto (interrompido durante o envio)'),
+    ]
+
+    campanha = models.ForeignKey(
+        CampanhaMensagem,
+        on_delete=models.CASCADE,
+        related_name='destinatarios',
+        verbose_name='Campanha'
+    )
+    cliente = models.ForeignKey(
+        'clientes.Cliente',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='campanhas_whatsapp',
+        verbose_name='Cliente'
+    )
+    telefone = models.CharField(
+        max_length=20,
+        verbose_name='Telefone'
+    )
+    variaveis = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name='Variáveis do Template'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDENTE,
+        verbose_name='Status'
+    )
+    tentativas = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Tentativas'
+    )
+    wamid = models.CharField(
+        max_length=100,
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name='WhatsApp Message ID'
+    )
+    erro_mensagem = models.TextField(
+        null=True,
+        blank=True,
+        verbose_name='Mensagem de Erro'
+    )
+    data_envio = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Data de Envio'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Destinatário de Campanha'
+        verbose_name_plural = 'Destinatários de Campanha'
+        ordering = ['id']
+        unique_together = ['campanha', 'telefone']
+        indexes = [
+            models.Index(fields=['campanha', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.campanha.nome} → {self.telefone} ({self.get_status_display()})"
+
+
+class EventoWebhook(models.Model):
+    """
+    Caixa de entrada durável do webhook: payload bruto gravado antes da
+    resposta à Meta e processado depois pelo worker (processar_webhooks).
+    """
+
+    payload = models.JSONField(verbose_name='Payload')
+    recebido_em = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Recebido em'
+    )
+    processado_em = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Processado em'
+    )
+    tentativas = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Tentativas'
+    )
+    erro = models.TextField(
+        null=True,
+        blank=True,
+        verbose_name='Erro'
+    )
+
+    class Meta:
+        verbose_name = 'Evento de Webhook'
+        verbose_name_plural = 'Eventos de Webhook'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['processado_em', 'id']),
+        ]
+
+    def __str__(self):
+        situacao = 'processado' if self.processado_em else 'pendente'
+        return f"Webhook #{self.pk} ({situacao})"
+
+
+class MensagemSaida(models.Model):
+    """
+    Caixa de saída durável: cada envio avulso (atendente ou IA) é gravado
+    aqui e enviado pelo worker (enviar_mensagens), com novas tentativas e
+    ordem preservada por destinatário (ver saida.py).
+    """
+
+    TIPO_TEXTO = 'texto'
+    TIPO_TEMPLATE = 'template'
+    TIPO_AUDIO = 'audio'
+    TIPO_CHOICES = [
+        (TIPO_TEXTO, 'Texto'),
+        (TIPO_TEMPLATE, 'Template'),
+        (TIPO_AUDIO, 'Áudio (TTS)'),
+    ]
+
+    STATUS_PENDENTE = 'pendente'
+    STATUS_ENVIANDO = 'enviando'
+    STATUS_ENVIADA = 'enviada'
+    STATUS_FALHA = 'falha'
+    STATUS_CHOICES = [
+        (STATUS_PENDENTE, 'Pendente'),
+        (STATUS_ENVIANDO, 'Enviando'),
+        (STATUS_ENVIADA, 'Enviada'),
+        (STATUS_FALHA, 'Falha definitiva'),
+    ]
+
+    conversa = models.ForeignKey(
+        Conversa,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='envios',
+        verbose_name='Conversa'
+    )
+    cliente = models.ForeignKey(
+        'clientes.Cliente',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='envios_whatsapp',
+        verbose_name='Cliente'
+    )
+    telefone = models.CharField(
+        max_length=20,
+        verbose_name='Telefone',
+        help_text='Número no formato da API (só dígitos, com DDI)'
+    )
+
+    tipo = models.CharField(
+        max_length=20,
+        choices=TIPO_CHOICES,
+        default=TIPO_TEXTO,
+        verbose_name='Tipo'
+    )
+    conteudo = models.TextField(
+        verbose_name='Conteúdo',
+        help_text='Texto da mensagem ou texto do áudio'
+    )
+    template_nome = models.CharField(
+        max_length=100,
+        null=True,
+        blank=True,
+        verbose_name='Template'
+    )
+    variaveis = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name='Variáveis do Template'
+    )
+
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDENTE,
+        verbose_name='Status'
+    )
+    tentativas = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Tentativas'
+    )
+    proxima_tentativa_em = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Próxima Tentativa'
+    )
+    reservada_em = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Reservada em',
+        help_text='Início do envio pelo worker (linhas presas voltam para a fila)'
+    )
+
+    # Resultado
+    wamid = models.CharField(
+        max_length=100,
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name='WhatsApp Message ID'
+    )
+    mensagem = models.OneToOneField(
+        Mensagem,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='envio',
+        verbose_name='Mensagem'
+    )
+    codigo_erro = models.IntegerField(
+        null=True,
+        blank=True,
+        verbose_name='Código de Erro'
+    )
+    erro_mensagem = models.TextField(
+        null=True,
+        blank=True,
+        verbose_name='Mensagem de Erro'
+    )
+
+    # Remetente
+    enviado_por_ia = models.BooleanField(
+        default=False,
+        verbose_name='Enviado por IA'
+    )
+    enviado_por = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name='Enviado por'
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    enviada_em = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Enviada em'
+    )
+
+    class Meta:
+        verbose_name = 'Mensagem na Caixa de Saída'
+        verbose_name_plural = 'Caixa de Saída'
+        ordering = ['id']
+        indexes = [
+            # Fila do worker: pendentes vencidas
+            models.Index(
+                fields=['proxima_tentativa_em', 'id'],
+                name='saida_pendente',
+                condition=models.Q(status='pendente'),
+            ),
+            # Ordem por destinatário: primeira mensagem não concluída de cada telefone
+            models.Index(
+                fields=['telefone', 'id'],
+                name='saida_em_aberto',
+                condition=models.Q(status__in=['pendente', 'enviando']),
+            ),
+        ]
+
+    def __str__(self):
+        return f"Saída #{self.pk} → {self.telefone} ({self.get_status_display()})"
+
+
+class ReciboPendente(models.Model):
+    """
+    Recibo (sent/delivered/read/failed) cujo wamid ainda não está no banco.
+
+    Campanhas e a caixa de saída gravam o wamid ao fim de cada lote de
+    envios; recibos que chegam antes disso ficam aqui e são reaplicados nos
+    próximos processamentos (ver recibos.py) até expirarem.
+    """
+
+    wamid = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name='WhatsApp Message ID'
+    )
+    # Estado coalescido: {"status": ..., "datas": {etapa: ISO}, "erro": ...}
+    estado = models.JSONField(verbose_name='Estado')
+    recebido_em = models.DateTimeField(
+        default=timezone.now,
+        db_index=True,
+        verbose_name='Recebido em'
+    )
+
+    class Meta:
+        verbose_name = 'Recibo Pendente'
+        verbose_name_plural = 'Recibos Pendentes'
+        ordering = ['recebido_em']
+
+    def __str__(self):
+        return f"{self.wamid} ({self.estado.get('status')})"
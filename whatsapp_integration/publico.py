@@ -0,0 +1,151 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Público de Campanhas WhatsApp
+Resolução do público por filtros: contagem no banco e destinatários em fluxo
+=============================================================================
+
+Campanhas podem atingir 100 mil+ clientes. Em vez de carregar instâncias
+completas de Cliente:
+
+- contar() faz um único SELECT COUNT(*)
+- destinatarios() percorre (id, telefone, variáveis) com
+  values_list().iterator(chunk_size) - cursor no servidor no PostgreSQL,
+  lendo só as colunas necessárias, com memória constante
+
+Uso:
+    publico = Publico.da_campanha(campanha)
+    total = publico.contar()
+    for cliente_id, telefone, variaveis in publico.destinatarios(['primeiro_nome']):
+        ...
+"""
+
+from datetime import timedelta
+from typing import Iterator, List, Optional, Tuple
+
+from django.db.models import Q
+from django.utils import timezone
+
+TAMANHO_BLOCO = 2000
+
+# Colunas de telefone, na ordem de preferência (E.164 primeiro)
+COLUNAS_TELEFONE = ('whatsapp_e164', 'telefone_e164', 'whatsapp', 'telefone')
+
+# Variáveis de template que não são colunas: nome → (coluna, transformação)
+VARIAVEIS_DERIVADAS = {
+    'primeiro_nome': ('nome', lambda valor: (valor or '').split(' ')[0]),
+}
+
+
+class Publico:
+    """
+    Clientes ativos que aceitam WhatsApp e têm telefone, restritos pelos
+    filtros de perfil, segmento, consultor e dias sem contato.
+    """
+
+    def __init__(
+        self,
+        perfis: Optional[List[str]] = None,
+        segmentos: Optional[List[str]] = None,
+        consultor_id: Optional[int] = None,
+        consultor_nome: Optional[str] = None,
+        dias_sem_contato: Optional[int] = None,
+    ):
+        self.perfis = perfis
+        self.segmentos = segmentos
+        self.consultor_id = consultor_id
+        self.consultor_nome = consultor_nome
+        self.dias_sem_contato = dias_sem_contato
+
+    @classmethod
+    def da_campanha(cls, campanha) -> 'Publico':
+        """Público definido pelos filtros gravados na CampanhaMensagem."""
+        return cls(
+            perfis=campanha.filtro_perfil or None,
+            segmentos=campanha.filtro_segmento or None,
+            consultor_id=campanha.filtro_consultor_id,
+        )
+
+    def queryset(self):
+        """QuerySet de Cliente do público (sem colunas selecionadas)."""
+        from clientes.models import Cliente
+
+        query = Cliente.objects.filter(
+            status='ativo',
+            aceita_whatsapp=True
+        ).exclude(
+            (Q(whatsapp__isnull=True) | Q(whatsapp='')) &
+            (Q(telefone__isnull=True) | Q(telefone=''))
+        )
+
+        if self.perfis:
+            query = query.filter(perfil__in=self.perfis)
+        if self.segmentos:
+            query = query.filter(segmento__in=self.segmentos)
+        if self.consultor_id:
+            query = query.filter(consultor_responsavel_id=self.consultor_id)
+        if self.consultor_nome:
+            query = query.filter(consultor_responsavel__first_name__icontains=self.consultor_nome)
+        if self.dias_sem_contato:
+            data_limite = timezone.now() - timedelta(days=self.dias_sem_contato)
+            query = query.filter(
+                Q(data_ultimo_contato__lt=data_limite) |
+                Q(data_ultimo_contato__isnull=True)
+            )
+
+        return query
+
+    def contar(self) -> int:
+        """Total de clientes do público (SELECT COUNT(*))."""
+        return self.queryset().count()
+
+    def destinatarios(
+        self,
+        variaveis: Optional[List[str]] = None,
+        tamanho_bloco: int = TAMANHO_BLOCO
+    ) -> Iterator[Tuple[int, str, List[str]]]:
+        """
+        (cliente_id, telefone, valores das variáveis do template), em ordem
+        de id, lendo do banco em blocos de `tamanho_bloco` linhas.
+
+        Variáveis são nomes de colunas de Cliente (ou 'primeiro_nome');
+        nomes desconhecidos viram ''.
+        """
+        from clientes.models import Cliente
+
+        variaveis = variaveis or []
+        campos_cliente = {f.name for f in Cliente._meta.concrete_fields}
+
+        colunas = ['id', *COLUNAS_TELEFONE]
+        leitores = []
+        for nome in variaveis:
+            coluna, transformar = VARIAVEIS_DERIVADAS.get(nome, (nome, None))
+            if coluna not in campos_cliente:
+                leitores.append(None)
+                continue
+            if coluna not in colunas:
+                colunas.append(coluna)
+            leitores.append((colunas.index(coluna), transformar))
+
+        linhas = self.queryset().order_by('id').values_list(*colunas).iterator(
+            chunk_size=tamanho_bloco
+        )
+        inicio_telefones = 1
+        fim_telefones = 1 + len(COLUNAS_TELEFONE)
+
+        for linha in linhas:
+            telefone = next(
+                (t for t in linha[inicio_telefones:fim_telefones] if t), None
+            )
+            if not telefone:
+                continue
+
+            valores = []
+            for leitor in leitores:
+                if leitor is None:
+                    valores.append('')
+                    continue
+                indice, transformar = leitor
+                valor = linha[indice]
+                valores.append(transformar(valor) if transformar else str(valor or ''))
+
+            yield linha[0], telefone, valores
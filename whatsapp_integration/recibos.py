@@ -0,0 +1,311 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Recibos de Entrega/Leitura do WhatsApp
+Coalesce eventos de status e aplica em lote (UPDATE por wamid)
+=============================================================================
+
+Uma rajada de webhooks traz vários status para a mesma mensagem
+(sent → delivered → read, reentregas, fora de ordem). O processador:
+
+1. Acumula em memória apenas o estado mais avançado por wamid
+   (com o horário de cada etapa)
+2. No flush, aplica em Mensagem com UPDATEs em lote pelo wamid indexado,
+   só avançando o status (nunca volta de 'lida' para 'entregue')
+3. Avança DestinatarioCampanha e incrementa total_entregues/total_lidos/
+   total_falhas com um único UPDATE F() por campanha
+
+Campanhas e a caixa de saída só gravam o wamid ao fim de cada lote de
+envios, e o recibo 'sent' costuma chegar antes. Recibos de wamids que
+ainda não estão no banco vão para ReciboPendente e são reaplicados nos
+próximos flushes (coalescidos com os que chegarem depois) até
+RECIBO_PENDENTE_EXPIRA.
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Any, Dict, Iterable, List, Set
+
+from django.db import transaction
+from django.db.models import Case, DateTimeField, F, TextField, Value, When
+from django.utils import timezone
+
+from .models import CampanhaMensagem, DestinatarioCampanha, Mensagem, ReciboPendente
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_UPDATE = 500
+
+# Recibos sem mensagem conhecida: por quanto tempo reaplicar e quantos por flush
+RECIBO_PENDENTE_EXPIRA = timedelta(hours=1)
+LIMITE_PENDENTES = 5000
+
+# Ordem dos estados da API (failed é terminal)
+ORDEM_STATUS = {'sent': 1, 'delivered': 2, 'read': 3, 'failed': 4}
+
+STATUS_MENSAGEM = {
+    'sent': Mensagem.STATUS_ENVIADA,
+    'delivered': Mensagem.STATUS_ENTREGUE,
+    'read': Mensagem.STATUS_LIDA,
+    'failed': Mensagem.STATUS_FALHA,
+}
+
+# Status de Mensagem que já estão no estado (ou além) e não devem ser alterados
+STATUS_MENSAGEM_ALCANCADOS = {
+    'sent': [Mensagem.STATUS_ENVIADA, Mensagem.STATUS_ENTREGUE, Mensagem.STATUS_LIDA, Mensagem.STATUS_FALHA],
+    'delivered': [Mensagem.STATUS_ENTREGUE, Mensagem.STATUS_LIDA, Mensagem.STATUS_FALHA],
+    'read': [Mensagem.STATUS_LIDA, Mensagem.STATUS_FALHA],
+    'failed': [Mensagem.STATUS_FALHA],
+}
+
+CAMPO_DATA = {
+    'sent': 'data_envio',
+    'delivered': 'data_entrega',
+    'read': 'data_leitura',
+}
+
+
+def _data_evento(timestamp) -> datetime:
+    try:
+        return datetime.fromtimestamp(int(timestamp), tz=dt_timezone.utc)
+    except (TypeError, ValueError):
+        return None
+
+
+def _mesclar(estado: Dict[str, Any], outro: Dict[str, Any]) -> None:
+    """Junta dois estados do mesmo wamid (status mais avançado, datas mais antigas)."""
+    if outro['status'] and (
+        estado['status'] is None or ORDEM_STATUS[outro['status']] > ORDEM_STATUS[estado['status']]
+    ):
+        estado['status'] = outro['status']
+    for etapa, data in outro['datas'].items():
+        anterior = estado['datas'].get(etapa)
+        estado['datas'][etapa] = min(anterior, data) if anterior else data
+    estado['erro'] = estado['erro'] or outro['erro']
+
+
+def _serializar(estado: Dict[str, Any]) -> Dict[str, Any]:
+    return {**estado, 'datas': {etapa: d.isoformat() for etapa, d in estado['datas'].items()}}
+
+
+def _desserializar(estado: Dict[str, Any]) -> Dict[str, Any]:
+    return {**estado, 'datas': {etapa: datetime.fromisoformat(d) for etapa, d in estado['datas'].items()}}
+
+
+def _blocos(itens: List, tamanho: int = TAMANHO_UPDATE) -> Iterable[List]:
+    for i in range(0, len(itens), tamanho):
+        yield itens[i:i + tamanho]
+
+
+class ProcessadorRecibos:
+    """
+    Acumula eventos de status e aplica tudo de uma vez em `descarregar()`.
+
+    Uso:
+        processador = ProcessadorRecibos()
+        processador.adicionar(eventos['status'])  # quantas vezes precisar
+        processador.descarregar()
+    """
+
+    def __init__(self):
+        self._estados: Dict[str, Dict[str, Any]] = {}
+
+    def __len__(self):
+        return len(self._estados)
+
+    def adicionar(self, eventos: Iterable[Dict[str, Any]]):
+        """Coalesce eventos no formato de WhatsAppService._processar_status."""
+        for evento in eventos:
+            wamid = evento.get('wamid')
+            status = evento.get('status')
+            if not wamid or status not in ORDEM_STATUS:
+                continue
+
+            novo = {'status': status, 'datas': {}, 'erro': None}
+            data = _data_evento(evento.get('timestamp'))
+            if status in CAMPO_DATA and data:
+                novo['datas'][status] = data
+            if status == 'failed' and evento.get('erro'):
+                erro = evento['erro']
+                novo['erro'] = erro.get('title') or erro.get('message') or str(erro)
+
+            estado = self._estados.setdefault(wamid, {'status': None, 'datas': {}, 'erro': None})
+            _mesclar(estado, novo)
+
+        return self
+
+    def descarregar(self) -> Dict[str, int]:
+        """
+        Aplica os estados acumulados (e os recibos pendentes) e limpa o buffer.
+
+        Returns:
+            dict: mensagens atualizadas, incrementos aplicados às campanhas e
+            recibos que continuam pendentes
+        """
+        estados, self._estados = self._estados, {}
+        resultado = {'mensagens': 0, 'entregues': 0, 'lidos': 0, 'falhas': 0, 'pendentes': 0}
+
+        with transaction.atomic():
+            pendentes = self._carregar_pendentes(estados)
+            if not estados:
+                return resultado
+
+            conhecidos = self._conhecidos(list(estados))
+            aplicaveis = {w: e for w, e in estados.items() if w in conhecidos}
+
+            if aplicaveis:
+                resultado['mensagens'] = self._aplicar_mensagens(aplicaveis)
+                for chave, valor in self._aplicar_campanhas(aplicaveis).items():
+                    resultado[chave] = valor
+
+            resultado['pendentes'] = self._guardar_pendentes(estados, conhecidos, pendentes)
+
+        return resultado
+
+    # -------------------------------------------------------------------------
+
+    def _carregar_pendentes(self, estados: Dict[str, Dict]) -> Dict[str, ReciboPendente]:
+        """Junta aos estados os recibos pendentes ainda válidos (e descarta os expirados)."""
+        ReciboPendente.objects.filter(
+            recebido_em__lt=timezone.now() - RECIBO_PENDENTE_EXPIRA
+        ).delete()
+
+        pendentes = {
+            p.wamid: p
+            for p in ReciboPendente.objects.order_by('recebido_em')
+            .select_for_update(skip_locked=True)[:LIMITE_PENDENTES]
+        }
+        for wamid, pendente in pendentes.items():
+            anterior = _desserializar(pendente.estado)
+            if wamid in estados:
+                _mesclar(anterior, estados[wamid])
+            estados[wamid] = anterior
+        return pendentes
+
+    def _conhecidos(self, wamids: List[str]) -> Set[str]:
+        """wamids que já existem em Mensagem ou DestinatarioCampanha."""
+        conhecidos = set()
+        for bloco in _blocos(wamids):
+            conhecidos.update(Mensagem.objects.filter(wamid__in=bloco).values_list('wamid', flat=True))
+            conhecidos.update(
+                DestinatarioCampanha.objects.filter(wamid__in=bloco).values_list('wamid', flat=True)
+            )
+        return conhecidos
+
+    def _guardar_pendentes(
+        self,
+        estados: Dict[str, Dict],
+        conhecidos: Set[str],
+        pendentes: Dict[str, ReciboPendente]
+    ) -> int:
+        """Remove os pendentes aplicados e grava/atualiza os que seguem sem mensagem."""
+        aplicados = [p.pk for w, p in pendentes.items() if w in conhecidos]
+        if aplicados:
+            ReciboPendente.objects.filter(pk__in=aplicados).delete()
+
+        novos, alterados = [], []
+        for wamid, estado in estados.items():
+            if wamid in conhecidos:
+                continue
+            pendente = pendentes.get(wamid)
+            if pendente is None:
+                novos.append(ReciboPendente(wamid=wamid, estado=_serializar(estado)))
+            elif _serializar(estado) != pendente.estado:
+                pendente.estado = _serializar(estado)
+                alterados.append(pendente)
+
+        # update_conflicts: outro worker pode ter guardado o mesmo wamid
+        ReciboPendente.objects.bulk_create(
+            novos, update_conflicts=True, unique_fields=['wamid'], update_fields=['estado']
+        )
+        ReciboPendente.objects.bulk_update(alterados, ['estado'])
+        return len(estados) - len(conhecidos & estados.keys())
+
+    # -------------------------------------------------------------------------
+
+    def _aplicar_mensagens(self, estados: Dict[str, Dict]) -> int:
+        """Status (só avança) e datas de cada etapa em Mensagem."""
+        atualizadas = 0
+
+        por_status: Dict[str, List[str]] = {}
+        for wamid, estado in estados.items():
+            por_status.setdefault(estado['status'], []).append(wamid)
+
+        for status, wamids in por_status.items():
+            for bloco in _blocos(wamids):
+                campos = {'status': STATUS_MENSAGEM[status]}
+                if status == 'failed':
+                    erros = [When(wamid=w, then=Value(estados[w]['erro']))
+                             for w in bloco if estados[w]['erro']]
+                    if erros:
+                        campos['erro_mensagem'] = Case(
+                            *erros, default=F('erro_mensagem'), output_field=TextField()
+                        )
+
+                atualizadas += Mensagem.objects.filter(wamid__in=bloco).exclude(
+                    status__in=STATUS_MENSAGEM_ALCANCADOS[status]
+                ).update(**campos)
+
+        # Datas: só preenche as que ainda estão vazias ('read' implica entrega)
+        for etapa, campo in CAMPO_DATA.items():
+            datas = {}
+            for wamid, estado in estados.items():
+                data = estado['datas'].get(etapa)
+                if data is None and etapa == 'delivered':
+                    data = estado['datas'].get('read')
+                if data:
+                    datas[wamid] = data
+
+            for bloco in _blocos(list(datas)):
+                Mensagem.objects.filter(
+                    wamid__in=bloco, **{f'{campo}__isnull': True}
+                ).update(**{campo: Case(
+                    *[When(wamid=w, then=Value(datas[w])) for w in bloco],
+                    output_field=DateTimeField(),
+                )})
+
+        return atualizadas
+
+    def _aplicar_campanhas(self, estados: Dict[str, Dict]) -> Dict[str, int]:
+        """Avança destinatários e aplica um UPDATE F() por campanha."""
+        totais = {'entregues': 0, 'lidos': 0, 'falhas': 0}
+
+        campanhas: Dict[int, List[str]] = {}
+        for bloco in _blocos(list(estados)):
+            for campanha_id, wamid in DestinatarioCampanha.objects.filter(
+                wamid__in=bloco
+            ).values_list('campanha_id', 'wamid'):
+                campanhas.setdefault(campanha_id, []).append(wamid)
+
+        for campanha_id, wamids in campanhas.items():
+            entregues = [w for w in wamids if estados[w]['status'] in ('delivered', 'read')]
+            lidos = [w for w in wamids if estados[w]['status'] == 'read']
+            falhas = [w for w in wamids if estados[w]['status'] == 'failed']
+            destinatarios = DestinatarioCampanha.objects.filter(campanha_id=campanha_id)
+
+            # O retorno de cada UPDATE condicional é o número de transições reais
+            # (reentregas do mesmo recibo não contam de novo)
+            n_entregues = destinatarios.filter(
+                wamid__in=entregues, status=DestinatarioCampanha.STATUS_ENVIADO
+            ).update(status=DestinatarioCampanha.STATUS_ENTREGUE) if entregues else 0
+            n_lidos = destinatarios.filter(
+                wamid__in=lidos, status=DestinatarioCampanha.STATUS_ENTREGUE
+            ).update(status=DestinatarioCampanha.STATUS_LIDO) if lidos else 0
+            n_falhas = destinatarios.filter(
+                wamid__in=falhas, status=DestinatarioCampanha.STATUS_ENVIADO
+            ).update(
+                status=DestinatarioCampanha.STATUS_FALHA,
+                erro_mensagem='Falha na entrega (recibo da API)'
+            ) if falhas else 0
+
+            if n_entregues or n_lidos or n_falhas:
+                CampanhaMensagem.objects.filter(pk=campanha_id).update(
+                    total_entregues=F('total_entregues') + n_entregues,
+                    total_lidos=F('total_lidos') + n_lidos,
+                    total_falhas=F('total_falhas') + n_falhas,
+                )
+
+            totais['entregues'] += n_entregues
+            totais['lidos'] += n_lidos
+            totais['falhas'] += n_falhas
+
+        return totais
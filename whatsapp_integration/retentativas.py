@@ -0,0 +1,32 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Política de Novas Tentativas do WhatsApp
+Classificação de erros da Cloud API e espera exponencial com jitter
+=============================================================================
+
+Usada pela caixa de saída (saida.py) e pelas campanhas (campanhas.py):
+só erros temporários (limite de taxa, indisponibilidade, rede) são
+repetidos, e a espera dobra a cada tentativa com jitter para que vários
+workers não voltem a bater na API ao mesmo tempo.
+"""
+
+import random
+from typing import Any, Dict
+
+# Erros temporários da Cloud API (limite de taxa / indisponibilidade)
+CODIGOS_ERRO_TEMPORARIO = {4, 80007, 130429, 131000, 131016, 131048, 131056}
+
+
+def erro_temporario(resultado: Dict[str, Any]) -> bool:
+    """Falha que vale repetir (sem error_code = falha de rede/timeout)."""
+    codigo = resultado.get('error_code')
+    return codigo is None or codigo in CODIGOS_ERRO_TEMPORARIO
+
+
+def calcular_espera(tentativa: int, base: float, maximo: float) -> float:
+    """
+    Segundos até a próxima tentativa: base * 2^(tentativa-1), limitado a
+    `maximo`, com "equal jitter" (metade fixa + metade aleatória).
+    """
+    teto = min(maximo, base * 2 ** max(tentativa - 1, 0))
+    return teto / 2 + random.uniform(0, teto / 2)
@@ -0,0 +1,322 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Caixa de Saída do WhatsApp
+Envios avulsos duráveis: fila no banco, novas tentativas e ordem por telefone
+=============================================================================
+
+Atendentes e o assistente de IA não chamam mais a Graph API na requisição:
+enfileirar() grava uma MensagemSaida e o worker envia depois.
+
+O worker, a cada lote:
+1. Devolve à fila envios presos em 'enviando' há mais de RESERVA_EXPIRA
+   (worker caiu no meio do envio; a mensagem pode sair duas vezes)
+2. Reserva pendentes vencidas que sejam a primeira mensagem em aberto do
+   seu telefone - a próxima mensagem para o mesmo número só sai depois
+   que a anterior for enviada ou descartada
+3. Envia com concorrência limitada
+4. Grava o resultado: sucesso cria a Mensagem na conversa; erro
+   temporário volta para a fila com espera exponencial + jitter; erro
+   definitivo ou WHATSAPP_SAIDA_MAX_TENTATIVAS esgotadas vai para 'falha'
+   (dead-letter, reenviável pelo admin)
+
+Executar continuamente:
+    python manage.py enviar_mensagens --continuo
+"""
+
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, F, Min, OuterRef
+from django.utils import timezone
+
+from .models import Mensagem, MensagemSaida
+from .retentativas import calcular_espera, erro_temporario
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_LOTE = 100
+RESERVA_EXPIRA = timedelta(minutes=5)
+
+# Janela das métricas de latência
+JANELA_METRICAS = timedelta(hours=1)
+
+TIPOS_MENSAGEM = {
+    MensagemSaida.TIPO_TEXTO: Mensagem.TIPO_TEXTO,
+    MensagemSaida.TIPO_TEMPLATE: Mensagem.TIPO_TEMPLATE,
+    MensagemSaida.TIPO_AUDIO: Mensagem.TIPO_AUDIO,
+}
+
+
+def _telefone_api(telefone: str) -> str:
+    """Número como a API recebe (e como a ordem é agrupada): dígitos com DDI."""
+    from clientes.telefones import normalizar_telefone
+
+    e164 = normalizar_telefone(telefone)
+    if e164:
+        return e164.lstrip('+')
+    return ''.join(filter(str.isdigit, telefone or ''))
+
+
+def enfileirar(
+    telefone: str,
+    conteudo: str,
+    tipo: str = MensagemSaida.TIPO_TEXTO,
+    template_nome: str = None,
+    variaveis: List[str] = None,
+    conversa=None,
+    cliente_id: int = None,
+    usuario=None,
+    enviado_por_ia: bool = False,
+) -> MensagemSaida:
+    """
+    Grava um envio na caixa de saída (o worker envia em seguida).
+
+    Raises:
+        ValueError: telefone vazio ou template sem nome
+    """
+    numero = _telefone_api(telefone)
+    if not numero:
+        raise ValueError('Telefone inválido para envio')
+    if tipo == MensagemSaida.TIPO_TEMPLATE and not template_nome:
+        raise ValueError('Envio de template exige o nome do template')
+
+    envio = MensagemSaida.objects.create(
+        conversa=conversa,
+        cliente_id=cliente_id or (conversa.cliente_id if conversa else None),
+        telefone=numero,
+        tipo=tipo,
+        conteudo=conteudo,
+        template_nome=template_nome,
+        variaveis=variaveis or [],
+        enviado_por=usuario if usuario and usuario.is_authenticated else None,
+        enviado_por_ia=enviado_por_ia,
+    )
+    logger.info(f'📤 Envio #{envio.pk} enfileirado para {numero} ({tipo})')
+    return envio
+
+
+# =============================================================================
+# WORKER
+# =============================================================================
+
+def _recuperar_presos() -> int:
+    """Reservas expiradas voltam para a fila (entrega pelo menos uma vez)."""
+    return MensagemSaida.objects.filter(
+        status=MensagemSaida.STATUS_ENVIANDO,
+        reservada_em__lt=timezone.now() - RESERVA_EXPIRA
+    ).update(
+        status=MensagemSaida.STATUS_PENDENTE,
+        tentativas=F('tentativas') + 1,
+        proxima_tentativa_em=timezone.now(),
+        erro_mensagem='Envio interrompido (reserva expirada)'
+    )
+
+
+def _reservar_lote(tamanho: int) -> List[MensagemSaida]:
+    """Pendentes vencidas que são a primeira mensagem em aberto do seu telefone."""
+    agora = timezone.now()
+
+    # Mensagem anterior ainda em aberto para o mesmo telefone
+    anterior = MensagemSaida.objects.filter(
+        telefone=OuterRef('telefone'),
+        id__lt=OuterRef('id'),
+        status__in=[MensagemSaida.STATUS_PENDENTE, MensagemSaida.STATUS_ENVIANDO]
+    )
+
+    with transaction.atomic():
+        lote = list(MensagemSaida.objects.filter(
+            ~Exists(anterior),
+            status=MensagemSaida.STATUS_PENDENTE,
+            proxima_tentativa_em__lte=agora
+        ).order_by('id').select_for_update(skip_locked=True)[:tamanho])
+
+        MensagemSaida.objects.filter(pk__in=[e.pk for e in lote]).update(
+            status=MensagemSaida.STATUS_ENVIANDO,
+            reservada_em=agora
+        )
+
+    return lote
+
+
+async def _enviar_um(servico, envio: MensagemSaida, semaforo: asyncio.Semaphore) -> Dict[str, Any]:
+    async with semaforo:
+        try:
+            if envio.tipo == MensagemSaida.TIPO_TEMPLATE:
+                return await servico.enviar_template(
+                    envio.telefone, envio.template_nome, envio.variaveis
+                )
+            if envio.tipo == MensagemSaida.TIPO_AUDIO:
+                return await servico.enviar_audio(envio.telefone, envio.conteudo)
+            return await servico.enviar_mensagem_texto(envio.telefone, envio.conteudo)
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+
+async def _enviar_lote(servico, lote: List[MensagemSaida], concorrencia: int) -> List[Dict[str, Any]]:
+    semaforo = asyncio.Semaphore(concorrencia)
+    return await asyncio.gather(*(_enviar_um(servico, e, semaforo) for e in lote))
+
+
+def _gravar_resultados(lote: List[MensagemSaida], resultados: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Grava o lote: Mensagens dos envios concluídos + um bulk_update da fila."""
+    agora = timezone.now()
+    max_tentativas = settings.WHATSAPP_SAIDA_MAX_TENTATIVAS
+    totais = {'enviadas': 0, 'reenviar': 0, 'falhas': 0}
+    concluidos = []
+
+    for envio, resultado in zip(lote, resultados):
+        envio.tentativas += 1
+        envio.reservada_em = None
+
+        if resultado.get('success'):
+            envio.status = MensagemSaida.STATUS_ENVIADA
+            envio.wamid = resultado.get('message_id')
+            envio.enviada_em = agora
+            envio.codigo_erro = envio.erro_mensagem = None
+            concluidos.append(envio)
+            totais['enviadas'] += 1
+            continue
+
+        envio.codigo_erro = resultado.get('error_code')
+        envio.erro_mensagem = resultado.get('error') or 'Erro desconhecido'
+
+        if erro_temporario(resultado) and envio.tentativas < max_tentativas:
+            espera = calcular_espera(
+                envio.tentativas,
+                settings.WHATSAPP_SAIDA_ESPERA_BASE,
+                settings.WHATSAPP_SAIDA_ESPERA_MAX
+            )
+            envio.status = MensagemSaida.STATUS_PENDENTE
+            envio.proxima_tentativa_em = agora + timedelta(seconds=espera)
+            totais['reenviar'] += 1
+        else:
+            envio.status = MensagemSaida.STATUS_FALHA
+            totais['falhas'] += 1
+            logger.warning(
+                f'☠️ Envio #{envio.pk} para {envio.telefone} descartado após '
+                f'{envio.tentativas} tentativa(s): {envio.erro_mensagem}'
+            )
+
+    with transaction.atomic():
+        com_conversa = [e for e in concluidos if e.conversa_id]
+        mensagens = Mensagem.objects.bulk_create([
+            Mensagem(
+                conversa_id=e.conversa_id,
+                direcao=Mensagem.DIRECAO_SAIDA,
+                tipo=TIPOS_MENSAGEM[e.tipo],
+                conteudo=e.conteudo,
+                wamid=e.wamid,
+                status=Mensagem.STATUS_ENVIADA,
+                enviado_por_id=e.enviado_por_id,
+                enviado_por_ia=e.enviado_por_ia,
+                data_envio=agora,
+            )
+            for e in com_conversa
+        ])
+        for envio, mensagem in zip(com_conversa, mensagens):
+            envio.mensagem_id = mensagem.pk
+
+        MensagemSaida.objects.bulk_update(lote, [
+            'status', 'tentativas', 'reservada_em', 'proxima_tentativa_em', 'wamid',
+            'mensagem', 'codigo_erro', 'erro_mensagem', 'enviada_em',
+        ])
+
+    return totais
+
+
+def processar_saida(
+    tamanho_lote: int = TAMANHO_LOTE,
+    concorrencia: int = None,
+    servico=None
+) -> Dict[str, int]:
+    """
+    Envia um lote da caixa de saída.
+
+    Returns:
+        dict: envios do lote, enviadas, reenviar (em espera), falhas e recuperados
+    """
+    if servico is None:
+        from .services import whatsapp_service as servico
+    concorrencia = concorrencia or settings.WHATSAPP_SAIDA_CONCORRENCIA
+
+    resultado = {'envios': 0, 'enviadas': 0, 'reenviar': 0, 'falhas': 0}
+    resultado['recuperados'] = _recuperar_presos()
+
+    lote = _reservar_lote(tamanho_lote)
+    if not lote:
+        return resultado
+
+    respostas = asyncio.run(_enviar_lote(servico, lote, concorrencia))
+    resultado.update(_gravar_resultados(lote, respostas))
+    resultado['envios'] = len(lote)
+    return resultado
+
+
+def reenfileirar(ids: List[int]) -> int:
+    """Devolve envios descartados (dead-letter) à fila, com tentativas zeradas."""
+    return MensagemSaida.objects.filter(
+        pk__in=ids,
+        status=MensagemSaida.STATUS_FALHA
+    ).update(
+        status=MensagemSaida.STATUS_PENDENTE,
+        tentativas=0,
+        proxima_tentativa_em=timezone.now(),
+        codigo_erro=None,
+        erro_mensagem=None
+    )
+
+
+# =============================================================================
+# MÉTRICAS
+# =============================================================================
+
+def _percentil(valores: List[float], p: float) -> Optional[float]:
+    if not valores:
+        return None
+    indice = min(len(valores) - 1, int(round(p / 100 * (len(valores) - 1))))
+    return round(valores[indice], 2)
+
+
+def metricas_saida() -> Dict[str, Any]:
+    """
+    Profundidade da fila e latência de envio (created_at → enviada_em).
+
+    Returns:
+        dict: por_status, vencidas, em_espera, idade_mais_antiga_s e
+              latencia_s (média/p50/p95/máx dos envios da última hora)
+    """
+    agora = timezone.now()
+    pendentes = MensagemSaida.objects.filter(status=MensagemSaida.STATUS_PENDENTE)
+
+    por_status = dict(
+        MensagemSaida.objects.values_list('status').annotate(total=Count('id')).order_by()
+    )
+    mais_antiga = pendentes.aggregate(criada=Min('created_at'))['criada']
+
+    latencias = sorted(
+        (enviada - criada).total_seconds()
+        for criada, enviada in MensagemSaida.objects.filter(
+            status=MensagemSaida.STATUS_ENVIADA,
+            enviada_em__gte=agora - JANELA_METRICAS
+        ).values_list('created_at', 'enviada_em')
+    )
+
+    return {
+        'por_status': {
+            status: por_status.get(status, 0) for status, _ in MensagemSaida.STATUS_CHOICES
+        },
+        'vencidas': pendentes.filter(proxima_tentativa_em__lte=agora).count(),
+        'em_espera': pendentes.filter(proxima_tentativa_em__gt=agora).count(),
+        'idade_mais_antiga_s': round((agora - mais_antiga).total_seconds(), 1) if mais_antiga else 0,
+        'latencia_s': {
+            'enviadas': len(latencias),
+            'media': round(sum(latencias) / len(latencias), 2) if latencias else None,
+            'p50': _percentil(latencias, 50),
+            'p95': _percentil(latencias, 95),
+            'max': round(latencias[-1], 2) if latencias else None,
+        },
+    }
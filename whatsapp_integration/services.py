@@ -3,19 +3,33 @@
 LIFE RAINBOW 2.0 - WhatsApp Business API Service
 Serviço para envio e recebimento de mensagens via WhatsApp Cloud API
 =============================================================================
+
+Conexões HTTP: um único httpx.AsyncClient por processo (keep-alive, pool
+de conexões e HTTP/2 quando o pacote h2 está instalado), executado em um
+loop de I/O dedicado. Assim o pool é reaproveitado mesmo por chamadores
+que criam um event loop por requisição (views síncronas).
 """
 
+import asyncio
+import atexit
+import hashlib
 import httpx
 import logging
-from typing import Optional, Dict, Any, List
+import os
+import threading
+from typing import Optional, Dict, Any, List, Union
 from django.conf import settings
 from django.utils import timezone
-from gtts import gTTS
-import tempfile
 import base64
 
 logger = logging.getLogger(__name__)
 
+try:
+    import h2  # noqa: F401 - habilita HTTP/2 no httpx
+    HTTP2_DISPONIVEL = True
+except ImportError:
+    HTTP2_DISPONIVEL = False
+
 
 class WhatsAppService:
     """
@@ -31,6 +45,13 @@ class WhatsAppService:
             'Content-Type': 'application/json',
         }
 
+        # Cliente HTTP compartilhado (criado sob demanda no loop de I/O)
+        self._cliente: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
     # =========================================================================
     # ENVIO DE MENSAGENS
     # =========================================================================
@@ -125,30 +146,38 @@ class WhatsAppService:
     ) -> Dict[str, Any]:
         """
         Converte texto em áudio (TTS) e envia via WhatsApp.
-        Usa Google TTS para gerar o áudio.
+        Usa Google TTS para gerar o áudio; o MP3 e o media_id ficam em cache
+        por conteúdo (ver tts.py), então o mesmo texto não é sintetizado
+        nem enviado de novo para a API.
         """
+        from . import tts
+
         try:
-            # Gerar áudio com gTTS
-            tts = gTTS(text=texto, lang='pt-br', slow=False)
-
-            # Salvar temporariamente
-            with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as fp:
-                tts.save(fp.name)
-                fp.seek(0)
-
-                # Upload do áudio para WhatsApp
-                media_id = await self._upload_media(fp.name, 'audio/mpeg')
-
-                if media_id:
-                    payload = {
-                        'messaging_product': 'whatsapp',
-                        'to': self._formatar_telefone(telefone),
-                        'type': 'audio',
-                        'audio': {
-                            'id': media_id
-                        }
-                    }
-                    return await self._fazer_requisicao(payload)
+            upload, do_cache = await tts.obter_media_id(self, texto)
+            if not upload['success']:
+                # Erro do upload (com error_code) para a política de novas tentativas
+                return upload
+
+            payload = {
+                'messaging_product': 'whatsapp',
+                'to': self._formatar_telefone(telefone),
+                'type': 'audio',
+                'audio': {
+                    'id': upload['media_id']
+                }
+            }
+            resultado = await self._fazer_requisicao(payload)
+
+            # media_id do cache pode ter expirado antes do previsto: novo upload
+            if do_cache and resultado.get('error_code') in tts.CODIGOS_ERRO_MIDIA:
+                tts.esquecer_media_id(self, texto)
+                upload, _ = await tts.obter_media_id(self, texto)
+                if not upload['success']:
+                    return upload
+                payload['audio']['id'] = upload['media_id']
+                resultado = await self._fazer_requisicao(payload)
+
+            return resultado
 
         except Exception as e:
             logger.error(f'Erro ao enviar áudio: {e}')
@@ -365,30 +394,29 @@ class WhatsAppService:
     def processar_webhook(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """
         Processa payload recebido do webhook do WhatsApp.
-        Retorna dados estruturados da mensagem/evento.
+
+        A Meta agrupa vários eventos por POST: percorre todos os entries,
+        changes, messages e statuses.
+
+        Returns:
+            dict: {'mensagens': [...], 'status': [...]} com os dados
+            estruturados de cada mensagem recebida/atualização de status
         """
-        try:
-            entry = payload.get('entry', [{}])[0]
-            changes = entry.get('changes', [{}])[0]
-            value = changes.get('value', {})
+        eventos = {'mensagens': [], 'status': []}
 
-            # Mensagens recebidas
-            messages = value.get('messages', [])
-            if messages:
-                msg = messages[0]
-                return self._processar_mensagem_recebida(msg, value)
+        for entry in payload.get('entry') or []:
+            for change in entry.get('changes') or []:
+                value = change.get('value') or {}
 
-            # Status de mensagem enviada
-            statuses = value.get('statuses', [])
-            if statuses:
-                status = statuses[0]
-                return self._processar_status(status)
+                for msg in value.get('messages') or []:
+                    eventos['mensagens'].append(
+                        self._processar_mensagem_recebida(msg, value)
+                    )
 
-            return {'tipo': 'desconhecido', 'payload': payload}
+                for status in value.get('statuses') or []:
+                    eventos['status'].append(self._processar_status(status))
 
-        except Exception as e:
-            logger.error(f'Erro ao processar webhook: {e}')
-            return {'tipo': 'erro', 'erro': str(e)}
+        return eventos
 
     def _processar_mensagem_recebida(
         self,
@@ -398,7 +426,10 @@ class WhatsAppService:
         """
         Processa mensagem recebida do cliente.
         """
-        contacts = value.get('contacts', [{}])[0]
+        contacts = next(
+            (c for c in value.get('contacts') or [] if c.get('wa_id') == msg.get('from')),
+            {}
+        )
 
         resultado = {
             'tipo': 'mensagem_recebida',
@@ -468,41 +499,163 @@ class WhatsAppService:
             'erro': status.get('errors', [{}])[0] if status.get('errors') else None
         }
 
+    # =========================================================================
+    # MÍDIAS RECEBIDAS
+    # =========================================================================
+
+    async def obter_info_media(self, media_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Resolve um media_id: URL temporária (válida por ~5 min), mime_type,
+        sha256 e file_size.
+        """
+        url = f'{self.api_url}/{media_id}'
+
+        async def _get(client: httpx.AsyncClient):
+            response = await client.get(url, headers=self.headers, timeout=30.0)
+            if response.status_code == 200:
+                return response.json()
+            logger.error(f'Erro ao resolver mídia {media_id}: {response.status_code} {response.text}')
+
+        try:
+            return await self._executar_http(_get)
+        except Exception as e:
+            logger.error(f'Erro ao resolver mídia {media_id}: {e}')
+        return None
+
+    async def baixar_media(self, url: str, destino, tamanho_bloco: int = 64 * 1024) -> Optional[str]:
+        """
+        Baixa a mídia em blocos para `destino` (arquivo binário aberto), sem
+        carregar o arquivo inteiro em memória.
+
+        Returns:
+            str: SHA-256 (hex) do conteúdo, ou None em caso de erro
+        """
+        async def _get(client: httpx.AsyncClient):
+            sha256 = hashlib.sha256()
+            async with client.stream('GET', url, headers=self.headers, timeout=120.0) as response:
+                if response.status_code != 200:
+                    logger.error(f'Erro ao baixar mídia: {response.status_code}')
+                    return None
+                async for bloco in response.aiter_bytes(tamanho_bloco):
+                    sha256.update(bloco)
+                    destino.write(bloco)
+            return sha256.hexdigest()
+
+        try:
+            return await self._executar_http(_get)
+        except Exception as e:
+            logger.error(f'Erro ao baixar mídia: {e}')
+        return None
+
     # =========================================================================
     # MÉTODOS AUXILIARES
     # =========================================================================
 
+    def _obter_loop(self) -> asyncio.AbstractEventLoop:
+        """
+        Loop de I/O dedicado do processo (recriado após fork, ex: gunicorn --preload).
+        """
+        if self._loop is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return self._loop
+
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid() or not self._thread.is_alive():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever,
+                    name='whatsapp-http',
+                    daemon=True
+                )
+                thread.start()
+                self._loop, self._thread, self._pid = loop, thread, os.getpid()
+                self._cliente = None
+
+        return self._loop
+
+    def _criar_cliente(self) -> httpx.AsyncClient:
+        """Cria o cliente HTTP com pool e keep-alive (executa no loop de I/O)."""
+        http2 = settings.WHATSAPP_HTTP2 and HTTP2_DISPONIVEL
+        if settings.WHATSAPP_HTTP2 and not HTTP2_DISPONIVEL:
+            logger.warning('⚠️ Pacote h2 não instalado: WhatsApp usando HTTP/1.1 com keep-alive')
+
+        return httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.WHATSAPP_HTTP_MAX_CONEXOES,
+                max_keepalive_connections=settings.WHATSAPP_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=settings.WHATSAPP_HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(30.0, connect=10.0),
+        )
+
+    async def _executar_http(self, operacao, *args, **kwargs):
+        """
+        Executa `operacao(cliente, ...)` no loop de I/O com o cliente compartilhado.
+        """
+        async def _rodar():
+            if self._cliente is None or self._cliente.is_closed:
+                self._cliente = self._criar_cliente()
+            return await operacao(self._cliente, *args, **kwargs)
+
+        futuro = asyncio.run_coroutine_threadsafe(_rodar(), self._obter_loop())
+        return await asyncio.wrap_future(futuro)
+
+    def fechar(self, timeout: float = 5.0):
+        """
+        Encerra o cliente HTTP (aguardando requisições em andamento) e o loop de I/O.
+        Registrado no atexit; pode ser chamado no shutdown do worker.
+        """
+        with self._lock:
+            loop, thread, cliente = self._loop, self._thread, self._cliente
+            self._loop = self._thread = self._cliente = self._pid = None
+
+        if loop is None or not thread.is_alive():
+            return
+
+        try:
+            if cliente is not None:
+                asyncio.run_coroutine_threadsafe(cliente.aclose(), loop).result(timeout)
+        except Exception as e:
+            logger.warning(f'Erro ao fechar cliente HTTP do WhatsApp: {e}')
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+            if not thread.is_alive():
+                loop.close()
+
     async def _fazer_requisicao(self, payload: Dict) -> Dict[str, Any]:
         """
         Faz requisição para a API do WhatsApp.
         """
         url = f'{self.api_url}/{self.phone_number_id}/messages'
 
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url,
-                    json=payload,
-                    headers=self.headers,
-                    timeout=30.0
-                )
+        async def _post(client: httpx.AsyncClient):
+            response = await client.post(
+                url,
+                json=payload,
+                headers=self.headers,
+                timeout=30.0
+            )
+
+            if response.status_code == 200:
+                data = response.json()
+                return {
+                    'success': True,
+                    'message_id': data.get('messages', [{}])[0].get('id'),
+                    'response': data
+                }
+            else:
+                error_data = response.json()
+                logger.error(f'Erro WhatsApp API: {error_data}')
+                return {
+                    'success': False,
+                    'error': error_data.get('error', {}).get('message'),
+                    'error_code': error_data.get('error', {}).get('code'),
+                    'response': error_data
+                }
 
-                if response.status_code == 200:
-                    data = response.json()
-                    return {
-                        'success': True,
-                        'message_id': data.get('messages', [{}])[0].get('id'),
-                        'response': data
-                    }
-                else:
-                    error_data = response.json()
-                    logger.error(f'Erro WhatsApp API: {error_data}')
-                    return {
-                        'success': False,
-                        'error': error_data.get('error', {}).get('message'),
-                        'error_code': error_data.get('error', {}).get('code'),
-                        'response': error_data
-                    }
+        try:
+            return await self._executar_http(_post)
 
         except Exception as e:
             logger.error(f'Erro na requisição WhatsApp: {e}')
@@ -513,43 +666,74 @@ class WhatsAppService:
 
     async def _upload_media(
         self,
-        file_path: str,
-        mime_type: str
-    ) -> Optional[str]:
+        arquivo: Union[str, bytes],
+        mime_type: str,
+        nome_arquivo: str = None
+    ) -> Dict[str, Any]:
         """
-        Faz upload de arquivo para o WhatsApp e retorna media_id.
+        Faz upload de arquivo para o WhatsApp.
+        `arquivo` é um caminho local ou o conteúdo em bytes.
+
+        Returns:
+            dict: {'success': True, 'media_id': ...} ou, em caso de erro,
+            {'success': False, 'error': ..., 'error_code': ...} como nos envios
         """
         url = f'{self.api_url}/{self.phone_number_id}/media'
 
-        try:
-            async with httpx.AsyncClient() as client:
-                with open(file_path, 'rb') as f:
-                    files = {
-                        'file': (file_path, f, mime_type),
-                        'messaging_product': (None, 'whatsapp'),
-                        'type': (None, mime_type)
-                    }
-                    headers = {'Authorization': f'Bearer {self.access_token}'}
-
-                    response = await client.post(
-                        url,
-                        files=files,
-                        headers=headers,
-                        timeout=60.0
-                    )
+        if isinstance(arquivo, bytes):
+            conteudo = arquivo
+        else:
+            with open(arquivo, 'rb') as f:
+                conteudo = f.read()
+            nome_arquivo = nome_arquivo or os.path.basename(arquivo)
+
+        async def _post(client: httpx.AsyncClient):
+            files = {
+                'file': (nome_arquivo or 'arquivo', conteudo, mime_type),
+                'messaging_product': (None, 'whatsapp'),
+                'type': (None, mime_type)
+            }
+            headers = {'Authorization': f'Bearer {self.access_token}'}
+
+            response = await client.post(
+                url,
+                files=files,
+                headers=headers,
+                timeout=60.0
+            )
 
-                    if response.status_code == 200:
-                        return response.json().get('id')
+            media_id = response.json().get('id') if response.status_code == 200 else None
+            if media_id:
+                return {'success': True, 'media_id': media_id}
+
+            logger.error(f'Erro no upload de mídia: {response.status_code} {response.text}')
+            try:
+                erro = response.json().get('error', {})
+            except ValueError:
+                erro = {}
+            return {
+                'success': False,
+                'error': erro.get('message') or f'Falha no upload de mídia (HTTP {response.status_code})',
+                'error_code': erro.get('code'),
+            }
+
+        try:
+            return await self._executar_http(_post)
 
         except Exception as e:
             logger.error(f'Erro no upload de mídia: {e}')
-
-        return None
+            return {'success': False, 'error': str(e)}
 
     def _formatar_telefone(self, telefone: str) -> str:
         """
         Formata número de telefone para padrão WhatsApp (sem +, apenas números).
         """
+        from clientes.telefones import normalizar_telefone
+
+        e164 = normalizar_telefone(telefone)
+        if e164:
+            return e164.lstrip('+')
+
         # Remover caracteres não numéricos
         apenas_numeros = ''.join(filter(str.isdigit, telefone))
 
@@ -564,3 +748,4 @@ class WhatsAppService:
 
 # Instância global do serviço
 whatsapp_service = WhatsAppService()
+atexit.register(whatsapp_service.fechar)
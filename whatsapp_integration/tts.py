@@ -0,0 +1,145 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Cache de Áudios TTS do WhatsApp
+Áudio gerado uma vez por texto/voz e media_id reaproveitado até expirar
+=============================================================================
+
+O mesmo lembrete em áudio costuma ir para centenas de clientes. Em vez de
+sintetizar (gTTS) e fazer upload a cada envio:
+
+1. A chave do áudio é o SHA-256 de voz + texto
+2. O MP3 é gerado uma única vez em um pool de threads (fora do event loop)
+   e guardado no storage em whatsapp/tts/<chave>.mp3 - sem arquivos
+   temporários
+3. O media_id devolvido pelo upload fica no cache compartilhado até perto
+   de expirar (a Cloud API mantém mídias por 30 dias)
+4. Envios simultâneos do mesmo áudio esperam a mesma síntese/upload
+"""
+
+import asyncio
+import hashlib
+import io
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from gtts import gTTS
+
+logger = logging.getLogger(__name__)
+
+IDIOMA_PADRAO = 'pt-br'
+MIME_TYPE = 'audio/mpeg'
+PASTA_AUDIOS = 'whatsapp/tts'
+CACHE_PREFIXO = 'whatsapp:tts:media:'
+
+# Erros da API que indicam media_id inválido/expirado (vale novo upload)
+CODIGOS_ERRO_MIDIA = {100, 131052, 131053}
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.WHATSAPP_TTS_WORKERS,
+    thread_name_prefix='whatsapp-tts'
+)
+
+# Síntese/upload em andamento por chave de cache (single-flight)
+_em_andamento: Dict[str, Future] = {}
+_lock = threading.Lock()
+
+
+def chave_audio(texto: str, idioma: str = IDIOMA_PADRAO, lento: bool = False) -> str:
+    """Hash do conteúdo: mesmo texto e mesma voz → mesmo áudio."""
+    conteudo = f'{idioma}|{int(lento)}|{texto.strip()}'
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+
+def _chave_cache(phone_number_id: str, chave: str) -> str:
+    # media_id pertence ao número de envio
+    return f'{CACHE_PREFIXO}{phone_number_id}:{chave}'
+
+
+def obter_audio(texto: str, idioma: str = IDIOMA_PADRAO, lento: bool = False) -> Tuple[str, bytes]:
+    """
+    MP3 do texto: lê do storage ou sintetiza e grava (bloqueante; roda no pool).
+
+    Returns:
+        tuple: (nome do arquivo no storage, conteúdo)
+    """
+    chave = chave_audio(texto, idioma, lento)
+    nome = f'{PASTA_AUDIOS}/{chave}.mp3'
+
+    if default_storage.exists(nome):
+        with default_storage.open(nome, 'rb') as arquivo:
+            return nome, arquivo.read()
+
+    buffer = io.BytesIO()
+    gTTS(text=texto, lang=idioma, slow=lento).write_to_fp(buffer)
+    conteudo = buffer.getvalue()
+
+    salvo = default_storage.save(nome, ContentFile(conteudo))
+    if salvo != nome:
+        # Outro processo gravou o mesmo áudio ao mesmo tempo
+        default_storage.delete(salvo)
+
+    logger.info(f'🔊 Áudio TTS gerado: {nome} ({len(conteudo)} bytes)')
+    return nome, conteudo
+
+
+async def obter_media_id(
+    servico,
+    texto: str,
+    idioma: str = IDIOMA_PADRAO,
+    lento: bool = False
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    media_id do áudio para o número do serviço, reaproveitando o cache.
+
+    Returns:
+        tuple: (resultado do upload - {'success', 'media_id'} ou o erro da
+        API -, True se veio do cache)
+    """
+    chave = chave_audio(texto, idioma, lento)
+    chave_cache = _chave_cache(servico.phone_number_id, chave)
+
+    media_id = cache.get(chave_cache)
+    if media_id:
+        return {'success': True, 'media_id': media_id}, True
+
+    with _lock:
+        futuro = _em_andamento.get(chave_cache)
+        responsavel = futuro is None
+        if responsavel:
+            futuro = _em_andamento[chave_cache] = Future()
+
+    if not responsavel:
+        return await asyncio.wrap_future(futuro), False
+
+    try:
+        loop = asyncio.get_running_loop()
+        nome, conteudo = await loop.run_in_executor(_executor, obter_audio, texto, idioma, lento)
+
+        upload = await servico._upload_media(conteudo, MIME_TYPE, nome_arquivo=f'{chave}.mp3')
+        if upload['success']:
+            cache.set(chave_cache, upload['media_id'], settings.WHATSAPP_MEDIA_ID_VALIDADE_DIAS * 86400)
+
+        futuro.set_result(upload)
+        return upload, False
+
+    except Exception as e:
+        futuro.set_exception(e)
+        raise
+
+    finally:
+        # Tarefa cancelada (CancelledError não é Exception): libera quem espera
+        if not futuro.done():
+            futuro.set_exception(RuntimeError('Geração do áudio interrompida'))
+        with _lock:
+            _em_andamento.pop(chave_cache, None)
+
+
+def esquecer_media_id(servico, texto: str, idioma: str = IDIOMA_PADRAO, lento: bool = False):
+    """Descarta o media_id em cache (mídia expirada ou rejeitada pela API)."""
+    cache.delete(_chave_cache(servico.phone_number_id, chave_audio(texto, idioma, lento)))
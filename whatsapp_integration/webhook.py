@@ -0,0 +1,247 @@
+"""
+=============================================================================
+LIFE RAINBOW 2.0 - Processamento da Caixa de Entrada do Webhook
+Converte os payloads brutos de EventoWebhook em Conversa/Mensagem em lote
+=============================================================================
+
+O webhook apenas grava o payload (EventoWebhook) e responde 200. Este
+worker processa os eventos pendentes em lotes:
+
+- Todas as mensagens e status de todos os entries/changes
+- Conversas criadas/atualizadas em lote (chave: wa_id)
+- Mensagens inseridas em lote com chave wamid: reentregas da Meta
+  (mesmo wamid) são ignoradas, tornando o processamento idempotente
+- Status coalescidos por wamid e aplicados em lote (ver recibos.py)
+- Mensagens sem wa_id/wamid são descartadas (motivo em EventoWebhook.erro);
+  se a gravação do lote falhar, os eventos são gravados um a um e só o
+  evento problemático conta tentativa
+
+Executar continuamente:
+    python manage.py processar_webhooks --continuo
+"""
+
+import logging
+from datetime import datetime, timezone as dt_timezone
+from typing import Any, Dict, List, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Conversa, EventoWebhook, Mensagem
+from .recibos import ProcessadorRecibos
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_LOTE = 200
+MAX_TENTATIVAS = 5
+
+TIPOS_MENSAGEM = {tipo for tipo, _ in Mensagem.TIPO_CHOICES}
+
+
+def _data_evento(timestamp) -> datetime:
+    """Timestamp Unix (string) da Meta → datetime aware."""
+    try:
+        return datetime.fromtimestamp(int(timestamp), tz=dt_timezone.utc)
+    except (TypeError, ValueError):
+        return timezone.now()
+
+
+def _conteudo_mensagem(evento: Dict[str, Any]) -> str:
+    """Texto armazenado em Mensagem.conteudo para cada tipo de mensagem."""
+    if evento.get('conteudo'):
+        return evento['conteudo']
+    if evento.get('caption'):
+        return evento['caption']
+    if evento.get('filename'):
+        return evento['filename']
+
+    resposta = evento.get('resposta_botao') or evento.get('resposta_lista')
+    if resposta:
+        return resposta.get('titulo') or ''
+
+    if evento.get('latitude') is not None:
+        partes = [evento.get('nome_local'), evento.get('endereco'),
+                  f"{evento['latitude']},{evento['longitude']}"]
+        return ' - '.join(p for p in partes if p)
+
+    return ''
+
+
+def _vincular_clientes(wa_ids: List[str]) -> Dict[str, int]:
+    """wa_id → cliente_id pelos telefones E.164 (com cache)."""
+    from clientes.telefones import resolver_cliente_por_telefone
+
+    vinculos = {}
+    for wa_id in wa_ids:
+        cliente_id = resolver_cliente_por_telefone(wa_id)
+        if cliente_id:
+            vinculos[wa_id] = cliente_id
+    return vinculos
+
+
+def _gravar_mensagens(eventos: List[Dict[str, Any]]) -> int:
+    """Upsert de conversas por wa_id e inserção de mensagens por wamid."""
+    # Deduplicar no lote e contra o banco
+    por_wamid = {e['wamid']: e for e in eventos if e.get('wamid')}
+    existentes = set(Mensagem.objects.filter(
+        wamid__in=por_wamid
+    ).values_list('wamid', flat=True))
+    novas = [e for wamid, e in por_wamid.items() if wamid not in existentes]
+
+    if not novas:
+        return 0
+
+    # Conversas: última mensagem e nome por wa_id
+    ultimas = {}
+    for e in novas:
+        data = _data_evento(e.get('timestamp'))
+        atual = ultimas.get(e['wa_id'])
+        if atual is None or data > atual['data']:
+            nome = e.get('nome_contato') or (atual and atual['nome'])
+            ultimas[e['wa_id']] = {'data': data, 'nome': nome}
+        elif not atual['nome']:
+            atual['nome'] = e.get('nome_contato')
+
+    conversas = Conversa.objects.in_bulk(list(ultimas), field_name='wa_id')
+    faltantes = [wa_id for wa_id in ultimas if wa_id not in conversas]
+    if faltantes:
+        vinculos = _vincular_clientes(faltantes)
+        Conversa.objects.bulk_create([
+            Conversa(
+                wa_id=wa_id,
+                telefone=wa_id,
+                cliente_id=vinculos.get(wa_id),
+                nome_contato=ultimas[wa_id]['nome'],
+            )
+            for wa_id in faltantes
+        ], ignore_conflicts=True)
+        conversas = Conversa.objects.in_bulk(list(ultimas), field_name='wa_id')
+
+    atualizadas = []
+    for wa_id, dados in ultimas.items():
+        conversa = conversas[wa_id]
+        if not conversa.ultima_mensagem_cliente or dados['data'] > conversa.ultima_mensagem_cliente:
+            conversa.ultima_mensagem_cliente = dados['data']
+        conversa.status = Conversa.STATUS_ATIVA
+        conversa.nome_contato = dados['nome'] or conversa.nome_contato
+        conversa.updated_at = timezone.now()
+        atualizadas.append(conversa)
+    Conversa.objects.bulk_update(
+        atualizadas,
+        ['ultima_mensagem_cliente', 'status', 'nome_contato', 'updated_at']
+    )
+
+    mensagens = [
+        Mensagem(
+            conversa=conversas[e['wa_id']],
+            wamid=e['wamid'],
+            direcao=Mensagem.DIRECAO_ENTRADA,
+            tipo=e.get('tipo_mensagem') if e.get('tipo_mensagem') in TIPOS_MENSAGEM else Mensagem.TIPO_TEXTO,
+            status=Mensagem.STATUS_ENTREGUE,
+            conteudo=_conteudo_mensagem(e),
+            media_id=e.get('media_id'),
+            mime_type=e.get('mime_type'),
+            data_envio=_data_evento(e.get('timestamp')),
+        )
+        for e in novas
+    ]
+    # ignore_conflicts: outro worker pode ter gravado o mesmo wamid
+    Mensagem.objects.bulk_create(mensagens, ignore_conflicts=True)
+
+    return len(mensagens)
+
+
+def _validas(mensagens: List[Dict[str, Any]], evento: EventoWebhook) -> List[Dict[str, Any]]:
+    """
+    Descarta mensagens sem wa_id ou wamid (payload malformado).
+
+    Sem essas chaves não há conversa nem idempotência: a mensagem é
+    descartada com o motivo em evento.erro, e o restante do evento segue.
+    """
+    validas = [m for m in mensagens if m.get('wa_id') and m.get('wamid')]
+    descartadas = len(mensagens) - len(validas)
+    if descartadas:
+        logger.warning(f'⚠️ Webhook #{evento.pk}: {descartadas} mensagem(ns) sem wa_id/wamid descartada(s)')
+        evento.erro = f'{descartadas} mensagem(ns) sem wa_id/wamid descartada(s)'
+    return validas
+
+
+def _aplicar(interpretados: List[Tuple[EventoWebhook, Dict[str, Any]]]) -> Tuple[int, int]:
+    """Grava mensagens e recibos dos eventos. Returns: (mensagens, status)."""
+    mensagens = []
+    recibos = ProcessadorRecibos()
+    for _, eventos in interpretados:
+        mensagens.extend(eventos['mensagens'])
+        recibos.adicionar(eventos['status'])
+
+    gravadas = _gravar_mensagens(mensagens)
+    return gravadas, recibos.descarregar()['mensagens']
+
+
+def processar_inbox(tamanho_lote: int = TAMANHO_LOTE) -> Dict[str, int]:
+    """
+    Processa um lote de eventos pendentes da caixa de entrada.
+
+    A gravação é feita para o lote inteiro; se falhar, cada evento é
+    gravado separadamente e só os que falharem contam tentativa e erro.
+
+    Returns:
+        dict: eventos, mensagens, status e erros do lote
+    """
+    from .services import whatsapp_service
+
+    resultado = {'eventos': 0, 'mensagens': 0, 'status': 0, 'erros': 0}
+
+    with transaction.atomic():
+        lote = list(EventoWebhook.objects.filter(
+            processado_em__isnull=True,
+            tentativas__lt=MAX_TENTATIVAS
+        ).order_by('id').select_for_update(skip_locked=True)[:tamanho_lote])
+
+        if not lote:
+            # Recibos guardados à espera do wamid (campanha/saída gravando o lote)
+            resultado['status'] = ProcessadorRecibos().descarregar()['mensagens']
+            return resultado
+
+        interpretados, com_erro = [], []
+        for evento in lote:
+            evento.erro = None
+            try:
+                eventos = whatsapp_service.processar_webhook(evento.payload)
+                eventos['mensagens'] = _validas(eventos['mensagens'], evento)
+                interpretados.append((evento, eventos))
+            except Exception as e:
+                logger.error(f'Erro ao interpretar webhook #{evento.pk}: {e}')
+                evento.erro = str(e)
+                com_erro.append(evento)
+
+        try:
+            with transaction.atomic():
+                resultado['mensagens'], resultado['status'] = _aplicar(interpretados)
+        except Exception as e:
+            logger.warning(f'⚠️ Falha ao gravar o lote de webhooks ({e}); gravando evento a evento')
+            for evento, eventos in interpretados:
+                try:
+                    with transaction.atomic():
+                        mensagens, status = _aplicar([(evento, eventos)])
+                except Exception as e:
+                    logger.error(f'Erro ao gravar webhook #{evento.pk}: {e}')
+                    evento.erro = str(e)
+                    com_erro.append(evento)
+                    continue
+                resultado['mensagens'] += mensagens
+                resultado['status'] += status
+
+        ids_erro = {e.pk for e in com_erro}
+        processados = [e for e in lote if e.pk not in ids_erro]
+        agora = timezone.now()
+        for evento in processados:
+            evento.processado_em = agora
+        EventoWebhook.objects.bulk_update(processados, ['processado_em', 'erro'])
+        for evento in com_erro:
+            evento.tentativas += 1
+        EventoWebhook.objects.bulk_update(com_erro, ['tentativas', 'erro'])
+
+    resultado['eventos'] = len(lote)
+    resultado['erros'] = len(com_erro)
+    return resultado